@@ -1,3 +1,4 @@
 """API module for HTB Client."""
 from .client import HTBClient
 from .endpoints import HTBApi
+from .async_client import AsyncHTBClient, AsyncHTBApi, run_concurrently
@@ -0,0 +1,115 @@
+"""
+HTB Async API
+asyncio variants of HTBClient / HTBApi with a concurrent fan-out helper.
+
+Calls run in a shared thread pool on top of the blocking client, so response
+caching, request coalescing and rate limiting apply exactly as for HTBApi.
+Workers call run_concurrently() from their QThread, which drives a private
+event loop and keeps the Qt GUI thread free.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Dict, Optional, Tuple
+
+from config import API_CONCURRENCY
+from utils.debug import debug_log
+from .client import HTBClient, client
+from .endpoints import HTBApi
+
+_executor = ThreadPoolExecutor(max_workers=API_CONCURRENCY * 2,
+                               thread_name_prefix="htb-api")
+
+
+async def call_async(fn, *args, **kwargs) -> Tuple[bool, Any]:
+    """Run a blocking (success, data) call without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
+    except Exception as e:
+        return False, str(e)
+
+
+class AsyncHTBClient:
+    """asyncio facade over an HTBClient."""
+    
+    def __init__(self, sync_client: HTBClient = client):
+        self._client = sync_client
+    
+    async def get(self, endpoint: str, params: Optional[dict] = None,
+                  version: str = "v4", bypass_cache: bool = False) -> Tuple[bool, Any]:
+        """Async version of HTBClient.get."""
+        return await call_async(self._client.get, endpoint, params,
+                                  version, bypass_cache)
+    
+    async def post(self, endpoint: str, data: Optional[dict] = None,
+                   version: str = "v4") -> Tuple[bool, Any]:
+        """Async version of HTBClient.post."""
+        return await call_async(self._client.post, endpoint, data, version)
+
+
+# HTBApi methods that do I/O. In-memory helpers (rate_budget, api_state,
+# activity_fingerprint) stay plain calls on HTBApi: no thread pool hop.
+_NETWORK_METHODS = (
+    "get_user_info",
+    "get_seasons", "get_season_machines", "get_active_season_machine", "get_season_leaderboard",
+    "get_machines", "get_machine_profile", "get_active_machine", "get_machine_activity",
+    "spawn_machine", "reset_machine", "terminate_machine", "submit_flag",
+    "get_connection_status", "get_vpn_servers", "switch_server", "download_vpn_file",
+)
+
+
+class AsyncHTBApi:
+    """
+    The network endpoints of HTBApi, as coroutines.
+    All methods return Tuple[bool, data/error].
+    """
+
+
+def _make_async(fn):
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await call_async(fn, *args, **kwargs)
+    return staticmethod(wrapper)
+
+
+for _name in _NETWORK_METHODS:
+    setattr(AsyncHTBApi, _name, _make_async(getattr(HTBApi, _name)))
+
+
+async def gather_limited(*aws: Awaitable, limit: int = API_CONCURRENCY) -> list:
+    """
+    Await many calls concurrently, at most `limit` at a time.
+    
+    Returns:
+        Results in the same order as the awaitables
+    """
+    semaphore = asyncio.Semaphore(limit)
+    
+    async def _run(aw):
+        async with semaphore:
+            return await aw
+    
+    return await asyncio.gather(*(_run(aw) for aw in aws))
+
+
+def run_concurrently(calls: Dict[str, Awaitable],
+                     limit: int = API_CONCURRENCY) -> Dict[str, Tuple[bool, Any]]:
+    """
+    Run named API coroutines concurrently from a worker thread.
+    
+    Args:
+        calls: Mapping of name -> coroutine (e.g. AsyncHTBApi.get_user_info())
+        limit: Maximum calls in flight at once
+    
+    Returns:
+        Mapping of name -> (success, data/error)
+    """
+    debug_log("API", f"Fan-out: {', '.join(calls)} (limit={limit})")
+    
+    async def _main():
+        results = await gather_limited(*calls.values(), limit=limit)
+        return dict(zip(calls.keys(), results))
+    
+    return asyncio.run(_main())
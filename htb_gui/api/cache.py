@@ -0,0 +1,149 @@
+"""
+HTB API Response Cache
+Per-endpoint TTL cache with ETag / Last-Modified revalidation.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from .routes import endpoint_template
+
+# Seconds a response stays fresh, per endpoint template.
+# Endpoints not listed here are never cached.
+DEFAULT_TTLS: Dict[str, float] = {
+    "/user/info": 300,
+    "/season/list": 3600,
+    "/season/machines/{id}": 600,
+    "/season/machine/active": 600,
+    "/season/players/leaderboard": 120,
+    "/machines": 300,
+    "/machine/profile/{name}": 300,
+    "/machine/active": 10,
+    "/machine/activity/{id}": 10,
+    "/connection/status": 15,
+    "/connections/servers": 60,
+}
+
+# Cached endpoints made stale by a successful POST action
+INVALIDATED_BY: Dict[str, Tuple[str, ...]] = {
+    "/vm/spawn": ("/machine/active", "/connection/status"),
+    "/vm/reset": ("/machine/active",),
+    "/vm/terminate": ("/machine/active", "/connection/status"),
+    "/machine/own": ("/user/info", "/machines", "/machine/profile/{name}",
+                     "/machine/activity/{id}", "/season/players/leaderboard"),
+    "/connections/servers/switch/{id}": ("/connection/status", "/connections/servers"),
+}
+
+CacheKey = Tuple[str, str, Tuple[Tuple[str, str], ...]]
+
+
+@dataclass
+class CacheEntry:
+    """A cached API response and its validators."""
+    template: str
+    data: Any
+    stored_at: float
+    ttl: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def fresh(self) -> bool:
+        """Whether the entry can be served without contacting the server."""
+        return time.monotonic() - self.stored_at < self.ttl
+
+    def validators(self) -> dict:
+        """Conditional request headers for revalidation."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """
+    Thread-safe response cache shared by every worker thread.
+    Keys are (version, endpoint, params); TTLs are set per endpoint template.
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None):
+        self._ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self._entries: Dict[CacheKey, CacheEntry] = {}
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so derived caches can detect it
+        self.generation = 0
+
+    @staticmethod
+    def make_key(version: str, endpoint: str, params: Optional[dict] = None) -> CacheKey:
+        """Build the cache key of a request."""
+        items = tuple(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+        return (version, endpoint, items)
+
+    def ttl_for(self, endpoint: str) -> float:
+        """Get the TTL (seconds) of an endpoint, 0 if it is not cached."""
+        return self._ttls.get(endpoint_template(endpoint), 0)
+
+    def set_ttl(self, template: str, seconds: float):
+        """Configure the TTL of an endpoint template (0 disables caching)."""
+        with self._lock:
+            self._ttls[template] = seconds
+
+    def lookup(self, key: CacheKey) -> Optional[CacheEntry]:
+        """Get the entry for a key, fresh or stale."""
+        with self._lock:
+            return self._entries.get(key)
+
+    def store(self, key: CacheKey, data: Any, headers) -> None:
+        """Store a successful response if its endpoint is cacheable."""
+        template = endpoint_template(key[1])
+        ttl = self._ttls.get(template, 0)
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if ttl <= 0 and not (etag or last_modified):
+            return
+        if "no-store" in headers.get("Cache-Control", ""):
+            return
+        entry = CacheEntry(template, data, time.monotonic(), ttl, etag, last_modified)
+        with self._lock:
+            self._entries[key] = entry
+
+    def refresh(self, key: CacheKey, headers) -> Optional[CacheEntry]:
+        """Mark an entry fresh again after a 304 Not Modified."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                entry.stored_at = time.monotonic()
+                entry.etag = headers.get("ETag", entry.etag)
+                entry.last_modified = headers.get("Last-Modified", entry.last_modified)
+            return entry
+
+    def invalidate(self, endpoint: Optional[str] = None) -> int:
+        """
+        Drop cached entries.
+
+        Args:
+            endpoint: Concrete endpoint or template; None drops everything
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            self.generation += 1
+            if endpoint is None:
+                count = len(self._entries)
+                self._entries.clear()
+                return count
+            stale = [k for k, e in self._entries.items()
+                     if k[1] == endpoint or e.template == endpoint]
+            for k in stale:
+                del self._entries[k]
+            return len(stale)
+
+    def invalidate_after(self, endpoint: str) -> None:
+        """Drop entries made stale by a successful POST to an endpoint."""
+        for target in INVALIDATED_BY.get(endpoint_template(endpoint), ()):
+            self.invalidate(target)
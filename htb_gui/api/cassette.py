@@ -0,0 +1,178 @@
+"""
+HTB API Cassettes
+Record every API round-trip to a compact file and replay it offline.
+
+A cassette is a gzip-compressed JSON-lines file, one interaction per line.
+Binary bodies (e.g. .ovpn files) are stored base64-encoded. The API token
+is never written: only the method, URL, query and JSON body identify a
+request.
+"""
+
+import base64
+import gzip
+import json
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from utils.debug import debug_log
+
+# Response headers worth keeping for replay (cache validators, rate limits)
+RECORDED_HEADERS = (
+    "Content-Type", "ETag", "Last-Modified", "Cache-Control",
+    "Retry-After", "X-RateLimit-Remaining", "X-RateLimit-Reset",
+)
+
+InteractionKey = Tuple[str, str, str, str]
+
+
+def _request_key(method: str, url: str, params: Optional[dict],
+                 body: Optional[dict]) -> InteractionKey:
+    query = urlencode(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+    payload = json.dumps(body, sort_keys=True) if body is not None else ""
+    return (method.upper(), url, query, payload)
+
+
+class CassetteRecorder:
+    """Appends interactions to a cassette as they happen."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # Start a fresh cassette; each write appends a gzip member
+        self.path.write_bytes(b"")
+        debug_log("CASSETTE", f"Recording to {self.path}")
+
+    def record(self, method: str, url: str, params: Optional[dict],
+               body: Optional[dict], response: requests.Response, elapsed: float):
+        """Store one round-trip. 304 responses are skipped (replay serves full bodies)."""
+        if response.status_code == 304:
+            return
+        entry = {
+            "method": method.upper(),
+            "url": url,
+            "params": params or {},
+            "body": body,
+            "status": response.status_code,
+            "headers": {h: response.headers[h] for h in RECORDED_HEADERS
+                        if h in response.headers},
+            "elapsed": round(elapsed, 4),
+        }
+        content_type = response.headers.get("Content-Type", "")
+        if "json" in content_type or content_type.startswith("text/"):
+            entry["text"] = response.content.decode("utf-8", errors="replace")
+        else:
+            entry["b64"] = base64.b64encode(response.content).decode("ascii")
+
+        line = (json.dumps(entry, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._lock:
+            with gzip.open(self.path, "ab") as f:
+                f.write(line)
+
+
+class CassettePlayer:
+    """
+    Serves recorded interactions instead of hitting the network.
+
+    Repeated requests replay their recordings in order; once exhausted the
+    last one is served again (so polling keeps working).
+    """
+
+    def __init__(self, path: Path, latency: str = ""):
+        self.path = Path(path)
+        self._latency = latency
+        self._interactions: Dict[InteractionKey, List[dict]] = defaultdict(list)
+        self._served: Dict[InteractionKey, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        count = 0
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                key = _request_key(entry["method"], entry["url"],
+                                   entry.get("params"), entry.get("body"))
+                self._interactions[key].append(entry)
+                count += 1
+        debug_log("CASSETTE", f"Loaded {count} interactions from {self.path}")
+
+    def _delay(self, entry: dict) -> float:
+        if not self._latency:
+            return 0.0
+        if self._latency == "recorded":
+            return entry.get("elapsed", 0.0)
+        try:
+            return float(self._latency)
+        except ValueError:
+            return 0.0
+
+    def play(self, method: str, url: str, params: Optional[dict],
+             body: Optional[dict]) -> requests.Response:
+        """Build the recorded response of a request (404 if it was never recorded)."""
+        key = _request_key(method, url, params, body)
+        with self._lock:
+            entries = self._interactions.get(key)
+            if entries:
+                index = min(self._served[key], len(entries) - 1)
+                self._served[key] += 1
+                entry = entries[index]
+            else:
+                entry = None
+
+        response = requests.Response()
+        response.url = url
+        response.encoding = "utf-8"
+        if entry is None:
+            debug_log("CASSETTE", f"No recording for {method} {url}")
+            response.status_code = 404
+            response.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+            response._content = b'{"message": "Not recorded in cassette"}'
+            return response
+
+        delay = self._delay(entry)
+        if delay > 0:
+            time.sleep(delay)
+        response.status_code = entry["status"]
+        response.headers = CaseInsensitiveDict(entry.get("headers", {}))
+        if "b64" in entry:
+            response._content = base64.b64decode(entry["b64"])
+        else:
+            response._content = entry.get("text", "").encode("utf-8")
+        return response
+
+
+class Cassette:
+    """Record and/or replay hook used by HTBClient."""
+
+    def __init__(self, record_path: Optional[str] = None,
+                 replay_path: Optional[str] = None, latency: str = ""):
+        self.recorder = CassetteRecorder(Path(record_path)) if record_path else None
+        self.player = CassettePlayer(Path(replay_path), latency) if replay_path else None
+
+    @property
+    def replaying(self) -> bool:
+        return self.player is not None
+
+    def request(self, transport, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request through the transport, or replay it from the cassette."""
+        params = kwargs.get("params")
+        body = kwargs.get("json")
+        if self.player:
+            return self.player.play(method, url, params, body)
+
+        start = time.monotonic()
+        response = transport.request(method, url, **kwargs)
+        if self.recorder:
+            self.recorder.record(method, url, params, body, response,
+                                 time.monotonic() - start)
+        return response
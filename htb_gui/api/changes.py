@@ -0,0 +1,59 @@
+"""
+HTB API Change Detection
+Tracks the last response fingerprint seen by each consumer so polls of
+unchanged data can skip all UI work.
+"""
+
+import threading
+from typing import Dict, Hashable, Optional
+
+
+class ChangeDetector:
+    """
+    Remembers the last fingerprint per consumer (e.g. 'dashboard.activity').
+    A missing fingerprint (None) always counts as a change.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seen: Dict[Hashable, str] = {}
+    
+    def changed(self, consumer: Hashable, fingerprint: Optional[str]) -> bool:
+        """
+        Tell whether a fingerprint differs from the last one recorded.
+        
+        Nothing is recorded here: call record() once the consumer has shown
+        the new data, so a result that never reached the screen (page hidden
+        mid-poll) is not taken as seen.
+        
+        Args:
+            consumer: Identity of the polling consumer
+            fingerprint: Response fingerprint (see HTBClient.digest)
+        
+        Returns:
+            True if the consumer has to update, False if nothing changed
+        """
+        if fingerprint is None:
+            return True
+        with self._lock:
+            return self._seen.get(consumer) != fingerprint
+    
+    def record(self, consumer: Hashable, fingerprint: Optional[str]):
+        """Remember the fingerprint of the data a consumer has just shown."""
+        with self._lock:
+            if fingerprint is None:
+                self._seen.pop(consumer, None)
+            else:
+                self._seen[consumer] = fingerprint
+    
+    def forget(self, consumer: Optional[Hashable] = None):
+        """Force the next check of a consumer (or all consumers) to report a change."""
+        with self._lock:
+            if consumer is None:
+                self._seen.clear()
+            else:
+                self._seen.pop(consumer, None)
+
+
+# Global change detector
+changes = ChangeDetector()
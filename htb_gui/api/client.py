@@ -1,14 +1,32 @@
 """
 HTB API Client
-Base HTTP client with debug logging and TLS verification disabled.
+Base HTTP client with debug logging, response caching, rate limiting,
+retries with a circuit breaker and TLS verification disabled.
 """
 
+import hashlib
+import threading
+import time
 import requests
 import urllib3
-from typing import Any, Optional, Tuple
+from typing import Any, Dict, Optional, Tuple
 
-from config import config, API_V4, API_V5
+from config import (
+    config, API_V4, API_V5, POOL_SIZES,
+    RATE_LIMIT_CAPACITY, RATE_LIMIT_REFILL, RATE_LIMIT_RETRIES, RATE_LIMIT_MAX_WAIT,
+    CONNECT_TIMEOUT, READ_TIMEOUT, BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT,
+    CASSETTE_RECORD, CASSETTE_REPLAY, CASSETTE_LATENCY
+)
 from utils.debug import debug_request, debug_response, debug_log
+from utils.metrics import metrics
+from .cassette import Cassette
+from .cache import CacheKey, ResponseCache
+from .ratelimit import RateLimiter, retry_after_seconds
+from .routes import endpoint_template
+from .threads import check_network_thread
+from .resilience import CircuitBreaker, CircuitOpenError, RetryPolicy, policy_for
+from .singleflight import SingleFlight
+from .transport import Transport
 
 # Disable SSL warnings (as requested)
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -21,8 +39,17 @@ class HTBClient:
     """
     
     def __init__(self):
-        self.session = requests.Session()
-        self.session.verify = False  # Disable TLS verification as requested
+        # Disable TLS verification as requested
+        self.transport = Transport(POOL_SIZES, verify=False)
+        self.cassette = Cassette(CASSETTE_RECORD or None, CASSETTE_REPLAY or None,
+                                 CASSETTE_LATENCY)
+        self.cache = ResponseCache()
+        self._inflight = SingleFlight()
+        self.rate_limiter = RateLimiter(RATE_LIMIT_CAPACITY, RATE_LIMIT_REFILL)
+        self.breaker = CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT)
+        # Body fingerprint of the last response per cache key: (digest, parsed data)
+        self._digests: Dict[CacheKey, Tuple[str, Any]] = {}
+        self._digests_lock = threading.Lock()
         debug_log("CLIENT", "HTBClient initialized (TLS verification disabled)")
     
     def _get_headers(self) -> dict:
@@ -38,46 +65,177 @@ class HTBClient:
         
         return headers
     
+    def _send(self, method: str, url: str, endpoint: str, **kwargs) -> requests.Response:
+        """
+        Send a request through the circuit breaker and shared rate limiter.
+        
+        429 responses are retried after the server's Retry-After delay
+        (or an exponential fallback) instead of being returned as errors.
+        Transient failures are retried according to the endpoint's
+        RetryPolicy, with exponential backoff and jitter.
+        
+        Raises:
+            CircuitOpenError: The API is degraded and the call was short-circuited
+            requests.RequestException: Transport error after all retries
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(
+                f"API degraded, retrying in {self.breaker.retry_in():.0f}s")
+        
+        policy = policy_for(method, endpoint)
+        kwargs.setdefault("timeout", (CONNECT_TIMEOUT, READ_TIMEOUT))
+        template = endpoint_template(endpoint)
+        attempt = 0
+        rate_retries = 0
+        recorded = False  # the breaker got a success / failure for this call
+        try:
+            while True:
+                self.rate_limiter.acquire()
+                started = time.monotonic()
+                try:
+                    response = self.cassette.request(self.transport, method, url, **kwargs)
+                except requests.RequestException as e:
+                    metrics.record_request("api", template, time.monotonic() - started, error=True)
+                    if attempt + 1 < policy.max_attempts and policy.should_retry(e):
+                        metrics.record_retry(template)
+                        self._backoff(policy, attempt, url, type(e).__name__)
+                        attempt += 1
+                        continue
+                    self.breaker.record_failure()
+                    recorded = True
+                    raise
+                
+                metrics.record_request("api", template, time.monotonic() - started,
+                                       response.status_code, len(response.content))
+                self.rate_limiter.update_from_headers(response.headers)
+                if response.status_code == 429 and rate_retries < RATE_LIMIT_RETRIES:
+                    delay = retry_after_seconds(response.headers)
+                    if delay is None:
+                        delay = 2.0 ** rate_retries
+                    delay = min(delay, RATE_LIMIT_MAX_WAIT)
+                    self.rate_limiter.penalize(delay)
+                    rate_retries += 1
+                    metrics.record_retry(template)
+                    debug_log("RATE", f"429 on {url}, retrying in {delay:.1f}s "
+                                      f"({rate_retries}/{RATE_LIMIT_RETRIES})")
+                    continue
+                if response.status_code in policy.retry_statuses and attempt + 1 < policy.max_attempts:
+                    metrics.record_retry(template)
+                    self._backoff(policy, attempt, url, f"HTTP {response.status_code}")
+                    attempt += 1
+                    continue
+                
+                if response.status_code >= 500:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                recorded = True
+                return response
+        finally:
+            if not recorded:
+                # Not a network outcome (cassette / parsing / thread guard error):
+                # a half-open probe must not stay in flight forever
+                self.breaker.release_probe()
+    
+    @staticmethod
+    def _backoff(policy: RetryPolicy, attempt: int, url: str, reason: str):
+        delay = policy.backoff(attempt)
+        debug_log("RETRY", f"{reason} on {url}, attempt {attempt + 2}/{policy.max_attempts} "
+                           f"in {delay:.2f}s")
+        time.sleep(delay)
+    
+    @staticmethod
+    def _error_message(response: requests.Response) -> str:
+        """Extract an error message from a failed response."""
+        content_type = response.headers.get('Content-Type', '')
+        if 'application/json' in content_type:
+            try:
+                data = response.json()
+                return data.get('message', data.get('error', f'HTTP {response.status_code}'))
+            except Exception:
+                pass
+        if response.status_code == 429:
+            return f"Rate limit (429) after {RATE_LIMIT_RETRIES} retries. Try again later."
+        return f"HTTP {response.status_code}"
+    
+    def invalidate(self, endpoint: Optional[str] = None) -> None:
+        """
+        Drop cached responses so the next GET hits the server.
+        
+        Args:
+            endpoint: Concrete endpoint or template; None clears the whole cache
+        """
+        count = self.cache.invalidate(endpoint)
+        if endpoint is None:
+            with self._digests_lock:
+                self._digests.clear()
+        debug_log("CACHE", f"Invalidated {count} entries ({endpoint or 'all'})")
+    
     def get(self, endpoint: str, params: Optional[dict] = None, 
-            version: str = "v4") -> Tuple[bool, Any]:
+            version: str = "v4", bypass_cache: bool = False) -> Tuple[bool, Any]:
         """
         Make a GET request to the API.
         
+        Fresh cached responses are served from memory; stale ones are
+        revalidated with If-None-Match / If-Modified-Since when possible.
+        Concurrent identical requests share a single HTTP round-trip.
+        
         Args:
             endpoint: API endpoint (without base URL)
             params: Query parameters
             version: API version ('v4' or 'v5')
+            bypass_cache: Always hit the server (the response is still cached)
         
         Returns:
             Tuple of (success, data/error_message)
         """
+        check_network_thread(f"GET {endpoint}")
         base = API_V4 if version == "v4" else API_V5
         url = f"{base}{endpoint}"
         
+        key = self.cache.make_key(version, endpoint, params)
+        entry = self.cache.lookup(key)
+        if entry and entry.fresh and not bypass_cache:
+            debug_log("CACHE", f"HIT {url}")
+            metrics.record_cache_hit(endpoint_template(endpoint))
+            return True, entry.data
+        
+        # A forced read only joins other forced reads, never an earlier revalidation
+        flight_key = ("GET", url, key[2], bypass_cache)
+        result, shared = self._inflight.do(
+            flight_key, lambda: self._fetch(url, params, key, entry, bypass_cache)
+        )
+        if shared:
+            debug_log("CLIENT", f"Coalesced GET {url}")
+            metrics.record_coalesced(endpoint_template(endpoint))
+        return result
+    
+    def _fetch(self, url: str, params: Optional[dict], key, entry,
+               bypass_cache: bool) -> Tuple[bool, Any]:
+        """Perform a GET round-trip, revalidating the cache entry if any."""
+        headers = self._get_headers()
+        if entry and not bypass_cache:
+            headers.update(entry.validators())
+        
         debug_request("GET", url)
         
         try:
-            response = self.session.get(
+            response = self._send(
+                "GET",
                 url,
-                headers=self._get_headers(),
-                params=params,
-                timeout=30
+                key[1],
+                headers=headers,
+                params=params
             )
             
-            # Siempre comprobar status primero (429 = rate limit, etc.)
+            if response.status_code == 304 and entry:
+                debug_response(304, url, "Not modified (served from cache)")
+                self.cache.refresh(key, response.headers)
+                return True, entry.data
+            
+            # Siempre comprobar status primero (429 ya reintentado por _send)
             if response.status_code >= 400:
-                content_type = response.headers.get('Content-Type', '')
-                if 'application/json' in content_type:
-                    try:
-                        data = response.json()
-                        error_msg = data.get('message', data.get('error', f'HTTP {response.status_code}'))
-                    except Exception:
-                        error_msg = f"HTTP {response.status_code}"
-                else:
-                    if response.status_code == 429:
-                        error_msg = "Rate limit (429). Espera unos segundos antes de reintentar."
-                    else:
-                        error_msg = f"HTTP {response.status_code}"
+                error_msg = self._error_message(response)
                 debug_response(response.status_code, url, error_msg)
                 return False, error_msg
             
@@ -85,6 +243,8 @@ class HTBClient:
             if 'application/json' in content_type:
                 data = response.json()
                 debug_response(response.status_code, url, data)
+                self.cache.store(key, data, response.headers)
+                self._remember_digest(key, response.content, data)
                 return True, data
             else:
                 # Binario (ej. archivo .ovpn) solo si 200
@@ -92,6 +252,12 @@ class HTBClient:
                               f"Binary response ({len(response.content)} bytes)")
                 return True, response.content
                 
+        except CircuitOpenError as e:
+            if entry:
+                debug_response(0, url, f"{e} (served stale from cache)")
+                return True, entry.data
+            debug_response(0, url, error=str(e))
+            return False, str(e)
         except requests.exceptions.Timeout:
             debug_response(0, url, error="Request timeout")
             return False, "Request timeout"
@@ -102,6 +268,35 @@ class HTBClient:
             debug_response(0, url, error=str(e))
             return False, str(e)
     
+    def _remember_digest(self, key: CacheKey, content: bytes, data: Any):
+        digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+        with self._digests_lock:
+            self._digests[key] = (digest, data)
+    
+    def digest(self, endpoint: str, data: Any, params: Optional[dict] = None,
+               version: str = "v4") -> Optional[str]:
+        """
+        Get the fingerprint of a GET response.
+        
+        The fingerprint is a hash of the raw body, computed once per HTTP
+        response (304 revalidations and cache hits keep it).
+        
+        Args:
+            endpoint: API endpoint the data was fetched from
+            data: Data returned by get() (must be that exact object)
+            params: Query parameters of the request
+            version: API version ('v4' or 'v5')
+        
+        Returns:
+            The fingerprint, or None if data is not the latest response
+        """
+        key = self.cache.make_key(version, endpoint, params)
+        with self._digests_lock:
+            stored = self._digests.get(key)
+        if stored is None or stored[1] is not data:
+            return None
+        return f"{version}{endpoint}:{stored[0]}"
+    
     def post(self, endpoint: str, data: Optional[dict] = None,
              version: str = "v4") -> Tuple[bool, Any]:
         """
@@ -115,28 +310,35 @@ class HTBClient:
         Returns:
             Tuple of (success, data/error_message)
         """
+        check_network_thread(f"POST {endpoint}")
         base = API_V4 if version == "v4" else API_V5
         url = f"{base}{endpoint}"
         
         debug_request("POST", url, data)
         
         try:
-            response = self.session.post(
+            response = self._send(
+                "POST",
                 url,
+                endpoint,
                 headers=self._get_headers(),
-                json=data,
-                timeout=30
+                json=data
             )
             
-            response_data = response.json()
-            debug_response(response.status_code, url, response_data)
-            
             if response.status_code >= 400:
-                error_msg = response_data.get('message', f'HTTP {response.status_code}')
+                error_msg = self._error_message(response)
+                debug_response(response.status_code, url, error_msg)
                 return False, error_msg
             
+            response_data = response.json()
+            debug_response(response.status_code, url, response_data)
+            
+            self.cache.invalidate_after(endpoint)
             return True, response_data
             
+        except CircuitOpenError as e:
+            debug_response(0, url, error=str(e))
+            return False, str(e)
         except requests.exceptions.Timeout:
             debug_response(0, url, error="Request timeout")
             return False, "Request timeout"
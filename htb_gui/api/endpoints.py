@@ -5,6 +5,7 @@ All API endpoint wrappers with proper typing and debug logging.
 
 from typing import Any, List, Optional, Tuple
 from .client import client
+from .ratelimit import RateBudget
 from utils.debug import debug_log
 
 
@@ -14,72 +15,92 @@ class HTBApi:
     All methods return Tuple[bool, data/error].
     """
     
+    # ==================== RATE LIMIT ====================
+    
+    @staticmethod
+    def rate_budget() -> RateBudget:
+        """Get the shared request budget (tokens left, next refill)."""
+        return client.rate_limiter.budget()
+    
+    @staticmethod
+    def api_state() -> Tuple[str, float]:
+        """Get the circuit breaker state ('closed', 'open', 'half_open') and seconds until retry."""
+        return client.breaker.state, client.breaker.retry_in()
+    
     # ==================== USER ====================
     
     @staticmethod
-    def get_user_info() -> Tuple[bool, Any]:
+    def get_user_info(bypass_cache: bool = False) -> Tuple[bool, Any]:
         """Get current user information."""
         debug_log("API", "Fetching user info...")
-        return client.get("/user/info")
+        return client.get("/user/info", bypass_cache=bypass_cache)
     
     # ==================== SEASONS ====================
     
     @staticmethod
-    def get_seasons() -> Tuple[bool, Any]:
+    def get_seasons(bypass_cache: bool = False) -> Tuple[bool, Any]:
         """Get list of all seasons."""
         debug_log("API", "Fetching seasons list...")
-        return client.get("/season/list")
+        return client.get("/season/list", bypass_cache=bypass_cache)
     
     @staticmethod
-    def get_season_machines(season_id: int) -> Tuple[bool, Any]:
+    def get_season_machines(season_id: int, bypass_cache: bool = False) -> Tuple[bool, Any]:
         """Get machines for a specific season."""
         debug_log("API", f"Fetching machines for season {season_id}...")
-        return client.get(f"/season/machines/{season_id}")
+        return client.get(f"/season/machines/{season_id}", bypass_cache=bypass_cache)
     
     @staticmethod
-    def get_active_season_machine() -> Tuple[bool, Any]:
+    def get_active_season_machine(bypass_cache: bool = False) -> Tuple[bool, Any]:
         """Get the active seasonal machine."""
         debug_log("API", "Fetching active season machine...")
-        return client.get("/season/machine/active")
+        return client.get("/season/machine/active", bypass_cache=bypass_cache)
     
     @staticmethod
-    def get_season_leaderboard(season_id: int, per_page: int = 15) -> Tuple[bool, Any]:
+    def get_season_leaderboard(season_id: int, per_page: int = 15,
+                               bypass_cache: bool = False) -> Tuple[bool, Any]:
         """Get season leaderboard."""
         debug_log("API", f"Fetching leaderboard for season {season_id}...")
         return client.get(
             "/season/players/leaderboard",
-            params={"per_page": per_page, "season": season_id}
+            params={"per_page": per_page, "season": season_id},
+            bypass_cache=bypass_cache
         )
     
     # ==================== MACHINES ====================
     
     @staticmethod
-    def get_machines(per_page: int = 100) -> Tuple[bool, Any]:
+    def get_machines(per_page: int = 100, bypass_cache: bool = False) -> Tuple[bool, Any]:
         """Get list of machines."""
         debug_log("API", f"Fetching machines (per_page={per_page})...")
         return client.get(
             "/machines",
             params={"per_page": per_page},
-            version="v5"
+            version="v5",
+            bypass_cache=bypass_cache
         )
     
     @staticmethod
-    def get_machine_profile(name: str) -> Tuple[bool, Any]:
+    def get_machine_profile(name: str, bypass_cache: bool = False) -> Tuple[bool, Any]:
         """Get detailed profile of a machine by name."""
         debug_log("API", f"Fetching machine profile: {name}...")
-        return client.get(f"/machine/profile/{name}")
+        return client.get(f"/machine/profile/{name}", bypass_cache=bypass_cache)
     
     @staticmethod
-    def get_active_machine() -> Tuple[bool, Any]:
+    def get_active_machine(bypass_cache: bool = False) -> Tuple[bool, Any]:
         """Get user's currently active machine."""
         debug_log("API", "Fetching active machine...")
-        return client.get("/machine/active")
+        return client.get("/machine/active", bypass_cache=bypass_cache)
     
     @staticmethod
-    def get_machine_activity(machine_id: int) -> Tuple[bool, Any]:
+    def get_machine_activity(machine_id: int, bypass_cache: bool = False) -> Tuple[bool, Any]:
         """Get activity log for a machine."""
         debug_log("API", f"Fetching activity for machine {machine_id}...")
-        return client.get(f"/machine/activity/{machine_id}")
+        return client.get(f"/machine/activity/{machine_id}", bypass_cache=bypass_cache)
+    
+    @staticmethod
+    def activity_fingerprint(machine_id: int, result: Any) -> Optional[str]:
+        """Get the fingerprint of a get_machine_activity() result (None if unknown)."""
+        return client.digest(f"/machine/activity/{machine_id}", result)
     
     # ==================== MACHINE ACTIONS ====================
     
@@ -114,18 +135,20 @@ class HTBApi:
     # ==================== VPN/CONNECTION ====================
     
     @staticmethod
-    def get_connection_status() -> Tuple[bool, Any]:
+    def get_connection_status(bypass_cache: bool = False) -> Tuple[bool, Any]:
         """Get current VPN connection status."""
         debug_log("API", "Fetching connection status...")
-        return client.get("/connection/status")
+        return client.get("/connection/status", bypass_cache=bypass_cache)
     
     @staticmethod
-    def get_vpn_servers(product: str = "competitive") -> Tuple[bool, Any]:
+    def get_vpn_servers(product: str = "competitive",
+                        bypass_cache: bool = False) -> Tuple[bool, Any]:
         """Get available VPN servers."""
         debug_log("API", f"Fetching VPN servers for {product}...")
         return client.get(
             "/connections/servers",
-            params={"product": product}
+            params={"product": product},
+            bypass_cache=bypass_cache
         )
     
     @staticmethod
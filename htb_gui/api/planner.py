@@ -0,0 +1,221 @@
+"""
+HTB Fetch Planner
+Pages declare the data they need as a DataPlan; the planner runs it.
+
+Independent steps run concurrently, steps wait for the ones listed in
+`after`, identical calls are shared between pages and parsed results are
+reused while their TTL holds (and no cached response was invalidated).
+Steps marked `persist` are saved to the snapshot store, so a plan can be
+executed from the last saved responses (no network) to paint at startup.
+"""
+
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, Union
+
+from config import config
+from utils.debug import debug_log
+from .async_client import call_async, run_concurrently
+from .client import client
+from .singleflight import SingleFlight
+from .snapshots import snapshots
+
+Args = Union[tuple, Callable[[dict], Optional[tuple]]]
+
+
+@dataclass(frozen=True)
+class Fetch:
+    """
+    An API call in a plan.
+    
+    Attributes:
+        name: Key of the parsed result in the plan output
+        call: HTBApi method returning (success, data); must accept bypass_cache
+        args: Positional args, or a function of the results so far returning
+              them (None skips the step)
+        after: Steps that must have run first
+        parse: Turns the raw response into the stored value
+        ttl: Seconds the parsed value is reused by later plans
+        persist: Save the raw response for snapshot (startup) execution
+    """
+    name: str
+    call: Callable[..., Tuple[bool, Any]]
+    args: Args = ()
+    after: Tuple[str, ...] = ()
+    parse: Optional[Callable[[Any], Any]] = None
+    ttl: float = 0
+    persist: bool = False
+    
+    def resolve_args(self, results: dict) -> Optional[tuple]:
+        return self.args(results) if callable(self.args) else self.args
+    
+    def key(self, args: tuple) -> tuple:
+        parse = getattr(self.parse, "__qualname__", None)
+        return (self.call.__qualname__, args, parse)
+    
+    def snapshot_key(self, args: tuple) -> str:
+        return f"{self.call.__qualname__}{json.dumps(list(args), default=str)}"
+
+
+@dataclass(frozen=True)
+class Derive:
+    """A value computed from earlier results (None is not stored)."""
+    name: str
+    fn: Callable[[dict], Any]
+    after: Tuple[str, ...] = ()
+
+
+@dataclass
+class DataPlan:
+    """Named list of steps describing the data a page needs."""
+    name: str
+    steps: Sequence[Union[Fetch, Derive]] = field(default_factory=list)
+
+
+class FetchPlanner:
+    """Executes data plans; one instance is shared by every page."""
+    
+    def __init__(self):
+        self._memo: Dict[tuple, Tuple[float, int, Any]] = {}
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+    
+    def _memo_get(self, key: tuple, ttl: float):
+        if ttl <= 0:
+            return None
+        with self._lock:
+            hit = self._memo.get(key)
+        if hit is None:
+            return None
+        stored_at, generation, value = hit
+        if generation != client.cache.generation or time.monotonic() - stored_at >= ttl:
+            return None
+        return hit
+    
+    def _memo_put(self, key: tuple, value: Any, generation: int):
+        with self._lock:
+            self._memo[key] = (time.monotonic(), generation, value)
+    
+    def invalidate(self):
+        """Forget every memoized result."""
+        with self._lock:
+            self._memo.clear()
+    
+    def _fetch(self, step: Fetch, args: tuple, force: bool) -> Tuple[bool, Any]:
+        """Run one call and parse it (in a pool thread)."""
+        generation = client.cache.generation
+        token = config.api_token
+        success, result = step.call(*args, bypass_cache=force)
+        if not success:
+            return False, result
+        if step.persist:
+            snapshots.put(token, step.snapshot_key(args), result)
+        try:
+            value = step.parse(result) if step.parse else result
+        except Exception as e:
+            return False, f"Invalid response for {step.name}: {e}"
+        if step.ttl > 0:
+            self._memo_put(step.key(args), value, generation)
+        return True, value
+    
+    def _run_step(self, step: Fetch, args: tuple, force: bool) -> Tuple[bool, Any]:
+        """Run a call, sharing it with identical calls from other plans."""
+        result, _ = self._flights.do(step.key(args), lambda: self._fetch(step, args, force))
+        return result
+    
+    def execute(self, plan: DataPlan, force: bool = False, snapshot: bool = False,
+                **inputs) -> Dict[str, Any]:
+        """
+        Run a plan.
+        
+        Args:
+            plan: The plan to execute
+            force: Ignore memoized results and bypass the response cache
+            snapshot: Only use saved snapshots (no network, runs on the caller's thread)
+            **inputs: Initial values visible to args / derive functions
+        
+        Returns:
+            Mapping of step name -> parsed value (failed steps are absent)
+        """
+        if snapshot:
+            return self._execute_snapshot(plan, inputs)
+        results: Dict[str, Any] = dict(inputs)
+        attempted = set(inputs)
+        pending = list(plan.steps)
+        while pending:
+            ready = [s for s in pending if all(d in attempted for d in s.after)]
+            if not ready:
+                raise ValueError(f"Plan '{plan.name}' has unresolved dependencies: "
+                                 f"{[s.name for s in pending]}")
+            pending = [s for s in pending if s not in ready]
+            
+            jobs = {}
+            for step in ready:
+                attempted.add(step.name)
+                if isinstance(step, Derive):
+                    value = step.fn(results)
+                    if value is not None:
+                        results[step.name] = value
+                    continue
+                args = step.resolve_args(results)
+                if args is None:
+                    continue
+                hit = None if force else self._memo_get(step.key(args), step.ttl)
+                if hit is not None:
+                    debug_log("PLAN", f"{plan.name}.{step.name}: fresh, skipped")
+                    results[step.name] = hit[2]
+                    continue
+                jobs[step.name] = call_async(self._run_step, step, args, force)
+            
+            if jobs:
+                for name, (success, value) in run_concurrently(jobs).items():
+                    if success:
+                        results[name] = value
+                    else:
+                        debug_log("PLAN", f"{plan.name}.{name} failed: {value}")
+        return results
+    
+    def _execute_snapshot(self, plan: DataPlan, inputs: dict) -> Dict[str, Any]:
+        """Run a plan against the snapshot store; steps without a snapshot are absent."""
+        token = config.api_token
+        results: Dict[str, Any] = dict(inputs)
+        for step in self._ordered(plan):
+            if isinstance(step, Derive):
+                value = step.fn(results)
+                if value is not None:
+                    results[step.name] = value
+                continue
+            if not step.persist:
+                continue
+            args = step.resolve_args(results)
+            if args is None:
+                continue
+            raw = snapshots.get(token, step.snapshot_key(args))
+            if raw is None:
+                continue
+            try:
+                results[step.name] = step.parse(raw) if step.parse else raw
+            except Exception as e:
+                debug_log("PLAN", f"{plan.name}.{step.name}: bad snapshot: {e}")
+        return results
+    
+    @staticmethod
+    def _ordered(plan: DataPlan) -> list:
+        """Steps in dependency order."""
+        done, ordered, pending = set(), [], list(plan.steps)
+        while pending:
+            ready = [s for s in pending if all(d in done for d in s.after)]
+            if not ready:
+                raise ValueError(f"Plan '{plan.name}' has unresolved dependencies: "
+                                 f"{[s.name for s in pending]}")
+            for step in ready:
+                done.add(step.name)
+                ordered.append(step)
+            pending = [s for s in pending if s not in ready]
+        return ordered
+
+
+# Global planner instance
+planner = FetchPlanner()
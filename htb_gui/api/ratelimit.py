@@ -0,0 +1,130 @@
+"""
+HTB API Rate Limiter
+Token bucket shared by every API call, fed by Retry-After / X-RateLimit-* headers.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+
+@dataclass
+class RateBudget:
+    """Snapshot of the request budget."""
+    tokens: float
+    capacity: int
+    refill_rate: float
+    next_refill_in: float
+    blocked_for: float
+
+    @property
+    def low(self) -> bool:
+        """Whether callers should slow down (bucket under 20% or server backoff)."""
+        return self.blocked_for > 0 or self.tokens < self.capacity * 0.2
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket.
+    Every request takes a token; callers block while the bucket is empty
+    or while the server asked us to back off.
+    """
+
+    def __init__(self, capacity: int, refill_rate: float):
+        if capacity <= 0 or refill_rate <= 0:
+            raise ValueError(f"RateLimiter needs capacity > 0 and refill_rate > 0 "
+                             f"(got {capacity}, {refill_rate})")
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_rate)
+        self._updated = now
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Take a token, waiting for one if needed.
+
+        Args:
+            timeout: Maximum seconds to wait (None waits indefinitely)
+
+        Returns:
+            True if a token was taken, False on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._blocked_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = max(self._blocked_until - now,
+                           (1 - self._tokens) / self.refill_rate)
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(min(wait, 1.0))
+
+    def penalize(self, seconds: float):
+        """Stop issuing requests for the given number of seconds."""
+        with self._lock:
+            now = time.monotonic()
+            self._blocked_until = max(self._blocked_until, now + seconds)
+
+    def update_from_headers(self, headers):
+        """Align the bucket with X-RateLimit-Remaining / X-RateLimit-Reset."""
+        remaining = _parse_float(headers.get("X-RateLimit-Remaining"))
+        if remaining is None:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, remaining)
+        if remaining <= 0:
+            reset = _parse_float(headers.get("X-RateLimit-Reset"))
+            if reset is not None:
+                # Either an epoch timestamp or seconds until reset
+                delay = reset - time.time() if reset > 1e9 else reset
+                self.penalize(max(delay, 0.0))
+
+    def budget(self) -> RateBudget:
+        """Get the current budget (tokens left, time until next token)."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            next_refill = 0.0 if self._tokens >= self.capacity else \
+                (1 - (self._tokens % 1)) / self.refill_rate
+            return RateBudget(
+                tokens=self._tokens,
+                capacity=self.capacity,
+                refill_rate=self.refill_rate,
+                next_refill_in=next_refill,
+                blocked_for=max(0.0, self._blocked_until - now)
+            )
+
+
+def retry_after_seconds(headers) -> Optional[float]:
+    """Parse a Retry-After header (delta seconds or HTTP date)."""
+    value = headers.get("Retry-After")
+    if not value:
+        return None
+    seconds = _parse_float(value)
+    if seconds is not None:
+        return max(seconds, 0.0)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
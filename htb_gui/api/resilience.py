@@ -0,0 +1,196 @@
+"""
+HTB API Resilience
+Retry policies with exponential backoff + jitter, and a circuit breaker.
+"""
+
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, FrozenSet, List, Optional
+
+import requests
+from urllib3.exceptions import NewConnectionError, NameResolutionError
+
+from .routes import endpoint_template
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    How a request is retried on transient failures.
+    
+    Attributes:
+        max_attempts: Total attempts including the first one
+        base_delay: Backoff base in seconds (doubled on each attempt)
+        max_delay: Backoff cap in seconds
+        retry_statuses: HTTP statuses worth retrying
+        retry_read_errors: Retry errors after the request was sent (read
+                           timeouts, dropped connections). Only safe for
+                           idempotent requests.
+    """
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+    retry_statuses: FrozenSet[int] = field(default_factory=lambda: frozenset({500, 502, 503, 504}))
+    retry_read_errors: bool = True
+    
+    def backoff(self, attempt: int) -> float:
+        """Delay before the next attempt (exponential, full jitter)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+    
+    def should_retry(self, error: requests.RequestException) -> bool:
+        """Whether a transport error is worth retrying under this policy."""
+        if is_connect_error(error):
+            return True  # The request never reached the server
+        return self.retry_read_errors and isinstance(
+            error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError))
+
+
+# Idempotent GETs: retried on 5xx, timeouts and connection errors
+IDEMPOTENT = RetryPolicy()
+
+# Actions (spawn, reset, flag...): only retried if the request was never sent
+NON_IDEMPOTENT = RetryPolicy(max_attempts=2, retry_statuses=frozenset(),
+                             retry_read_errors=False)
+
+# Per-endpoint overrides (by template)
+ENDPOINT_POLICIES: Dict[str, RetryPolicy] = {
+    # Polled every few seconds: fail fast, the next tick retries anyway
+    "/machine/active": RetryPolicy(max_attempts=2),
+    "/machine/activity/{id}": RetryPolicy(max_attempts=2),
+}
+
+
+def policy_for(method: str, endpoint: str) -> RetryPolicy:
+    """Get the retry policy of a request."""
+    policy = ENDPOINT_POLICIES.get(endpoint_template(endpoint))
+    if policy:
+        return policy
+    return IDEMPOTENT if method in ("GET", "HEAD") else NON_IDEMPOTENT
+
+
+def is_connect_error(error: Exception) -> bool:
+    """Whether an error happened before the request was sent."""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError) and error.args:
+        reason = getattr(error.args[0], "reason", None)
+        return isinstance(reason, (NewConnectionError, NameResolutionError))
+    return False
+
+
+class CircuitOpenError(Exception):
+    """Raised when a request is short-circuited by an open breaker."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker shared by all API calls.
+    
+    closed    -> requests flow; consecutive failures are counted
+    open      -> requests fail immediately until reset_timeout elapses
+    half_open -> a single probe request is allowed; success closes the
+                 breaker, failure opens it again
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_thread: Optional[int] = None
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[str, str], None]] = []
+    
+    @property
+    def state(self) -> str:
+        """Current state ('closed', 'open' or 'half_open')."""
+        with self._lock:
+            if self._state == self.OPEN and self._reset_elapsed():
+                return self.HALF_OPEN
+            return self._state
+    
+    def retry_in(self) -> float:
+        """Seconds until an open breaker lets a probe through."""
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+    
+    def add_listener(self, callback: Callable[[str, str], None]):
+        """Call callback(old_state, new_state) on transitions (any thread)."""
+        self._listeners.append(callback)
+    
+    def _reset_elapsed(self) -> bool:
+        return time.monotonic() - self._opened_at >= self.reset_timeout
+    
+    def _transition(self, new_state: str) -> List[Callable]:
+        old, self._state = self._state, new_state
+        if new_state == self.OPEN:
+            self._opened_at = time.monotonic()
+        if old == new_state:
+            return []
+        return [lambda cb=cb: cb(old, new_state) for cb in self._listeners]
+    
+    def _notify(self, callbacks: List[Callable]):
+        for notify in callbacks:
+            try:
+                notify()
+            except Exception:
+                pass
+    
+    def allow(self) -> bool:
+        """Whether a request may be sent now."""
+        callbacks = []
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if not self._reset_elapsed():
+                    return False
+                callbacks = self._transition(self.HALF_OPEN)
+            allowed = not self._probe_in_flight
+            if allowed:
+                self._probe_in_flight = True
+                self._probe_thread = threading.get_ident()
+        self._notify(callbacks)
+        return allowed
+    
+    def release_probe(self):
+        """
+        The calling thread's probe ended without an answer to judge the API
+        by (e.g. a local error): let the next request probe instead.
+        """
+        with self._lock:
+            if self._probe_in_flight and self._probe_thread == threading.get_ident():
+                self._probe_in_flight = False
+                self._probe_thread = None
+    
+    def record_success(self):
+        """The server answered (even with a 4xx)."""
+        with self._lock:
+            self._failures = 0
+            self._probe_in_flight = False
+            self._probe_thread = None
+            callbacks = self._transition(self.CLOSED)
+        self._notify(callbacks)
+    
+    def record_failure(self):
+        """A request failed with a transport error or a 5xx."""
+        callbacks = []
+        with self._lock:
+            self._failures += 1
+            probe_failed = self._state == self.HALF_OPEN
+            self._probe_in_flight = False
+            self._probe_thread = None
+            if probe_failed or self._failures >= self.failure_threshold:
+                callbacks = self._transition(self.OPEN)
+                self._opened_at = time.monotonic()
+        self._notify(callbacks)
@@ -0,0 +1,53 @@
+"""
+HTB API Routes
+Maps concrete endpoints (e.g. /machine/activity/123) to their templates.
+"""
+
+import re
+from functools import lru_cache
+
+# Every endpoint wrapped by HTBApi, as a template
+ENDPOINT_TEMPLATES = [
+    "/user/info",
+    "/season/list",
+    "/season/machines/{id}",
+    "/season/machine/active",
+    "/season/players/leaderboard",
+    "/machines",
+    "/machine/profile/{name}",
+    "/machine/active",
+    "/machine/activity/{id}",
+    "/machine/own",
+    "/vm/spawn",
+    "/vm/reset",
+    "/vm/terminate",
+    "/connection/status",
+    "/connections/servers",
+    "/connections/servers/switch/{id}",
+    "/access/ovpnfile/{id}/{type}/{tcp}",
+]
+
+
+def _compile(template: str) -> re.Pattern:
+    pattern = re.sub(r"\\\{[a-z_]+\\\}", "[^/]+", re.escape(template))
+    return re.compile(f"^{pattern}$")
+
+
+_PATTERNS = [(t, _compile(t)) for t in ENDPOINT_TEMPLATES]
+
+
+@lru_cache(maxsize=1024)
+def endpoint_template(endpoint: str) -> str:
+    """
+    Get the template of a concrete endpoint.
+
+    Args:
+        endpoint: API endpoint (without base URL or query string)
+
+    Returns:
+        The matching template, or the endpoint itself if unknown
+    """
+    for template, pattern in _PATTERNS:
+        if pattern.match(endpoint):
+            return template
+    return endpoint
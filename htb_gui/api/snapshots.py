@@ -0,0 +1,163 @@
+"""
+HTB Snapshot Store
+Last successful responses persisted to disk so pages can paint instantly
+on the next launch, then revalidate in the background.
+
+One gzip-compressed JSON file per account, under
+~/.htb_client/snapshots/<token hash>/, so switching tokens never shows
+another user's data. Files carry a format version and are size-capped
+(least recently saved entries are dropped first).
+"""
+
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from config import SNAPSHOT_DIR, SNAPSHOT_MAX_BYTES, SNAPSHOT_MAX_ENTRY_BYTES
+from utils.debug import debug_log
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_FILE = "snapshots.json.gz"
+
+
+def token_partition(token: str) -> str:
+    """Directory name of an account's snapshots (never the token itself)."""
+    return hashlib.sha256(token.encode()).hexdigest()[:16]
+
+
+class SnapshotStore:
+    """
+    Thread-safe persistent store of raw API responses keyed by call.
+    Writes are debounced and done on a background timer thread.
+    """
+
+    def __init__(self, root: Path, max_bytes: int, max_entry_bytes: int,
+                 save_delay: float = 2.0):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.save_delay = save_delay
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._partition: Optional[str] = None
+        self._entries: Dict[str, dict] = {}
+        self._dirty = False
+        self._timer: Optional[threading.Timer] = None
+        atexit.register(self.flush)
+
+    def _path(self, partition: str) -> Path:
+        return self.root / partition / SNAPSHOT_FILE
+
+    def _bind(self, token: str) -> bool:
+        """Load the partition of a token (lock held). False if there is no token."""
+        if not token:
+            return False
+        partition = token_partition(token)
+        if partition == self._partition:
+            return True
+        if self._dirty and self._partition:
+            self._write(self._partition, self._entries)
+        self._partition = partition
+        self._entries = self._read(partition)
+        self._dirty = False
+        return True
+
+    def _read(self, partition: str) -> Dict[str, dict]:
+        path = self._path(partition)
+        if not path.exists():
+            return {}
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError) as e:
+            debug_log("SNAPSHOT", f"Discarding unreadable snapshot {path}: {e}")
+            return {}
+        if payload.get("version") != SNAPSHOT_VERSION:
+            debug_log("SNAPSHOT", f"Discarding snapshot version {payload.get('version')}")
+            return {}
+        entries = payload.get("entries", {})
+        debug_log("SNAPSHOT", f"Loaded {len(entries)} entries")
+        return entries
+
+    def _write(self, partition: str, entries: Dict[str, dict]):
+        path = self._path(partition)
+        with self._write_lock:
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix(".tmp")
+                with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6) as f:
+                    json.dump({"version": SNAPSHOT_VERSION, "entries": entries}, f,
+                              separators=(",", ":"))
+                os.replace(tmp, path)
+            except (OSError, TypeError, ValueError) as e:
+                debug_log("SNAPSHOT", f"Failed to save snapshot: {e}")
+
+    def get(self, token: str, key: str) -> Optional[Any]:
+        """Get the last saved response of a call for an account."""
+        with self._lock:
+            if not self._bind(token):
+                return None
+            entry = self._entries.get(key)
+            return entry["data"] if entry else None
+
+    def put(self, token: str, key: str, data: Any):
+        """Save the response of a call (skipped if larger than max_entry_bytes)."""
+        try:
+            size = len(json.dumps(data, separators=(",", ":")))
+        except (TypeError, ValueError):
+            return
+        if size > self.max_entry_bytes:
+            debug_log("SNAPSHOT", f"Not saving {key}: {size} bytes")
+            return
+        with self._lock:
+            if not self._bind(token):
+                return
+            self._entries[key] = {"saved_at": time.time(), "size": size, "data": data}
+            self._evict()
+            self._dirty = True
+            self._schedule()
+
+    def _evict(self):
+        total = sum(e["size"] for e in self._entries.values())
+        for key in sorted(self._entries, key=lambda k: self._entries[k]["saved_at"]):
+            if total <= self.max_bytes:
+                break
+            total -= self._entries.pop(key)["size"]
+
+    def _schedule(self):
+        if self._timer is None:
+            self._timer = threading.Timer(self.save_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Write pending changes now."""
+        with self._lock:
+            self._timer = None
+            if not self._dirty or not self._partition:
+                return
+            partition, entries = self._partition, dict(self._entries)
+            self._dirty = False
+        self._write(partition, entries)
+
+    def clear(self, token: str):
+        """Delete every snapshot of an account."""
+        with self._lock:
+            if not self._bind(token):
+                return
+            self._entries.clear()
+            self._dirty = False
+            try:
+                self._path(self._partition).unlink()
+            except OSError:
+                pass
+
+
+# Global snapshot store
+snapshots = SnapshotStore(SNAPSHOT_DIR, SNAPSHOT_MAX_BYTES, SNAPSHOT_MAX_ENTRY_BYTES)
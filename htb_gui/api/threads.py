@@ -0,0 +1,39 @@
+"""
+GUI-thread network guard.
+HTBClient calls block; on the Qt main thread they freeze the window.
+HTB_STRICT_THREADS decides what happens to such calls (modes in config).
+"""
+
+import threading
+import traceback
+
+from config import STRICT_THREADS, STRICT_THREADS_MODES
+from utils.debug import log_warning
+
+
+class GuiThreadNetworkError(RuntimeError):
+    """A blocking API call was made on the GUI (main) thread."""
+
+
+def check_network_thread(what: str, mode: str = STRICT_THREADS):
+    """
+    Report a blocking call made on the main thread.
+    
+    Args:
+        what: Description of the call (e.g. 'GET /user/info')
+        mode: One of STRICT_THREADS_MODES: 'off', 'log' (log the stack) or 'raise'
+    
+    Raises:
+        GuiThreadNetworkError: In 'raise' mode
+        ValueError: Unknown mode
+    """
+    if mode not in STRICT_THREADS_MODES:
+        raise ValueError(f"Unknown strict threads mode {mode!r} (expected one of "
+                         f"{', '.join(STRICT_THREADS_MODES)})")
+    if mode == "off" or threading.current_thread() is not threading.main_thread():
+        return
+    message = f"Blocking API call on the GUI thread: {what}"
+    if mode == "raise":
+        raise GuiThreadNetworkError(message)
+    stack = "".join(traceback.format_stack(limit=12)[:-1])
+    log_warning("THREADS", f"{message}\n{stack}")
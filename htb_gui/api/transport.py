@@ -0,0 +1,147 @@
+"""
+HTB HTTP Transport
+Thread-safe pooled transport shared by every worker thread.
+
+Each thread gets its own requests.Session (sessions are not thread-safe),
+but all sessions share one explicitly sized urllib3 pool per host, so
+TCP/TLS connections are reused across threads and pages.
+"""
+
+import socket
+import threading
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from utils.debug import debug_log
+
+# Enable TCP keep-alive probes so idle pooled connections are kept open
+KEEPALIVE_SOCKET_OPTIONS = HTTPConnection.default_socket_options + [
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+]
+
+
+class PoolStats:
+    """Connection counters per host."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, Dict[str, int]] = {}
+    
+    def _bump(self, host: str, counter: str):
+        with self._lock:
+            counters = self._hosts.setdefault(host, {"requests": 0, "new_connections": 0})
+            counters[counter] += 1
+    
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Get {host: {requests, new_connections, reused}}."""
+        with self._lock:
+            return {
+                host: dict(c, reused=max(0, c["requests"] - c["new_connections"]))
+                for host, c in self._hosts.items()
+            }
+
+
+stats = PoolStats()
+
+
+class _CountingPoolMixin:
+    def _new_conn(self):
+        stats._bump(self.host, "new_connections")
+        return super()._new_conn()
+    
+    def _get_conn(self, timeout=None):
+        stats._bump(self.host, "requests")
+        return super()._get_conn(timeout)
+
+
+class CountingHTTPConnectionPool(_CountingPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class CountingHTTPSConnectionPool(_CountingPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class _PooledAdapter(HTTPAdapter):
+    """HTTPAdapter with keep-alive sockets and counting pools."""
+    
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs.setdefault("socket_options", KEEPALIVE_SOCKET_OPTIONS)
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CountingHTTPConnectionPool,
+            "https": CountingHTTPSConnectionPool,
+        }
+
+
+class Transport:
+    """
+    Pooled HTTP transport.
+    
+    Args:
+        pool_sizes: Maximum connections kept per host
+        default_pool_size: Pool size for hosts not listed
+        verify: TLS certificate verification
+    """
+    
+    def __init__(self, pool_sizes: Dict[str, int], default_pool_size: int = 4,
+                 verify: bool = False):
+        self.verify = verify
+        self._adapters = {
+            host: _PooledAdapter(pool_connections=1, pool_maxsize=size, pool_block=True)
+            for host, size in pool_sizes.items()
+        }
+        self._default_adapter = _PooledAdapter(pool_connections=4,
+                                               pool_maxsize=default_pool_size)
+        self._local = threading.local()
+    
+    def session(self) -> requests.Session:
+        """Get the calling thread's session (created on first use)."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.verify = self.verify
+            session.mount("http://", self._default_adapter)
+            session.mount("https://", self._default_adapter)
+            for host, adapter in self._adapters.items():
+                session.mount(f"https://{host}", adapter)
+                session.mount(f"http://{host}", adapter)
+            self._local.session = session
+        return session
+    
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request on the calling thread's session."""
+        return self.session().request(method, url, **kwargs)
+    
+    def warm_up(self, urls: Iterable[str]) -> threading.Thread:
+        """
+        Pre-connect to hosts in the background (DNS + TCP + TLS).
+        The connections are left in the shared pools for the first real requests.
+        """
+        def _run():
+            for url in urls:
+                parsed = urlparse(url)
+                origin = f"{parsed.scheme}://{parsed.netloc}/"
+                try:
+                    self.request("HEAD", origin, timeout=(5, 5), allow_redirects=False)
+                    debug_log("TRANSPORT", f"Pre-connected to {parsed.netloc}")
+                except requests.RequestException as e:
+                    debug_log("TRANSPORT", f"Pre-connect to {parsed.netloc} failed: {e}")
+        
+        thread = threading.Thread(target=_run, name="htb-warmup", daemon=True)
+        thread.start()
+        return thread
+    
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Connection reuse counters per host."""
+        return stats.snapshot()
+    
+    def close(self):
+        """Close every pooled connection."""
+        for adapter in [*self._adapters.values(), self._default_adapter]:
+            adapter.close()
@@ -5,7 +5,9 @@ Manages API tokens, base URLs, and application settings.
 
 import os
 import json
+import logging
 from pathlib import Path
+from urllib.parse import urlparse
 from dotenv import load_dotenv
 
 # Load .env file - check multiple locations
@@ -23,17 +25,106 @@ for env_path in env_paths:
         load_dotenv(env_path)
         break
 
-# Base configuration
-BASE_URL = "https://labs.hackthebox.com"
+# Base configuration (HTB_BASE_URL points the client at e.g. testing/fake_api.py)
+BASE_URL = os.getenv("HTB_BASE_URL", "https://labs.hackthebox.com").rstrip("/")
 API_V4 = f"{BASE_URL}/api/v4"
 API_V5 = f"{BASE_URL}/api/v5"
 
+
+def _positive_env(name: str, default: str, cast=float):
+    """Numeric env var that must be > 0 (0 or less would stall or break the caller)."""
+    raw = os.getenv(name, default)
+    try:
+        value = cast(raw)
+    except ValueError:
+        raise ValueError(f"{name} must be a number, got {raw!r}") from None
+    if value <= 0:
+        raise ValueError(f"{name} must be greater than 0, got {raw!r}")
+    return value
+
+
+# Rate limiting (token bucket shared by all API calls)
+RATE_LIMIT_CAPACITY = _positive_env("HTB_RATE_CAPACITY", "20", int)
+RATE_LIMIT_REFILL = _positive_env("HTB_RATE_REFILL", "1.0")  # tokens per second
+RATE_LIMIT_RETRIES = 3
+RATE_LIMIT_MAX_WAIT = 60.0  # seconds
+
+# Request timeouts (seconds) and circuit breaker
+CONNECT_TIMEOUT = float(os.getenv("HTB_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("HTB_READ_TIMEOUT", "30"))
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_TIMEOUT = 30.0
+
+# Host serving machine avatars
+AVATAR_HOST = "htb-mp-prod-public-storage.s3.eu-central-1.amazonaws.com"
+
+# Connections kept alive per host by the HTTP transport
+POOL_SIZES = {
+    urlparse(BASE_URL).netloc: int(os.getenv("HTB_POOL_SIZE", "8")),
+    AVATAR_HOST: 8,
+}
+
+# Maximum concurrent API calls issued by a single fan-out
+API_CONCURRENCY = int(os.getenv("HTB_API_CONCURRENCY", "4"))
+
+# Cassette record/replay (offline runs and benchmarks)
+# HTB_RECORD=path writes every API round-trip, HTB_REPLAY=path serves them back.
+# HTB_REPLAY_LATENCY is a fixed delay in seconds, or "recorded" for the original timings.
+CASSETTE_RECORD = os.getenv("HTB_RECORD", "")
+CASSETTE_REPLAY = os.getenv("HTB_REPLAY", "")
+CASSETTE_LATENCY = os.getenv("HTB_REPLAY_LATENCY", "")
+
+# Blocking API calls made on the GUI thread (HTB_STRICT_THREADS):
+#   "off" (or "0", unset) - not checked
+#   "log" (or "1")        - logged with their stack
+#   "raise"               - GuiThreadNetworkError is raised (tests)
+STRICT_THREADS_MODES = ("off", "log", "raise")
+_STRICT_THREADS_ALIASES = {"": "off", "0": "off", "1": "log"}
+_strict_threads = os.getenv("HTB_STRICT_THREADS", "").strip().lower()
+STRICT_THREADS = _STRICT_THREADS_ALIASES.get(_strict_threads, _strict_threads)
+if STRICT_THREADS not in STRICT_THREADS_MODES:
+    raise ValueError(f"HTB_STRICT_THREADS must be one of off/0, log/1 or raise, "
+                     f"got {os.getenv('HTB_STRICT_THREADS')!r}")
+
 # Config file location
 CONFIG_DIR = Path.home() / ".htb_client"
 CONFIG_FILE = CONFIG_DIR / "config.json"
+METRICS_FILE = CONFIG_DIR / "metrics.json"
+PREFETCH_STATE_FILE = CONFIG_DIR / "prefetch.json"
+
+# Last responses of the main pages, painted at startup before revalidation
+SNAPSHOT_DIR = CONFIG_DIR / "snapshots"
+SNAPSHOT_MAX_BYTES = 8 * 1024 * 1024
+SNAPSHOT_MAX_ENTRY_BYTES = 4 * 1024 * 1024
+
+# Avatar image cache (see utils/image_cache.py): decoded images in memory,
+# original bytes on disk (XDG cache dir), each tier evicting least recently used
+IMAGE_CACHE_DIR = Path(os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache") / "htb_client" / "images"
+IMAGE_MEMORY_CACHE_BYTES = int(os.getenv("HTB_IMAGE_MEMORY_MB", "64")) * 1024 * 1024
+IMAGE_DISK_CACHE_BYTES = int(os.getenv("HTB_IMAGE_DISK_MB", "200")) * 1024 * 1024
+# Pre-rendered avatar thumbnails (rounded/circle at display size)
+AVATAR_THUMB_DIR = IMAGE_CACHE_DIR.parent / "thumbs"
+AVATAR_THUMB_CACHE_BYTES = 32 * 1024 * 1024
+# Machine avatars at card/dashboard/detail size, packed in one mmap'ed file
+AVATAR_PACK_FILE = IMAGE_CACHE_DIR.parent / "avatars.pack"
+AVATAR_PACK_BYTES = 16 * 1024 * 1024
+# HTTP cache of the shared network manager (see utils/network.py)
+HTTP_CACHE_DIR = IMAGE_CACHE_DIR.parent / "http"
+HTTP_CACHE_BYTES = int(os.getenv("HTB_HTTP_CACHE_MB", "50")) * 1024 * 1024
+# Idle-time avatar prefetch (see ui/prefetch.py): starts after this many
+# seconds without foreground work (0 disables it), downloads at most
+# PREFETCH_DAILY_BYTES a day
+PREFETCH_IDLE_SECONDS = float(os.getenv("HTB_PREFETCH_IDLE", "5"))
+PREFETCH_DAILY_BYTES = int(os.getenv("HTB_PREFETCH_DAILY_MB", "20")) * 1024 * 1024
+
+# Logging (see utils/debug.py)
+LOGGER_NAME = "htb_gui"
+LOG_DIR = CONFIG_DIR / "logs"
+LOG_MAX_BYTES = 2 * 1024 * 1024
+LOG_BACKUPS = 3
 
 # Debug mode from env or default
-DEBUG = os.getenv("HTB_DEBUG", "true").lower() == "true"
+DEBUG = os.getenv("HTB_DEBUG", "false").lower() == "true"
 
 
 class Config:
@@ -103,12 +194,13 @@ class Config:
     @debug.setter
     def debug(self, value: bool):
         self._debug = value
+        logging.getLogger(LOGGER_NAME).setLevel(logging.DEBUG if value else logging.WARNING)
         self._save_config()
         print(f"[DEBUG] Debug mode: {value}")
     
     def is_configured(self) -> bool:
-        """Check if API token is configured."""
-        return bool(self._api_token)
+        """Check if API token is configured (a replayed cassette needs none)."""
+        return bool(self._api_token) or bool(CASSETTE_REPLAY)
 
 
 # Global config instance
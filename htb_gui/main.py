@@ -14,9 +14,11 @@ from PySide6.QtWidgets import QApplication
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QFont
 
-from config import config
+from config import config, BASE_URL, CASSETTE_REPLAY, METRICS_FILE
+from api.client import client
 from ui.main_window import MainWindow
 from utils.debug import debug_log
+from utils.metrics import metrics
 
 
 def main():
@@ -39,6 +41,10 @@ def main():
     
     # High DPI scaling is enabled by default in Qt6
     
+    # Pre-connect to the API (DNS + TLS) while the window is being built
+    if config.is_configured() and not CASSETTE_REPLAY:
+        client.transport.warm_up([BASE_URL])
+    
     # Create and show main window
     window = MainWindow()
     window.show()
@@ -51,7 +57,11 @@ def main():
         window.top_nav.page_changed.emit("settings")
     
     # Run event loop
-    sys.exit(app.exec())
+    exit_code = app.exec()
+    
+    # Keep the session's request metrics for later inspection
+    metrics.dump(METRICS_FILE)
+    sys.exit(exit_code)
 
 
 if __name__ == "__main__":
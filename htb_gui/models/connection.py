@@ -80,6 +80,13 @@ class Connection:
             up=connection.get("up", 0)
         )
     
+    @classmethod
+    def from_status(cls, data: Any) -> Optional["Connection"]:
+        """Create Connection from a /connection/status response (a list)."""
+        if isinstance(data, list) and len(data) > 0:
+            return cls.from_api(data[0])
+        return None
+    
     @property
     def status_display(self) -> str:
         """Get formatted connection status."""
@@ -0,0 +1 @@
+"""Testing helpers for HTB Client (local fake API, headless flows)."""
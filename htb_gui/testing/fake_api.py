@@ -0,0 +1,606 @@
+"""
+Fake HTB API
+Local stand-in for labs.hackthebox.com used for load and latency testing.
+
+Implements the endpoints wrapped by api/endpoints.py with a synthetic
+catalog, configurable latency, 429 injection and spawn delays. It only
+uses the standard library so it can run anywhere:
+
+    python -m htb_gui.testing.fake_api --port 8765 --machines 5000 \\
+        --latency lognormal:-2.5,0.6 --rate 10 --spawn-delay 15
+
+Point the client at it with HTB_BASE_URL=http://127.0.0.1:8765.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import struct
+import threading
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+OS_NAMES = ["Linux", "Windows", "FreeBSD", "OpenBSD", "Android", "Other"]
+DIFFICULTIES = [("Easy", 20), ("Medium", 30), ("Hard", 40), ("Insane", 50)]
+REGIONS = ["EU", "US", "AU", "SG"]
+VALID_FLAG = re.compile(r"^[0-9a-f]{32}$")
+
+
+# ==================== LATENCY ====================
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Parse a latency distribution spec into a sampler (seconds).
+
+    Formats:
+        0.05                   fixed
+        fixed:0.05             fixed
+        uniform:LOW,HIGH       uniform between LOW and HIGH
+        normal:MEAN,STDDEV     gaussian, clamped at 0
+        lognormal:MU,SIGMA     log-normal (long tail), e.g. lognormal:-2.5,0.6
+    """
+    kind, _, args = spec.partition(":")
+    if not args:
+        kind, args = "fixed", kind
+    values = [float(v) for v in args.split(",") if v]
+    if kind == "fixed":
+        return lambda rng: values[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(values[0], values[1])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+# ==================== AVATARS ====================
+
+def _png(width: int, height: int, rgb: Tuple[int, int, int]) -> bytes:
+    """Encode a solid-color RGB PNG."""
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return (struct.pack(">I", len(data)) + tag + data +
+                struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF))
+    row = b"\x00" + bytes(rgb) * width
+    raw = zlib.compress(row * height, 9)
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", raw) + chunk(b"IEND", b"")
+
+
+# ==================== STATE ====================
+
+@dataclass
+class FakeAPIOptions:
+    """Behavior of the fake API."""
+    machines: int = 500
+    seasons: int = 4
+    season_machines: int = 13
+    latency: str = "0"
+    avatar_latency: str = "0"
+    rate: float = 0.0             # requests/second allowed (0 = unlimited)
+    burst: int = 20
+    inject_429: float = 0.0       # probability of a spurious 429
+    retry_after: float = 1.0
+    spawn_delay: float = 10.0     # seconds before a spawned machine gets an IP
+    activity_interval: float = 0.0  # seconds between new activity entries (0 = static)
+    avatar_size: int = 96
+    seed: int = 1337
+
+
+class FakeHTBState:
+    """Synthetic catalog and mutable session state (active machine, VPN)."""
+
+    def __init__(self, options: FakeAPIOptions, base_url: str):
+        self.options = options
+        self.base_url = base_url
+        self.rng = random.Random(options.seed)
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.machines = [self._machine(i) for i in range(1, options.machines + 1)]
+        self.by_name = {m["name"].lower(): m for m in self.machines}
+        self.by_id = {m["id"]: m for m in self.machines}
+        self.seasons = self._seasons()
+        self.servers = self._servers()
+        self.active: Optional[Dict[str, Any]] = None
+        self.server_id = next(iter(self.servers["EU"].values()))["id"]
+
+    def avatar_url(self, kind: str, ident: int) -> str:
+        return f"{self.base_url}/storage/avatars/{kind}/{ident}.png"
+
+    def _machine(self, i: int) -> Dict[str, Any]:
+        rng = self.rng
+        difficulty, points = rng.choice(DIFFICULTIES)
+        retired = rng.random() < 0.8
+        return {
+            "id": i,
+            "name": f"Machine{i:05d}",
+            "os": rng.choice(OS_NAMES),
+            "difficultyText": difficulty,
+            "difficulty": points + rng.randint(0, 40),
+            "points": 0 if retired else points,
+            "static_points": points,
+            "stars": round(rng.uniform(2.5, 5.0), 1),
+            "reviews_count": rng.randint(0, 3000),
+            "avatar": self.avatar_url("machines", i),
+            "active": not retired,
+            "retired": retired,
+            "free": rng.random() < 0.1,
+            "isTodo": False,
+            "user_owns_count": rng.randint(0, 50000),
+            "root_owns_count": rng.randint(0, 40000),
+            "is_owned_user": rng.random() < 0.2,
+            "is_owned_root": rng.random() < 0.1,
+            "release_date": f"20{rng.randint(17, 25)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T19:00:00.000000Z",
+            "playInfo": {"isSpawned": False, "isSpawning": False, "isActive": False,
+                         "active_player_count": rng.randint(0, 300)},
+            "labels": [],
+            "maker": {"id": 1000 + i, "name": f"creator{i % 97}",
+                      "avatar": self.avatar_url("users", 1000 + i)},
+        }
+
+    def _seasons(self) -> List[Dict[str, Any]]:
+        seasons = []
+        count = self.options.seasons
+        for s in range(1, count + 1):
+            machines = []
+            for w in range(self.options.season_machines):
+                base = self.machines[(s * 101 + w) % len(self.machines)] if self.machines else {}
+                machines.append(dict(base, season_id=s, user_points=10, root_points=20,
+                                     unknown=False))
+            seasons.append({
+                "id": s,
+                "name": f"Season {s}",
+                "subtitle": f"Synthetic season {s}",
+                "start_date": f"{2020 + s}-01-01T00:00:00.000000Z",
+                "end_date": f"{2020 + s}-04-01T00:00:00.000000Z",
+                "state": "active" if s == count else "ended",
+                "active": s == count,
+                "is_visible": True,
+                "weeks": 13,
+                "current_week": 5 if s == count else None,
+                "players": 10000 + s,
+                "machines": machines,
+            })
+        return seasons
+
+    def _servers(self) -> Dict[str, Dict[str, Any]]:
+        servers = {}
+        sid = 1
+        for region in REGIONS:
+            servers[region] = {}
+            for n in range(1, 4):
+                servers[region][str(sid)] = {
+                    "id": sid,
+                    "friendly_name": f"{region} Release Lab {n}",
+                    "full": False,
+                    "current_clients": self.rng.randint(0, 400),
+                    "location": region,
+                }
+                sid += 1
+        return servers
+
+    def server(self, server_id: int) -> Optional[Dict[str, Any]]:
+        for region in self.servers.values():
+            if str(server_id) in region:
+                return region[str(server_id)]
+        return None
+
+    def activity(self, machine_id: int) -> List[Dict[str, Any]]:
+        """Activity feed; grows by one entry every activity_interval seconds."""
+        interval = self.options.activity_interval
+        extra = int((time.monotonic() - self.started) / interval) if interval > 0 else 0
+        entries = []
+        for n in range(10 + extra, 0, -1):
+            user = machine_id * 31 + n
+            kind = ("user", "root", "blood")[n % 3]
+            entries.append({
+                "date_diff": f"{n} minutes ago",
+                "user_name": f"player{user}",
+                "type": kind,
+                "blood_type": "user" if kind == "blood" else "",
+                "user_avatar": self.avatar_url("users", user),
+            })
+        return entries[:30]
+
+
+# ==================== HTTP ====================
+
+class _RateBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self) -> Tuple[bool, float]:
+        """Take a token; returns (allowed, tokens_left)."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                return False, 0.0
+            self.tokens -= 1
+            return True, self.tokens
+
+
+class FakeHTBServer:
+    """
+    Threaded fake API server.
+
+    Usable in-process (start()/stop(), hit counters) or from the command line.
+    """
+
+    def __init__(self, options: Optional[FakeAPIOptions] = None,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.options = options or FakeAPIOptions()
+        self.hits: Counter = Counter()
+        self._hits_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self.host, self.port = self._httpd.server_address[:2]
+        self.url = f"http://{self.host}:{self.port}"
+        self.state = FakeHTBState(self.options, self.url)
+        self._latency = parse_latency(self.options.latency)
+        self._avatar_latency = parse_latency(self.options.avatar_latency)
+        self._bucket = _RateBucket(self.options.rate, self.options.burst) \
+            if self.options.rate > 0 else None
+        self._rng = random.Random(self.options.seed + 1)
+        self._rng_lock = threading.Lock()
+        self._avatars: Dict[str, bytes] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------- lifecycle ----------
+
+    def start(self) -> "FakeHTBServer":
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever,
+                                        name="fake-htb-api", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def reset_hits(self):
+        with self._hits_lock:
+            self.hits.clear()
+
+    def _count(self, key: str):
+        with self._hits_lock:
+            self.hits[key] += 1
+
+    def _sample(self, sampler) -> float:
+        with self._rng_lock:
+            return sampler(self._rng)
+
+    def _chance(self, probability: float) -> bool:
+        if probability <= 0:
+            return False
+        with self._rng_lock:
+            return self._rng.random() < probability
+
+    # ---------- routing ----------
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server._dispatch(self, "GET")
+
+            def do_POST(self):
+                server._dispatch(self, "POST")
+
+            def do_HEAD(self):
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+        return Handler
+
+    def _dispatch(self, handler: BaseHTTPRequestHandler, method: str):
+        parsed = urlparse(handler.path)
+        path = parsed.path.rstrip("/")
+        query = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = {}
+        if length:
+            try:
+                body = json.loads(handler.rfile.read(length) or b"{}")
+            except ValueError:
+                body = {}
+
+        if path == "/__stats":
+            with self._hits_lock:
+                return self._send_json(handler, 200, dict(self.hits))
+
+        if path.startswith("/storage/avatars/"):
+            self._count("avatar")
+            return self._send_avatar(handler, path)
+
+        route = re.sub(r"^/api/v[45]", "", path)
+        self._count(f"{method} {route}")
+
+        delay = self._sample(self._latency)
+        if delay > 0:
+            time.sleep(delay)
+
+        headers = {}
+        if self._bucket:
+            allowed, left = self._bucket.take()
+            headers["X-RateLimit-Limit"] = str(self.options.burst)
+            headers["X-RateLimit-Remaining"] = str(int(left))
+            if not allowed:
+                return self._too_many(handler)
+        if self._chance(self.options.inject_429):
+            return self._too_many(handler)
+
+        status, payload = self._route(method, route, query, body)
+        if isinstance(payload, bytes):
+            return self._send(handler, status, payload, "application/octet-stream", headers)
+        self._send_json(handler, status, payload, headers, etag=(method == "GET"))
+
+    def _route(self, method: str, route: str, query: dict, body: dict) -> Tuple[int, Any]:
+        state = self.state
+        get = method == "GET"
+        per_page = int(query.get("per_page", 100))
+        page = max(1, int(query.get("page", 1)))
+
+        if get and route == "/user/info":
+            return 200, {"info": {
+                "id": 4242, "name": "fakeplayer", "email": "fake@example.com",
+                "timezone": "UTC", "isVip": True, "canAccessVIP": True,
+                "subscriptionType": "vip", "server_id": state.server_id,
+                "avatar": state.avatar_url("users", 4242), "rank_id": 5,
+                "verified": True, "identifier": "fake",
+            }}
+
+        if get and route == "/machines":
+            start = (page - 1) * per_page
+            items = state.machines[start:start + per_page]
+            last_page = max(1, math.ceil(len(state.machines) / max(per_page, 1)))
+            return 200, {"data": items, "meta": {
+                "current_page": page, "last_page": last_page,
+                "per_page": per_page, "total": len(state.machines)}}
+
+        match = re.fullmatch(r"/machine/profile/([^/]+)", route)
+        if get and match:
+            machine = state.by_name.get(match.group(1).lower())
+            if not machine:
+                return 404, {"message": "Machine not found"}
+            return 200, {"info": self._with_play_info(machine)}
+
+        if get and route == "/machine/active":
+            return 200, {"info": self._active_info()}
+
+        match = re.fullmatch(r"/machine/activity/(\d+)", route)
+        if get and match:
+            return 200, {"info": {"activity": state.activity(int(match.group(1)))}}
+
+        if get and route == "/season/list":
+            seasons = [{k: v for k, v in s.items() if k != "machines"} for s in state.seasons]
+            return 200, {"data": seasons}
+
+        match = re.fullmatch(r"/season/machines/(\d+)", route)
+        if get and match:
+            season_id = int(match.group(1))
+            for season in state.seasons:
+                if season["id"] == season_id:
+                    return 200, {"data": season["machines"]}
+            return 404, {"message": "Season not found"}
+
+        if get and route == "/season/machine/active":
+            current = state.seasons[-1]["machines"] if state.seasons else []
+            return 200, {"data": current[-1] if current else None}
+
+        if get and route == "/season/players/leaderboard":
+            rows = [{
+                "resource_id": 9000 + r, "rank": r, "league_rank": "Gold",
+                "name": f"player{r}", "country": "FR", "country_name": "France",
+                "avatar_thumb": state.avatar_url("users", 9000 + r),
+                "points": 5000 - r * 7, "user_owns": 40 - r % 40, "root_owns": 38 - r % 38,
+                "user_bloods": r % 3, "root_bloods": r % 2, "last_own": "1 hour ago",
+            } for r in range(1, per_page + 1)]
+            return 200, {"data": rows}
+
+        if get and route == "/connection/status":
+            server = state.server(state.server_id)
+            return 200, [{
+                "type": "competitive", "connection_type": "lab",
+                "location_type_friendly": server["location"],
+                "server": {"id": server["id"], "hostname": f"edge-{server['id']}.fake",
+                           "friendly_name": server["friendly_name"]},
+                "connection": {"name": "fakeplayer", "through_pwnbox": False,
+                               "ip4": "10.10.14.42", "ip6": "dead:beef::1000",
+                               "down": 1024, "up": 512},
+            }]
+
+        if get and route == "/connections/servers":
+            options = {region: {f"{region} - Release Arena": {"servers": servers}}
+                       for region, servers in state.servers.items()}
+            return 200, {"status": True, "data": {
+                "assigned": state.server(state.server_id), "options": options}}
+
+        match = re.fullmatch(r"/access/ovpnfile/(\d+)/(\d+)/(\d+)", route)
+        if get and match:
+            server = state.server(int(match.group(1)))
+            if not server:
+                return 404, {"message": "Server not found"}
+            proto = "tcp" if match.group(3) == "1" else "udp"
+            return 200, (f"client\ndev tun\nproto {proto}\n"
+                         f"remote edge-{server['id']}.fake 1337\n"
+                         "resolv-retry infinite\nnobind\npersist-key\npersist-tun\n"
+                         "remote-cert-tls server\ncipher AES-128-CBC\nverb 3\n"
+                         "<ca>\n# fake certificate\n</ca>\n").encode()
+
+        match = re.fullmatch(r"/connections/servers/switch/(\d+)", route)
+        if not get and match:
+            server = state.server(int(match.group(1)))
+            if not server:
+                return 404, {"message": "Server not found"}
+            with state.lock:
+                state.server_id = server["id"]
+            return 200, {"status": True, "message": f"Switched to {server['friendly_name']}",
+                         "data": server}
+
+        if not get and route == "/vm/spawn":
+            machine = state.by_id.get(int(body.get("machine_id", 0)))
+            if not machine:
+                return 404, {"message": "Machine not found"}
+            with state.lock:
+                if state.active:
+                    return 400, {"message": "You already have an active machine."}
+                state.active = {"machine": machine, "spawned_at": time.monotonic()}
+            return 200, {"success": True, "message": f"{machine['name']} deployed"}
+
+        if not get and route == "/vm/reset":
+            with state.lock:
+                if not state.active:
+                    return 400, {"message": "No active machine"}
+                state.active["spawned_at"] = time.monotonic()
+            return 200, {"success": True, "message": "Machine reset scheduled"}
+
+        if not get and route == "/vm/terminate":
+            with state.lock:
+                state.active = None
+            return 200, {"success": True, "message": "Machine terminated"}
+
+        if not get and route == "/machine/own":
+            flag = str(body.get("flag", ""))
+            if VALID_FLAG.match(flag):
+                return 200, {"success": True, "message": "Congratulations! Flag accepted."}
+            return 400, {"success": False, "message": "Incorrect flag!"}
+
+        return 404, {"message": f"Unknown endpoint {method} {route}"}
+
+    def _active_info(self) -> Optional[Dict[str, Any]]:
+        with self.state.lock:
+            active = self.state.active
+            if not active:
+                return None
+            machine = active["machine"]
+            spawning = time.monotonic() - active["spawned_at"] < self.options.spawn_delay
+        return {
+            "id": machine["id"], "name": machine["name"], "avatar": machine["avatar"],
+            "type": "Free", "expires_at": "2099-01-01 00:00:00", "isSpawning": spawning,
+            "lab_server": "vip_lab", "vpn_server_id": self.state.server_id,
+            "ip": None if spawning else f"10.129.{machine['id'] // 250 % 256}.{machine['id'] % 250 + 1}",
+        }
+
+    def _with_play_info(self, machine: Dict[str, Any]) -> Dict[str, Any]:
+        active = self._active_info()
+        if not active or active["id"] != machine["id"]:
+            return machine
+        return dict(machine, ip=active["ip"], playInfo=dict(
+            machine["playInfo"], isSpawned=not active["isSpawning"],
+            isSpawning=active["isSpawning"], isActive=True))
+
+    # ---------- responses ----------
+
+    def _too_many(self, handler):
+        self._count("429")
+        self._send_json(handler, 429, {"message": "Too Many Attempts."},
+                        {"Retry-After": f"{self.options.retry_after:g}",
+                         "X-RateLimit-Remaining": "0"})
+
+    def _send_avatar(self, handler, path: str):
+        delay = self._sample(self._avatar_latency)
+        if delay > 0:
+            time.sleep(delay)
+        data = self._avatars.get(path)
+        if data is None:
+            digest = hashlib.blake2b(path.encode(), digest_size=3).digest()
+            size = self.options.avatar_size
+            data = self._avatars.setdefault(path, _png(size, size, tuple(digest)))
+        self._send(handler, 200, data, "image/png",
+                   {"Cache-Control": "public, max-age=86400"})
+
+    def _send_json(self, handler, status: int, payload: Any,
+                   headers: Optional[dict] = None, etag: bool = False):
+        data = json.dumps(payload, separators=(",", ":")).encode()
+        headers = dict(headers or {})
+        if etag and status == 200:
+            tag = '"' + hashlib.blake2b(data, digest_size=8).hexdigest() + '"'
+            headers["ETag"] = tag
+            if handler.headers.get("If-None-Match") == tag:
+                return self._send(handler, 304, b"", None, headers)
+        self._send(handler, status, data, "application/json", headers)
+
+    @staticmethod
+    def _send(handler, status: int, data: bytes, content_type: Optional[str],
+              headers: Optional[dict] = None):
+        handler.send_response(status)
+        if content_type:
+            handler.send_header("Content-Type", content_type)
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        if data and handler.command != "HEAD":
+            handler.wfile.write(data)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command line entry point."""
+    defaults = FakeAPIOptions()
+    parser = argparse.ArgumentParser(description="Local fake HackTheBox API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--machines", type=int, default=defaults.machines,
+                        help="size of the synthetic machine catalog")
+    parser.add_argument("--seasons", type=int, default=defaults.seasons)
+    parser.add_argument("--latency", default=defaults.latency,
+                        help="API latency: SECONDS, uniform:LO,HI, normal:MEAN,SD or lognormal:MU,SIGMA")
+    parser.add_argument("--avatar-latency", default=defaults.avatar_latency)
+    parser.add_argument("--rate", type=float, default=defaults.rate,
+                        help="requests/second before answering 429 (0 = unlimited)")
+    parser.add_argument("--burst", type=int, default=defaults.burst)
+    parser.add_argument("--inject-429", type=float, default=defaults.inject_429,
+                        help="probability of a spurious 429 per request")
+    parser.add_argument("--retry-after", type=float, default=defaults.retry_after)
+    parser.add_argument("--spawn-delay", type=float, default=defaults.spawn_delay,
+                        help="seconds before a spawned machine gets an IP")
+    parser.add_argument("--activity-interval", type=float, default=defaults.activity_interval,
+                        help="seconds between new activity entries (0 = static feed)")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    args = parser.parse_args(argv)
+
+    options = FakeAPIOptions(
+        machines=args.machines, seasons=args.seasons, latency=args.latency,
+        avatar_latency=args.avatar_latency, rate=args.rate, burst=args.burst,
+        inject_429=args.inject_429, retry_after=args.retry_after,
+        spawn_delay=args.spawn_delay, activity_interval=args.activity_interval,
+        seed=args.seed,
+    )
+    server = FakeHTBServer(options, args.host, args.port)
+    print(f"Fake HTB API listening on {server.url} "
+          f"({options.machines} machines) - use HTB_BASE_URL={server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""
+API Call Budgets
+Drives user flows headlessly against the fake API (or a replayed
+cassette) and checks the HTTP calls and avatar downloads of each flow
+against the budgets declared in budgets.json:
+
+    python -m htb_gui.testing.flows                 # every flow, exit 1 on overrun
+    python -m htb_gui.testing.flows --flow startup --flow open_machine
+    python -m htb_gui.testing.flows --replay session.jsonl.gz
+
+From a test runner, assert_budgets(check_flows()) fails the test on
+any overrun (check_flows prepares the environment, so call it once per
+process, before the app modules are imported).
+
+Flows run in order in one session, like a user would: later flows see
+the caches warmed by earlier ones. Counts come from the metrics registry
+(one per network attempt, retries included), so they are the same with
+the fake server or a cassette.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+BUDGETS_FILE = Path(__file__).with_name("budgets.json")
+APP_DIR = Path(__file__).resolve().parent.parent
+
+# Keys of a budget besides endpoint templates
+TOTAL_API = "api"
+TOTAL_AVATARS = "avatar"
+
+
+@dataclass
+class FlowResult:
+    """Network usage of one flow and the budget lines it exceeded."""
+    name: str
+    calls: Dict[str, int]
+    avatars: int
+    over: List[str] = field(default_factory=list)
+
+    def usage(self, key: str) -> int:
+        if key == TOTAL_API:
+            return sum(self.calls.values())
+        if key == TOTAL_AVATARS:
+            return self.avatars
+        return self.calls.get(key, 0)
+
+
+def load_budgets(path: Path = BUDGETS_FILE) -> Dict[str, dict]:
+    """Read {flow: {"description": str, "budget": {key: max}}}."""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["flows"]
+
+
+class BudgetExceeded(AssertionError):
+    """Some flow used more API calls or avatar downloads than its budget."""
+
+
+def check_budget(result: FlowResult, budget: Dict[str, int]) -> FlowResult:
+    """Fill result.over with the budget lines the flow exceeded."""
+    result.over = [
+        f"{key}: {result.usage(key)} > {limit}"
+        for key, limit in budget.items()
+        if result.usage(key) > limit
+    ]
+    return result
+
+
+# ==================== SESSION ====================
+
+class FlowSession:
+    """
+    A headless MainWindow plus helpers to wait for the network to settle.
+    Modal dialogs are replaced so flows never block.
+    """
+
+    def __init__(self, settle: float = 0.6, timeout: float = 15.0):
+        from PySide6.QtCore import QEventLoop
+        from PySide6.QtWidgets import QApplication, QFileDialog, QMessageBox
+
+        self.settle = settle
+        self.timeout = timeout
+        self.messages: List[str] = []
+        self._events = QEventLoop.AllEvents
+        self.download_path = Path(tempfile.mkdtemp(prefix="htb_flows_")) / "htb_vpn.ovpn"
+
+        QMessageBox.information = lambda parent, title, text, *a, **kw: self.messages.append(text)
+        QMessageBox.warning = lambda parent, title, text, *a, **kw: self.messages.append(text)
+        QFileDialog.getSaveFileName = lambda *a, **kw: (str(self.download_path), "")
+
+        self.app = QApplication.instance() or QApplication([])
+        self.window = None
+
+    def _activity(self) -> int:
+        from utils.metrics import metrics
+        return sum(m["requests"] for group in metrics.snapshot().values()
+                   for m in group.values())
+
+    def pump(self, seconds: float):
+        """Process events for a while."""
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            self.app.processEvents(self._events, 50)
+            time.sleep(0.005)
+
+    def wait_idle(self):
+        """Process events until no request was made for `settle` seconds."""
+        deadline = time.monotonic() + self.timeout
+        last, quiet_since = self._activity(), time.monotonic()
+        while time.monotonic() < deadline:
+            self.pump(0.05)
+            current = self._activity()
+            if current != last:
+                last, quiet_since = current, time.monotonic()
+            elif time.monotonic() - quiet_since >= self.settle:
+                return
+
+    def close(self):
+        if self.window:
+            self.window.close()
+            self.pump(0.2)
+
+
+# ==================== FLOWS ====================
+
+FLOWS: Dict[str, Callable[[FlowSession], None]] = {}
+
+
+def flow(name: str):
+    """Register a flow (flows run in registration order)."""
+    def register(func):
+        FLOWS[name] = func
+        return func
+    return register
+
+
+@flow("startup")
+def _startup(session: FlowSession):
+    from ui.main_window import MainWindow
+    session.window = MainWindow()
+    session.window.show()
+    session.wait_idle()
+
+
+@flow("switch_tabs")
+def _switch_tabs(session: FlowSession):
+    for page in ["machines", "seasons", "vpn", "dashboard", "machines"]:
+        session.window._on_page_changed(page)
+        session.wait_idle()
+
+
+@flow("filter_and_resize")
+def _filter_and_resize(session: FlowSession):
+    w = session.window
+    w._on_page_changed("machines")
+    for text in ["a", "ab", "", "e"]:
+        w.machines.search.setText(text)
+        session.pump(0.05)
+    w.machines.os_filter.setCurrentText("Linux")
+    w.machines.diff_filter.setCurrentText("Easy")
+    w.machines.os_filter.setCurrentText("All OS")
+    w.machines.diff_filter.setCurrentText("All Difficulty")
+    w.machines.search.setText("")
+    for width in [1250, 1600, 1400]:
+        w.resize(width, 900)
+        session.pump(0.1)
+    session.wait_idle()
+
+
+@flow("open_machine")
+def _open_machine(session: FlowSession):
+    w = session.window
+    w._on_page_changed("machines")
+    session.wait_idle()
+    if not w.machines._machines:
+        raise RuntimeError("no machines loaded")
+    w.machines.machine_selected.emit(w.machines._machines[0])
+    session.wait_idle()
+    w.machine_detail.back_clicked.emit()
+    session.wait_idle()
+
+
+@flow("change_season")
+def _change_season(session: FlowSession):
+    w = session.window
+    w._on_page_changed("seasons")
+    session.wait_idle()
+    combo = w.seasons.season_combo
+    if combo.count() < 2:
+        raise RuntimeError("need at least two seasons")
+    combo.setCurrentIndex((combo.currentIndex() + 1) % combo.count())
+    session.wait_idle()
+
+
+@flow("download_vpn")
+def _download_vpn(session: FlowSession):
+    w = session.window
+    w._on_page_changed("vpn")
+    session.wait_idle()
+    w.vpn._download()
+    session.wait_idle()
+    if not session.download_path.exists():
+        raise RuntimeError(f"VPN file not saved: {session.messages[-1:]}")
+
+
+@flow("idle_prefetch")
+def _idle_prefetch(session: FlowSession):
+    prefetcher = session.window.prefetcher
+    # Started by hand: flows disable the idle trigger (HTB_PREFETCH_IDLE=0)
+    prefetcher._resume()
+    session.wait_idle()
+    if prefetcher._queue or prefetcher._inflight:
+        raise RuntimeError(f"prefetch did not finish ({len(prefetcher._queue)} left)")
+
+
+# ==================== RUNNER ====================
+
+def run_flows(names: List[str], budgets: Dict[str, dict]) -> List[FlowResult]:
+    """Run flows in order (app modules must already be importable)."""
+    from utils.metrics import metrics
+
+    session = FlowSession()
+    results = []
+    try:
+        for name in FLOWS:
+            metrics.reset()
+            FLOWS[name](session)
+            session.wait_idle()
+            if name not in names:
+                continue
+            snapshot = metrics.snapshot()
+            calls = {key: m["requests"] for key, m in snapshot.get("api", {}).items()
+                     if m["requests"]}
+            avatars = sum(m["requests"] for m in snapshot.get("avatar", {}).values())
+            result = FlowResult(name, calls, avatars)
+            results.append(check_budget(result, budgets.get(name, {}).get("budget", {})))
+    finally:
+        session.close()
+    return results
+
+
+def _prepare_environment(base_url: Optional[str], replay: Optional[str]):
+    """Isolate config, snapshots and caches, then point the app at the API."""
+    home = tempfile.mkdtemp(prefix="htb_flows_home_")
+    os.environ["HOME"] = home
+    os.environ["XDG_CACHE_HOME"] = os.path.join(home, ".cache")
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    os.environ.setdefault("HTB_API_TOKEN", "flows")
+    os.environ["HTB_DEBUG"] = "false"
+    os.environ["HTB_PREFETCH_IDLE"] = "0"
+    if replay:
+        os.environ["HTB_REPLAY"] = replay
+    if base_url:
+        os.environ["HTB_BASE_URL"] = base_url
+    sys.path.insert(0, str(APP_DIR))
+
+
+def check_flows(names: Optional[List[str]] = None, budgets_file: Path = BUDGETS_FILE,
+                replay: Optional[str] = None, machines: int = 200,
+                latency: str = "0.01") -> List[FlowResult]:
+    """
+    Run flows against a fresh fake API (or a replayed cassette).
+
+    The fake API listens on a free port: caches live in a per-run home
+    (see _prepare_environment), so the host in avatar URLs doesn't matter
+    and parallel runs don't collide.
+    """
+    budgets = load_budgets(budgets_file)
+    server = None
+    if not replay:
+        from .fake_api import FakeAPIOptions, FakeHTBServer
+        options = FakeAPIOptions(machines=machines, latency=latency,
+                                 avatar_latency=latency, activity_interval=0, seed=1)
+        server = FakeHTBServer(options, port=0).start()
+
+    try:
+        _prepare_environment(server.url if server else None, replay)
+        return run_flows(names or list(FLOWS), budgets)
+    finally:
+        if server:
+            server.stop()
+
+
+def assert_budgets(results: List[FlowResult]):
+    """Raise BudgetExceeded listing every budget line a flow exceeded."""
+    over = [f"{r.name}: {line}" for r in results for line in r.over]
+    if over:
+        raise BudgetExceeded("over budget:\n  " + "\n  ".join(over))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point (exit status 1 if a budget is exceeded)."""
+    parser = argparse.ArgumentParser(description="Check API call budgets per user flow")
+    parser.add_argument("--flow", action="append", choices=list(FLOWS),
+                        help="flow to check (repeatable, default: all)")
+    parser.add_argument("--budgets", type=Path, default=BUDGETS_FILE)
+    parser.add_argument("--replay", help="replay this cassette instead of the fake API")
+    parser.add_argument("--machines", type=int, default=200,
+                        help="size of the fake machine catalog")
+    parser.add_argument("--latency", default="0.01", help="fake API latency spec")
+    args = parser.parse_args(argv)
+
+    results = check_flows(args.flow, args.budgets, args.replay, args.machines, args.latency)
+
+    for result in results:
+        status = "FAIL" if result.over else "ok"
+        print(f"{status:4}  {result.name:18} api={result.usage(TOTAL_API):<4} "
+              f"avatars={result.avatars:<4} {json.dumps(result.calls, sort_keys=True)}")
+        for line in result.over:
+            print(f"      over budget: {line}")
+    try:
+        assert_budgets(results)
+    except BudgetExceeded:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,12 +3,17 @@
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QStackedWidget, QStatusBar, QLabel
 )
-from PySide6.QtCore import Qt, Slot
+from PySide6.QtCore import Qt, Slot, QTimer
 from PySide6.QtGui import QCloseEvent
 
 from config import config
-from ui.styles import GLOBAL_STYLE, HTB_GREEN, HTB_TEXT_DIM
+from api.changes import changes
+from api.client import client
+from api.planner import planner
+from api.endpoints import HTBApi
+from ui.styles import GLOBAL_STYLE, HTB_GREEN, HTB_TEXT_DIM, STATUS_WARNING
 from ui.top_nav import TopNav
+from ui.prefetch import AvatarPrefetcher
 from ui.pages import (
     DashboardPage, MachinesPage, MachineDetailPage,
     SeasonsPage, VPNPage, SettingsPage
@@ -32,6 +37,8 @@ class MainWindow(QMainWindow):
             self.machine_detail,
             self.seasons,
             self.vpn,
+            self.settings,
+            self.prefetcher,
         ]
         for page in pages_with_threads:
             if hasattr(page, "stop_background_tasks"):
@@ -82,6 +89,9 @@ class MainWindow(QMainWindow):
         for page in self.pages.values():
             self.stack.addWidget(page)
         
+        # Warms machine avatars while nothing else is going on
+        self.prefetcher = AvatarPrefetcher(self)
+        
         # Status bar
         self.status_bar = QStatusBar()
         self.setStatusBar(self.status_bar)
@@ -89,6 +99,14 @@ class MainWindow(QMainWindow):
         self.connection_label = QLabel("🔴 Not connected")
         self.connection_label.setStyleSheet(f"color: {HTB_TEXT_DIM};")
         self.status_bar.addPermanentWidget(self.connection_label)
+        
+        # API health (circuit breaker state), polled from the GUI thread
+        self.api_state_label = QLabel("")
+        self.api_state_label.setStyleSheet(f"color: {STATUS_WARNING};")
+        self.status_bar.addPermanentWidget(self.api_state_label)
+        self.api_state_timer = QTimer(self)
+        self.api_state_timer.timeout.connect(self._update_api_state)
+        self.api_state_timer.start(2000)
     
     def _connect_signals(self):
         self.top_nav.page_changed.connect(self._on_page_changed)
@@ -107,6 +125,7 @@ class MainWindow(QMainWindow):
     @Slot(str)
     def _on_page_changed(self, page_id: str):
         debug_log("UI", f"Page changed: {page_id}")
+        self.prefetcher.pause()
         if page_id in self.pages:
             self.stack.setCurrentWidget(self.pages[page_id])
             self.top_nav.set_active(page_id)
@@ -114,10 +133,21 @@ class MainWindow(QMainWindow):
     @Slot(object)
     def _on_machine_selected(self, machine):
         debug_log("UI", f"Machine selected: {machine.name}")
+        self.prefetcher.pause()
         self.machine_detail.set_machine(machine)
         self.stack.setCurrentWidget(self.machine_detail)
         self.top_nav.set_active("machines")
     
+    @Slot()
+    def _update_api_state(self):
+        state, retry_in = HTBApi.api_state()
+        if state == "closed":
+            self.api_state_label.setText("")
+        elif state == "open":
+            self.api_state_label.setText(f"⚠ API degraded, retrying in {retry_in:.0f}s")
+        else:
+            self.api_state_label.setText("⚠ API degraded, probing...")
+    
     @Slot()
     def _on_token_changed(self):
         debug_log("UI", "Token changed, refreshing...")
@@ -126,5 +156,10 @@ class MainWindow(QMainWindow):
             self.connection_label.setText(f"🟢 Configured")
             self.connection_label.setStyleSheet(f"color: {HTB_GREEN};")
         
+        # Cached responses (and the fingerprints seen with them) belong to the previous token
+        client.invalidate()
+        planner.invalidate()
+        changes.forget()
+        
         # Refresh dashboard
-        self.dashboard.load_data()
+        self.dashboard.load_data(force=True)
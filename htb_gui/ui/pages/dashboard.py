@@ -4,43 +4,59 @@ from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame, QSizePolicy,
     QPushButton, QLineEdit, QScrollArea, QMessageBox, QApplication,
 )
-from PySide6.QtCore import Qt, Signal, Slot, QThread, QObject, QUrl, QTimer
+from PySide6.QtCore import Qt, Signal, Slot, QThread, QObject, QTimer
 from PySide6.QtGui import QPixmap
-from PySide6.QtNetwork import QNetworkAccessManager, QNetworkRequest, QNetworkReply
 from typing import Optional, List
 
+from api.changes import changes
 from api.endpoints import HTBApi
+from api.planner import DataPlan, Fetch, planner
 from models.user import User
 from models.connection import ActiveMachine, Connection
 from ui.styles import (
     HTB_GREEN, HTB_BG_CARD, HTB_TEXT_DIM, HTB_BG_CARD_ELEVATED,
     BTN_PRIMARY, BTN_DANGER, BTN_DEFAULT
 )
-from ui.widgets.activity_item import ActivityItem
+from ui.widgets.activity_item import ActivityItem, AVATAR_STYLE as ACTIVITY_AVATAR_STYLE
 from utils.debug import debug_log
+from utils.avatars import AvatarStyle, CIRCLE
+from utils.image_fetcher import image_fetcher, PRIORITY_VISIBLE
+
+
+USER_AVATAR_STYLE = AvatarStyle(40, shape=CIRCLE)
+MACHINE_AVATAR_STYLE = AvatarStyle(48, radius=8, packed=True)
+
+
+def _parse_user(result) -> Optional[User]:
+    return User.from_api(result) if isinstance(result, dict) else None
+
+
+def _parse_active_machine(result) -> Optional[ActiveMachine]:
+    return ActiveMachine.from_api(result) if isinstance(result, dict) else None
+
+
+# Datos del dashboard: tres llamadas independientes (se ejecutan en paralelo)
+DASHBOARD_PLAN = DataPlan("dashboard", [
+    Fetch("user", HTBApi.get_user_info, parse=_parse_user, ttl=300, persist=True),
+    Fetch("active_machine", HTBApi.get_active_machine, parse=_parse_active_machine,
+          persist=True),
+    Fetch("connection", HTBApi.get_connection_status, parse=Connection.from_status,
+          persist=True),
+])
 
 
 class DashboardWorker(QObject):
     finished = Signal(dict)
     error = Signal(str)
     
+    def __init__(self, force: bool = False):
+        super().__init__()
+        self.force = force
+    
     def run(self):
         debug_log("DASHBOARD", "Loading data...")
-        data = {}
         try:
-            success, result = HTBApi.get_user_info()
-            if success and isinstance(result, dict):
-                data["user"] = User.from_api(result)
-            
-            success, result = HTBApi.get_active_machine()
-            if success and isinstance(result, dict):
-                data["active_machine"] = ActiveMachine.from_api(result)
-            
-            success, result = HTBApi.get_connection_status()
-            if success and isinstance(result, list) and len(result) > 0:
-                data["connection"] = Connection.from_api(result[0])
-            
-            self.finished.emit(data)
+            self.finished.emit(planner.execute(DASHBOARD_PLAN, force=self.force))
         except Exception as e:
             self.error.emit(str(e))
 
@@ -75,7 +91,8 @@ class DashboardActionWorker(QObject):
 
 
 class DashboardActivityWorker(QObject):
-    finished = Signal(list)
+    finished = Signal(list, object)  # activity, fingerprint
+    unchanged = Signal()
     error = Signal(str)
     
     def __init__(self, machine_id: int):
@@ -86,8 +103,12 @@ class DashboardActivityWorker(QObject):
         try:
             success, result = HTBApi.get_machine_activity(self.machine_id)
             if success and isinstance(result, dict):
+                fingerprint = HTBApi.activity_fingerprint(self.machine_id, result)
+                if not changes.changed("dashboard.activity", fingerprint):
+                    self.unchanged.emit()
+                    return
                 info = result.get("info", {})
-                self.finished.emit(info.get("activity", []))
+                self.finished.emit(info.get("activity", []), fingerprint)
             else:
                 self.error.emit(str(result) if not success else "Invalid response")
         except Exception as e:
@@ -100,21 +121,17 @@ class DashboardPage(QWidget):
         self._thread = None
         self._worker = None
         self._loading = False
+        self._painted = False
+        self._snapshot: Optional[dict] = None
         self._active_machine_id: Optional[int] = None
         self._active_machine_avatar: str = ""
-        self._network_manager = QNetworkAccessManager(self)
-        self._network_manager.finished.connect(self._on_avatar_loaded)
-        self._activity_network = QNetworkAccessManager(self)
-        self._activity_network.finished.connect(self._on_activity_avatar_loaded)
-        self._machine_avatar_network = QNetworkAccessManager(self)
-        self._machine_avatar_network.finished.connect(self._on_machine_avatar_loaded)
         self._activity_thread = None
         self._activity_worker = None
         self._action_thread = None
         self._action_worker = None
         self._activity_timer = QTimer(self)
         self._activity_timer.setInterval(15000)
-        self._activity_timer.timeout.connect(self._load_activity)
+        self._activity_timer.timeout.connect(self._on_activity_timer)
         self._activity_countdown = QTimer(self)
         self._activity_countdown.setInterval(1000)
         self._activity_countdown.timeout.connect(self._update_activity_countdown)
@@ -367,8 +384,8 @@ class DashboardPage(QWidget):
         """Descargar avatar desde URL."""
         if not avatar_url:
             return
-        request = QNetworkRequest(QUrl(avatar_url))
-        self._network_manager.get(request)
+        image_fetcher().fetch(avatar_url, USER_AVATAR_STYLE, self._set_avatar_pixmap,
+                              self.avatar_label, PRIORITY_VISIBLE)
     
     def _set_avatar_placeholder(self, username: str):
         """Mostrar inicial del usuario cuando no hay avatar."""
@@ -380,33 +397,26 @@ class DashboardPage(QWidget):
             "color: #9fef00; font-weight: 700; font-size: 16px;"
         )
 
-    @Slot(QNetworkReply)
-    def _on_avatar_loaded(self, reply: QNetworkReply):
-        """Callback cuando el avatar se descarga."""
-        if reply.error() == QNetworkReply.NoError:
-            data = reply.readAll()
-            pixmap = QPixmap()
-            pixmap.loadFromData(data)
-            if not pixmap.isNull():
-                scaled = pixmap.scaled(40, 40, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
-                self.avatar_label.setPixmap(scaled)
-                self.avatar_label.setText("")
-                self.avatar_label.setStyleSheet("border-radius: 20px; background: transparent;")
-        reply.deleteLater()
+    def _set_avatar_pixmap(self, pixmap: QPixmap):
+        self.avatar_label.setPixmap(pixmap)
+        self.avatar_label.setText("")
+        self.avatar_label.setStyleSheet("border-radius: 20px; background: transparent;")
     
     def _update_card(self, card: QFrame, value: str):
         lbl = card.findChild(QLabel, "value")
         if lbl:
             lbl.setText(value)
     
-    def load_data(self):
+    def load_data(self, force: bool = False):
         if self._loading:
             return
         self._loading = True
         self._cleanup_thread()
+        if not self._painted:
+            self._paint_snapshot()
         
         self._thread = QThread()
-        self._worker = DashboardWorker()
+        self._worker = DashboardWorker(force)
         self._worker.moveToThread(self._thread)
         self._thread.started.connect(self._worker.run)
         self._worker.finished.connect(self._on_loaded)
@@ -467,6 +477,13 @@ class DashboardPage(QWidget):
             self._activity_seconds_left = 15
         self.activity_refresh_label.setText(f"Refreshing in {self._activity_seconds_left}s")
 
+    def _on_activity_timer(self):
+        """Polling tick: skip it while the API budget is low."""
+        if HTBApi.rate_budget().low:
+            debug_log("DASHBOARD", "Rate budget low, skipping activity refresh")
+            return
+        self._load_activity()
+
     def _load_activity(self):
         if not self._active_machine_id:
             return
@@ -478,11 +495,19 @@ class DashboardPage(QWidget):
         self._activity_worker.moveToThread(self._activity_thread)
         self._activity_thread.started.connect(self._activity_worker.run)
         self._activity_worker.finished.connect(self._on_activity_loaded)
+        self._activity_worker.unchanged.connect(self._on_activity_unchanged)
         self._activity_worker.error.connect(lambda e: self._cleanup_activity_thread())
         self._activity_thread.start()
 
-    @Slot(list)
-    def _on_activity_loaded(self, activity: List[dict]):
+    @Slot()
+    def _on_activity_unchanged(self):
+        """Poll returned the same feed: keep the current widgets and avatars."""
+        self._cleanup_activity_thread()
+        self._activity_seconds_left = 15
+        self.activity_refresh_label.setText("Refreshing in 15s")
+
+    @Slot(list, object)
+    def _on_activity_loaded(self, activity: List[dict], fingerprint: Optional[str]):
         self._cleanup_activity_thread()
         self._activity_seconds_left = 15
         self.activity_refresh_label.setText("Refreshing in 15s")
@@ -493,7 +518,7 @@ class DashboardPage(QWidget):
             item = self._activity_layout.takeAt(0)
             if item.widget():
                 item.widget().deleteLater()
-        for i, entry in enumerate(activity[:15]):
+        for entry in activity[:15]:
             date_diff = entry.get("date_diff", "")
             user_name = entry.get("user_name", "")
             entry_type = entry.get("type", "")  # "blood", "user", or "root"
@@ -505,48 +530,13 @@ class DashboardPage(QWidget):
             self._activity_layout.addWidget(row)
             self._activity_items.append(row)
             if avatar_url:
-                req = QNetworkRequest(QUrl(avatar_url))
-                reply = self._activity_network.get(req)
-                reply.setProperty("index", i)
-
-    @Slot(QNetworkReply)
-    def _on_activity_avatar_loaded(self, reply: QNetworkReply):
-        if reply.error() != QNetworkReply.NoError:
-            reply.deleteLater()
-            return
-        idx = reply.property("index")
-        if idx is not None and 0 <= idx < len(self._activity_items):
-            data = reply.readAll()
-            pixmap = QPixmap()
-            pixmap.loadFromData(data)
-            if not pixmap.isNull():
-                self._activity_items[idx].set_avatar_pixmap(pixmap)
-        reply.deleteLater()
-
-    @Slot(QNetworkReply)
-    def _on_machine_avatar_loaded(self, reply: QNetworkReply):
-        if reply.error() != QNetworkReply.NoError:
-            reply.deleteLater()
-            return
-        data = reply.readAll()
-        pixmap = QPixmap()
-        pixmap.loadFromData(data)
-        if not pixmap.isNull():
-            # Escalar y redondear esquinas
-            from PySide6.QtGui import QPainter, QPainterPath
-            scaled = pixmap.scaled(48, 48, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
-            rounded = QPixmap(48, 48)
-            rounded.fill(Qt.transparent)
-            painter = QPainter(rounded)
-            painter.setRenderHint(QPainter.Antialiasing)
-            path = QPainterPath()
-            path.addRoundedRect(0, 0, 48, 48, 8, 8)
-            painter.setClipPath(path)
-            painter.drawPixmap(0, 0, 48, 48, scaled)
-            painter.end()
-            self.machine_avatar.setPixmap(rounded)
-            self.machine_avatar.setStyleSheet("border-radius: 8px; background: transparent;")
-        reply.deleteLater()
+                image_fetcher().fetch(avatar_url, ACTIVITY_AVATAR_STYLE, row.set_avatar_pixmap, row)
+        # Sólo ahora cuenta como visto: un resultado perdido se vuelve a pintar
+        changes.record("dashboard.activity", fingerprint)
+
+    def _set_machine_avatar_pixmap(self, pixmap: QPixmap):
+        self.machine_avatar.setPixmap(pixmap)
+        self.machine_avatar.setStyleSheet("border-radius: 8px; background: transparent;")
 
     def _on_stop_clicked(self):
         if not self._active_machine_id:
@@ -615,12 +605,26 @@ class DashboardPage(QWidget):
         self._cleanup_action_thread()
         QMessageBox.warning(self, "Error", error)
     
+    def _paint_snapshot(self):
+        """First load: paint the last saved data at once, the worker revalidates it."""
+        self._painted = True
+        self._snapshot = planner.execute(DASHBOARD_PLAN, snapshot=True)
+        if self._snapshot:
+            debug_log("DASHBOARD", "Painting from snapshot")
+            self._render(self._snapshot)
+    
     @Slot(dict)
     def _on_loaded(self, data: dict):
         self._loading = False
         self._cleanup_thread()
-        
-        if "user" in data:
+        snapshot, self._snapshot = self._snapshot, None
+        if snapshot and data == snapshot:
+            debug_log("DASHBOARD", "Snapshot still current, nothing to repaint")
+            return
+        self._render(data)
+    
+    def _render(self, data: dict):
+        if data.get("user"):
             u = data["user"]
             self.welcome_label.setText(f"Welcome back, {u.name}!")
             self.username_label.setText(u.name)
@@ -652,8 +656,8 @@ class DashboardPage(QWidget):
             if m.avatar:
                 self._active_machine_avatar = m.avatar
                 self.machine_avatar.setVisible(True)
-                req = QNetworkRequest(QUrl(m.avatar))
-                self._machine_avatar_network.get(req)
+                image_fetcher().fetch(m.avatar, MACHINE_AVATAR_STYLE, self._set_machine_avatar_pixmap,
+                                      self.machine_avatar, PRIORITY_VISIBLE)
             else:
                 self.machine_avatar.setVisible(False)
         else:
@@ -5,11 +5,11 @@ from PySide6.QtWidgets import (
     QPushButton, QLineEdit, QFrame, QMessageBox,
     QScrollArea, QSizePolicy, QApplication,
 )
-from PySide6.QtCore import Qt, Signal, Slot, QThread, QObject, QTimer, QUrl, QSize
-from PySide6.QtGui import QColor, QPalette, QPixmap, QIcon, QPainter, QPainterPath
-from PySide6.QtNetwork import QNetworkAccessManager, QNetworkRequest, QNetworkReply
+from PySide6.QtCore import Qt, Signal, Slot, QThread, QObject, QTimer, QSize
+from PySide6.QtGui import QColor, QPalette, QPixmap, QIcon
 from typing import Optional, List
 
+from api.changes import changes
 from api.endpoints import HTBApi
 from models.machine import Machine
 from ui.styles import (
@@ -17,8 +17,13 @@ from ui.styles import (
     DIFF_EASY, DIFF_MEDIUM, DIFF_HARD, DIFF_INSANE,
     BTN_PRIMARY, BTN_DANGER, BTN_DEFAULT
 )
-from ui.widgets.activity_item import ActivityItem
+from ui.widgets.activity_item import ActivityItem, AVATAR_STYLE as ACTIVITY_AVATAR_STYLE
 from utils.debug import debug_log
+from utils.avatars import AvatarStyle
+from utils.image_fetcher import image_fetcher, PRIORITY_VISIBLE
+
+
+MACHINE_AVATAR_STYLE = AvatarStyle(56, radius=10, packed=True)
 
 
 class ActionWorker(QObject):
@@ -54,7 +59,8 @@ class ActionWorker(QObject):
 
 
 class ActivityWorker(QObject):
-    finished = Signal(list)
+    finished = Signal(list, object)  # activity, fingerprint
+    unchanged = Signal()
     error = Signal(str)
     
     def __init__(self, machine_id: int):
@@ -65,9 +71,13 @@ class ActivityWorker(QObject):
         try:
             success, result = HTBApi.get_machine_activity(self.machine_id)
             if success and isinstance(result, dict):
+                fingerprint = HTBApi.activity_fingerprint(self.machine_id, result)
+                if not changes.changed("machine_detail.activity", fingerprint):
+                    self.unchanged.emit()
+                    return
                 info = result.get("info", {})
                 activity = info.get("activity", [])
-                self.finished.emit(activity)
+                self.finished.emit(activity, fingerprint)
             else:
                 self.error.emit(str(result) if not success else "Invalid response")
         except Exception as e:
@@ -79,9 +89,14 @@ class ActiveMachineWorker(QObject):
     finished = Signal(object)  # ActiveMachine or None
     error = Signal(str)
     
+    def __init__(self, fresh: bool = False):
+        super().__init__()
+        # fresh: saltarse la caché de respuestas (sondeo de IP tras un spawn)
+        self.fresh = fresh
+    
     def run(self):
         try:
-            success, result = HTBApi.get_active_machine()
+            success, result = HTBApi.get_active_machine(bypass_cache=self.fresh)
             if success and isinstance(result, dict):
                 from models.connection import ActiveMachine
                 active = ActiveMachine.from_api(result)
@@ -105,7 +120,7 @@ class MachineDetailPage(QWidget):
         
         self._activity_timer = QTimer(self)
         self._activity_timer.setInterval(15000)  # 15 segundos
-        self._activity_timer.timeout.connect(self._load_activity)
+        self._activity_timer.timeout.connect(self._on_activity_timer)
         self._activity_countdown = QTimer(self)
         self._activity_countdown.setInterval(1000)
         self._activity_countdown.timeout.connect(self._update_refresh_countdown)
@@ -117,10 +132,6 @@ class MachineDetailPage(QWidget):
         self._ip_poll_timer.timeout.connect(self._poll_for_ip)
         self._ip_poll_count = 0
         
-        self._network_manager = QNetworkAccessManager(self)
-        self._network_manager.finished.connect(self._on_activity_avatar_loaded)
-        self._avatar_network = QNetworkAccessManager(self)
-        self._avatar_network.finished.connect(self._on_machine_avatar_loaded)
         self._activity_items: List[ActivityItem] = []
         self._active_machine_thread = None
         self._active_machine_worker = None
@@ -330,32 +341,12 @@ class MachineDetailPage(QWidget):
         """Cargar el avatar de la máquina."""
         if not self._machine or not self._machine.avatar:
             return
-        req = QNetworkRequest(QUrl(self._machine.avatar))
-        self._avatar_network.get(req)
+        image_fetcher().fetch(self._machine.avatar, MACHINE_AVATAR_STYLE,
+                              self._set_machine_avatar_pixmap, self.machine_avatar, PRIORITY_VISIBLE)
     
-    @Slot(QNetworkReply)
-    def _on_machine_avatar_loaded(self, reply: QNetworkReply):
-        if reply.error() != QNetworkReply.NoError:
-            reply.deleteLater()
-            return
-        data = reply.readAll()
-        pixmap = QPixmap()
-        pixmap.loadFromData(data)
-        if not pixmap.isNull():
-            # Escalar y redondear esquinas
-            scaled = pixmap.scaled(56, 56, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
-            rounded = QPixmap(56, 56)
-            rounded.fill(Qt.transparent)
-            painter = QPainter(rounded)
-            painter.setRenderHint(QPainter.Antialiasing)
-            path = QPainterPath()
-            path.addRoundedRect(0, 0, 56, 56, 10, 10)
-            painter.setClipPath(path)
-            painter.drawPixmap(0, 0, 56, 56, scaled)
-            painter.end()
-            self.machine_avatar.setPixmap(rounded)
-            self.machine_avatar.setStyleSheet("border-radius: 10px; background: transparent;")
-        reply.deleteLater()
+    def _set_machine_avatar_pixmap(self, pixmap: QPixmap):
+        self.machine_avatar.setPixmap(pixmap)
+        self.machine_avatar.setStyleSheet("border-radius: 10px; background: transparent;")
     
     def _fetch_active_machine_ip(self):
         """Obtener máquina activa; si coincide con la actual, mostrar su IP."""
@@ -412,6 +403,13 @@ class MachineDetailPage(QWidget):
         self.user_owns_label.setText(f"👤 {m.user_owns_count:,} user owns")
         self.root_owns_label.setText(f"💀 {m.root_owns_count:,} root owns")
     
+    def _on_activity_timer(self):
+        """Polling tick: skip it while the API budget is low."""
+        if HTBApi.rate_budget().low:
+            debug_log("MACHINE", "Rate budget low, skipping activity refresh")
+            return
+        self._load_activity()
+
     def _load_activity(self):
         if not self._machine:
             return
@@ -422,6 +420,7 @@ class MachineDetailPage(QWidget):
         self._activity_worker.moveToThread(self._activity_thread)
         self._activity_thread.started.connect(self._activity_worker.run)
         self._activity_worker.finished.connect(self._on_activity_loaded)
+        self._activity_worker.unchanged.connect(self._on_activity_unchanged)
         self._activity_worker.error.connect(self._on_activity_error)
         self._activity_thread.start()
     
@@ -453,8 +452,15 @@ class MachineDetailPage(QWidget):
             self._activity_seconds_left = 15
         self.refresh_indicator.setText(f"Refreshing in {self._activity_seconds_left}s")
     
-    @Slot(list)
-    def _on_activity_loaded(self, activity: List[dict]):
+    @Slot()
+    def _on_activity_unchanged(self):
+        """Poll returned the same feed: keep the current widgets and avatars."""
+        self._cleanup_activity_thread()
+        self._activity_seconds_left = 15
+        self.refresh_indicator.setText("Refreshing in 15s")
+
+    @Slot(list, object)
+    def _on_activity_loaded(self, activity: List[dict], fingerprint: Optional[str]):
         self._cleanup_activity_thread()
         self._activity_seconds_left = 15
         self.refresh_indicator.setText("Refreshing in 15s")
@@ -467,7 +473,7 @@ class MachineDetailPage(QWidget):
             if item.widget():
                 item.widget().deleteLater()
         # Añadir nuevos
-        for i, entry in enumerate(activity[:20]):
+        for entry in activity[:20]:
             date_diff = entry.get("date_diff", "")
             user_name = entry.get("user_name", "")
             entry_type = entry.get("type", "")  # "blood", "user", or "root"
@@ -479,23 +485,9 @@ class MachineDetailPage(QWidget):
             self._activity_layout.addWidget(row)
             self._activity_items.append(row)
             if avatar_url:
-                req = QNetworkRequest(QUrl(avatar_url))
-                reply = self._network_manager.get(req)
-                reply.setProperty("index", i)
-    
-    @Slot(QNetworkReply)
-    def _on_activity_avatar_loaded(self, reply: QNetworkReply):
-        if reply.error() != QNetworkReply.NoError:
-            reply.deleteLater()
-            return
-        idx = reply.property("index")
-        if idx is not None and 0 <= idx < len(self._activity_items):
-            data = reply.readAll()
-            pixmap = QPixmap()
-            pixmap.loadFromData(data)
-            if not pixmap.isNull():
-                self._activity_items[idx].set_avatar_pixmap(pixmap)
-        reply.deleteLater()
+                image_fetcher().fetch(avatar_url, ACTIVITY_AVATAR_STYLE, row.set_avatar_pixmap, row)
+        # Sólo ahora cuenta como visto: un resultado perdido se vuelve a pintar
+        changes.record("machine_detail.activity", fingerprint)
     
     @Slot(str)
     def _on_activity_error(self, error: str):
@@ -583,20 +575,33 @@ class MachineDetailPage(QWidget):
             self.copy_ip_btn.setEnabled(True)
             return
         
-        try:
-            success, result = HTBApi.get_active_machine()
-            if success and result:
-                from models.connection import ActiveMachine
-                active = ActiveMachine.from_api(result)
-                if active and active.ip:
-                    self._ip_poll_timer.stop()
-                    self._starting_anim_timer.stop()
-                    self.ip_label.setText(active.ip)
-                    self._set_ip_display(active.ip)
-                    self.copy_ip_btn.setEnabled(True)
-                    debug_log("MACHINE", f"Got IP: {active.ip}")
-        except Exception as e:
-            debug_log("MACHINE", f"Error polling IP: {e}")
+        if self._active_machine_thread and self._active_machine_thread.isRunning():
+            return
+        self._active_machine_thread = QThread()
+        self._active_machine_worker = ActiveMachineWorker(fresh=True)
+        self._active_machine_worker.moveToThread(self._active_machine_thread)
+        self._active_machine_thread.started.connect(self._active_machine_worker.run)
+        self._active_machine_worker.finished.connect(self._on_ip_polled)
+        self._active_machine_worker.error.connect(lambda e: debug_log("MACHINE", f"Error polling IP: {e}"))
+        self._active_machine_thread.start()
+    
+    @Slot(object)
+    def _on_ip_polled(self, active):
+        if self._active_machine_thread:
+            if self._active_machine_thread.isRunning():
+                self._active_machine_thread.quit()
+                self._active_machine_thread.wait(2000)
+            self._active_machine_thread = None
+            self._active_machine_worker = None
+        if not self._ip_poll_timer.isActive():
+            return
+        if active and active.ip:
+            self._ip_poll_timer.stop()
+            self._starting_anim_timer.stop()
+            self.ip_label.setText(active.ip)
+            self._set_ip_display(active.ip)
+            self.copy_ip_btn.setEnabled(True)
+            debug_log("MACHINE", f"Got IP: {active.ip}")
     
     def _animate_starting(self):
         """Animar los puntos de 'Starting.'"""
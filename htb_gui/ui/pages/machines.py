@@ -1,34 +1,61 @@
-"""Machines Page - HTB Style with responsive grid and machine avatars."""
+"""Machines Page - HTB Style with responsive grid (model/view) and machine avatars."""
 
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-    QPushButton, QLineEdit, QComboBox, QScrollArea, QGridLayout, QSizePolicy
+    QPushButton, QLineEdit, QComboBox
 )
-from PySide6.QtCore import Qt, Signal, Slot, QThread, QObject, QUrl
-from PySide6.QtNetwork import QNetworkAccessManager, QNetworkRequest, QNetworkReply
-from PySide6.QtGui import QPixmap
-from typing import List, Dict
+from PySide6.QtCore import Qt, Signal, Slot, QThread, QObject, QTimer
+from typing import List, Optional
 
 from api.endpoints import HTBApi
+from api.planner import DataPlan, Fetch, planner
 from models.machine import Machine
 from ui.styles import HTB_TEXT_DIM
-from ui.widgets.machine_card import MachineCard
+from ui.widgets.machine_grid import (
+    MachineFilterProxy, MachineGridView, MachineListModel, sync_search_index,
+)
 from utils.debug import debug_log
-from utils.image_cache import get_cached_image, save_to_cache
+from utils.search_index import SearchIndex
+
+# Espera tras la última tecla antes de buscar
+SEARCH_DEBOUNCE_MS = 150
+# Espera máxima (GUI bloqueada) a que el worker pare antes de soltarlo
+STOP_WAIT_MS = 200
+# Al cerrar la app, espera máxima por cada worker soltado
+SHUTDOWN_WAIT_MS = 3000
+
+
+def _parse_machines(result) -> List[Machine]:
+    return [Machine.from_api(m) for m in result.get("data", [])]
+
+
+MACHINES_PLAN = DataPlan("machines", [
+    Fetch("machines", HTBApi.get_machines, parse=_parse_machines, ttl=300, persist=True),
+])
 
 
 class MachinesWorker(QObject):
     finished = Signal(list)
     error = Signal(str)
     
+    def __init__(self, index: SearchIndex, force: bool = False):
+        super().__init__()
+        self.index = index
+        self.force = force
+    
     def run(self):
         try:
-            success, result = HTBApi.get_machines()
-            if success:
-                machines = [Machine.from_api(m) for m in result.get("data", [])]
-                self.finished.emit(machines)
+            data = planner.execute(MACHINES_PLAN, force=self.force)
+            if "machines" in data:
+                # Indexing a big catalog takes a while: done here, not in the GUI thread.
+                # Se comprueba la interrupción entre entradas, nunca con el lock tomado
+                stop = QThread.currentThread().isInterruptionRequested
+                if not sync_search_index(self.index, data["machines"], stop):
+                    debug_log("MACHINES", "Index sync interrupted, results dropped")
+                    return
+                self.finished.emit(data["machines"])
             else:
-                self.error.emit(str(result))
+                self.error.emit("Failed to load machines")
         except Exception as e:
             self.error.emit(str(e))
 
@@ -41,11 +68,14 @@ class MachinesPage(QWidget):
         self._machines: List[Machine] = []
         self._thread = None
         self._worker = None
+        # Workers soltados que aún no han salido (p.ej. esperando HTTP): (thread, worker)
+        self._retired: List[tuple] = []
         self._loading = False
         self._loaded = False
-        self._network_manager = QNetworkAccessManager(self)
-        self._network_manager.finished.connect(self._on_avatar_loaded)
-        self._machine_cards: Dict[int, MachineCard] = {}  # machine_id -> card
+        self._snapshot: Optional[List[Machine]] = None
+        self.model = MachineListModel(self)
+        self.proxy = MachineFilterProxy(self)
+        self.proxy.setSourceModel(self.model)
         self._setup_ui()
     
     def _setup_ui(self):
@@ -60,7 +90,7 @@ class MachinesPage(QWidget):
         header.addWidget(title)
         header.addStretch()
         self.search = QLineEdit()
-        self.search.setPlaceholderText("Search by name...")
+        self.search.setPlaceholderText("Search name, creator, OS, label...")
         self.search.setMinimumWidth(280)
         self.search.setMaximumWidth(400)
         self.search.setMinimumHeight(42)
@@ -71,7 +101,12 @@ class MachinesPage(QWidget):
                 border-radius: 10px;
             }
         """)
-        self.search.textChanged.connect(self._apply_filters)
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self._search_timer.timeout.connect(self._apply_filters)
+        self.search.textChanged.connect(self._search_timer.start)
+        self.search.returnPressed.connect(self._apply_filters)
         header.addWidget(self.search)
         layout.addLayout(header)
         
@@ -100,30 +135,26 @@ class MachinesPage(QWidget):
         filters.addWidget(refresh_btn)
         layout.addLayout(filters)
         
-        # Grid
-        scroll = QScrollArea()
-        scroll.setWidgetResizable(True)
-        scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        scroll.setStyleSheet("background: transparent; border: none;")
-        self.grid_widget = QWidget()
-        self.grid_layout = QGridLayout(self.grid_widget)
-        self.grid_layout.setSpacing(14)
-        self.grid_layout.setAlignment(Qt.AlignTop | Qt.AlignLeft)
-        scroll.setWidget(self.grid_widget)
-        layout.addWidget(scroll)
+        # Grid: tarjetas pintadas por un delegate, sólo cuestan las visibles
+        self.grid = MachineGridView()
+        self.grid.setModel(self.proxy)
+        self.grid.machine_clicked.connect(self.machine_selected.emit)
+        layout.addWidget(self.grid)
     
     def _force_reload(self):
         self._loaded = False
-        self.load_data()
+        self.load_data(force=True)
     
-    def load_data(self):
+    def load_data(self, force: bool = False):
         if self._loading:
             return
         self._loading = True
         self._cleanup_thread()
+        if not self._machines:
+            self._paint_snapshot()
         
         self._thread = QThread()
-        self._worker = MachinesWorker()
+        self._worker = MachinesWorker(self.model.search_index, force)
         self._worker.moveToThread(self._thread)
         self._thread.started.connect(self._worker.run)
         self._worker.finished.connect(self._on_loaded)
@@ -133,26 +164,71 @@ class MachinesPage(QWidget):
     def _cleanup_thread(self):
         if self._thread:
             if self._thread.isRunning():
+                # Nunca terminate(): el worker puede estar a medio sincronizar
+                # el índice de búsqueda (y tener su lock); se le pide parar
+                self._thread.requestInterruption()
                 self._thread.quit()
-                if not self._thread.wait(3000):
-                    self._thread.terminate()
-                    self._thread.wait(500)
+                if not self._thread.wait(STOP_WAIT_MS):
+                    self._retire(self._thread, self._worker)
             self._thread = None
             self._worker = None
 
+    def _retire(self, thread: QThread, worker: MachinesWorker):
+        """
+        Soltar un worker que sigue bloqueado (HTTP, reintentos...) sin
+        esperarlo en la GUI: sus resultados se descartan y se libera
+        cuando su hilo termina.
+        """
+        for signal, slot in ((worker.finished, self._on_loaded), (worker.error, self._on_error)):
+            try:
+                signal.disconnect(slot)
+            except (RuntimeError, TypeError):
+                pass
+        thread.finished.connect(self._reap_retired)
+        self._retired.append((thread, worker))
+        debug_log("MACHINES", "Worker still busy, detached")
+
+    @Slot()
+    def _reap_retired(self):
+        # finished se emite justo antes de que el hilo salga: ya no tarda
+        done = self.sender()
+        for thread, _ in self._retired:
+            if thread is done:
+                thread.wait()
+        self._retired = [(t, w) for t, w in self._retired if not t.isFinished()]
+
     def stop_background_tasks(self):
         """Llamado al cerrar la app para evitar QThread destroyed while running."""
         self._loading = False
         self._cleanup_thread()
+        for thread, _ in self._retired:
+            thread.wait(SHUTDOWN_WAIT_MS)
+        self._retired = [(t, w) for t, w in self._retired if not t.isFinished()]
     
     @Slot(list)
     def _on_loaded(self, machines: List[Machine]):
         self._loading = False
         self._loaded = True
-        self._machines = machines
         self._cleanup_thread()
+        snapshot, self._snapshot = self._snapshot, None
+        if snapshot and machines == snapshot:
+            debug_log("MACHINES", "Snapshot still current, nothing to repaint")
+            if self.search.text().strip():
+                self._apply_filters()  # the index is complete now
+            return
+        self._machines = machines
+        self.model.set_machines(machines)
         self._apply_filters()
     
+    def _paint_snapshot(self):
+        """Paint the last saved catalog at once; the worker revalidates it."""
+        self._snapshot = planner.execute(MACHINES_PLAN, snapshot=True).get("machines")
+        if self._snapshot:
+            debug_log("MACHINES", f"Painting {len(self._snapshot)} machines from snapshot")
+            self._machines = self._snapshot
+            self.model.set_machines(self._snapshot)
+            self._apply_filters()
+    
     @Slot(str)
     def _on_error(self, error: str):
         self._loading = False
@@ -160,76 +236,14 @@ class MachinesPage(QWidget):
         debug_log("MACHINES", f"Error: {error}")
     
     def _apply_filters(self):
-        query = self.search.text().lower()
-        os_f = self.os_filter.currentText()
-        diff_f = self.diff_filter.currentText()
-        status_f = self.status_filter.currentText()
-        
-        filtered = []
-        for m in self._machines:
-            if query and query not in m.name.lower():
-                continue
-            if os_f != "All OS" and m.os != os_f:
-                continue
-            if diff_f != "All Difficulty" and m.difficulty_text != diff_f:
-                continue
-            if status_f == "Free Only" and not m.free:
-                continue
-            if status_f == "Owned" and not m.auth_user_in_root_owns:
-                continue
-            filtered.append(m)
-        
-        self._display(filtered)
-    
-    def _display(self, machines: List[Machine]):
-        while self.grid_layout.count():
-            item = self.grid_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
-        
-        self._machine_cards.clear()
-        self.count_label.setText(f"{len(machines)} machines")
-        
-        cols = max(1, (self.width() - 80) // 220)
-        
-        for i, m in enumerate(machines):
-            card = MachineCard(m)
-            card.clicked.connect(self.machine_selected.emit)
-            self.grid_layout.addWidget(card, i // cols, i % cols)
-            self._machine_cards[m.id] = card
-            
-            # Cargar avatar si tiene URL (usar caché)
-            if m.avatar:
-                cached = get_cached_image(m.avatar)
-                if cached:
-                    card.set_avatar_pixmap(cached)
-                else:
-                    req = QNetworkRequest(QUrl(m.avatar))
-                    reply = self._network_manager.get(req)
-                    reply.setProperty("machine_id", m.id)
-                    reply.setProperty("url", m.avatar)
-    
-    @Slot(QNetworkReply)
-    def _on_avatar_loaded(self, reply: QNetworkReply):
-        if reply.error() != QNetworkReply.NoError:
-            reply.deleteLater()
-            return
-        machine_id = reply.property("machine_id")
-        url = reply.property("url")
-        if machine_id is not None and machine_id in self._machine_cards:
-            data = reply.readAll()
-            pixmap = save_to_cache(url, data) if url else None
-            if not pixmap:
-                pixmap = QPixmap()
-                pixmap.loadFromData(data)
-            if pixmap and not pixmap.isNull():
-                self._machine_cards[machine_id].set_avatar_pixmap(pixmap)
-        reply.deleteLater()
-    
-    def resizeEvent(self, event):
-        super().resizeEvent(event)
-        if self._machines:
-            self._apply_filters()
+        self._search_timer.stop()
+        self.proxy.set_filters(
+            self.search.text(),
+            self.os_filter.currentText(),
+            self.diff_filter.currentText(),
+            self.status_filter.currentText(),
+        )
+        self.count_label.setText(f"{self.proxy.rowCount()} machines")
     
     def showEvent(self, event):
         super().showEvent(event)
@@ -238,5 +252,7 @@ class MachinesPage(QWidget):
     
     def hideEvent(self, event):
         super().hideEvent(event)
+        # Un worker interrumpido no emite nada: se vuelve a cargar al mostrarse
+        self._loading = False
         self._cleanup_thread()
 
@@ -6,18 +6,60 @@ from PySide6.QtWidgets import (
     QFrame, QScrollArea, QHeaderView, QSizePolicy,
     QAbstractItemView,
 )
-from PySide6.QtCore import Qt, Signal, Slot, QThread, QObject, QUrl
-from PySide6.QtGui import QPixmap, QIcon, QPainter, QPainterPath
-from PySide6.QtNetwork import QNetworkAccessManager, QNetworkRequest, QNetworkReply
+from PySide6.QtCore import Qt, Signal, Slot, QThread, QObject
+from PySide6.QtGui import QPixmap, QIcon
 from typing import List, Optional
 
 from api.endpoints import HTBApi
+from api.planner import DataPlan, Derive, Fetch, planner
 from models.season import Season, LeaderboardEntry
 from models.machine import Machine
 from ui.styles import HTB_GREEN, HTB_TEXT_DIM, HTB_BG_CARD
-from ui.widgets.machine_card import MachineCard
+from ui.widgets.machine_card import MachineCard, AVATAR_STYLE
 from utils.debug import debug_log
-from utils.image_cache import get_cached_image, save_to_cache
+from utils.image_fetcher import image_fetcher, PRIORITY_VISIBLE
+from utils.avatars import AvatarStyle, CIRCLE
+
+LEADERBOARD_AVATAR_STYLE = AvatarStyle(28, shape=CIRCLE)
+
+
+def _parse_seasons(result) -> List[Season]:
+    return [Season.from_api(s) for s in result.get("data", [])]
+
+
+def _parse_season_machines(result) -> List[Machine]:
+    return [Machine.from_api(m) for m in result.get("data", []) if not m.get("unknown")]
+
+
+def _parse_leaderboard(result) -> List[LeaderboardEntry]:
+    return [LeaderboardEntry.from_api(e) for e in result.get("data", [])]
+
+
+def _select_season(results: dict) -> Optional[Season]:
+    """Temporada pedida (season_id) o la activa; si no, la primera."""
+    seasons = results.get("seasons") or []
+    fallback = seasons[0] if seasons else None
+    season_id = results.get("season_id")
+    if season_id:
+        return next((s for s in seasons if s.id == season_id), fallback)
+    return next((s for s in seasons if s.active), fallback)
+
+
+def _season_args(results: dict) -> Optional[tuple]:
+    active = results.get("active")
+    season_id = active.id if active else results.get("season_id")
+    return (season_id,) if season_id else None
+
+
+# season list → temporada seleccionada → machines + leaderboard (en paralelo)
+SEASONS_PLAN = DataPlan("seasons", [
+    Fetch("seasons", HTBApi.get_seasons, parse=_parse_seasons, ttl=3600, persist=True),
+    Derive("active", _select_season, after=("seasons",)),
+    Fetch("machines", HTBApi.get_season_machines, args=_season_args,
+          after=("active",), parse=_parse_season_machines, ttl=600, persist=True),
+    Fetch("leaderboard", HTBApi.get_season_leaderboard, args=_season_args,
+          after=("active",), parse=_parse_leaderboard, ttl=120, persist=True),
+])
 
 
 class SeasonsWorker(QObject):
@@ -29,31 +71,8 @@ class SeasonsWorker(QObject):
         self.season_id = season_id
     
     def run(self):
-        data = {}
         try:
-            success, result = HTBApi.get_seasons()
-            if success:
-                seasons = [Season.from_api(s) for s in result.get("data", [])]
-                data["seasons"] = seasons
-                if self.season_id:
-                    active = next((s for s in seasons if s.id == self.season_id), seasons[0] if seasons else None)
-                else:
-                    active = next((s for s in seasons if s.active), seasons[0] if seasons else None)
-                if active:
-                    data["active"] = active
-                    self.season_id = active.id
-            
-            if self.season_id:
-                success, result = HTBApi.get_season_machines(self.season_id)
-                if success:
-                    raw = [m for m in result.get("data", []) if not m.get("unknown")]
-                    data["machines"] = [Machine.from_api(m) for m in raw]
-                
-                success, result = HTBApi.get_season_leaderboard(self.season_id)
-                if success:
-                    data["leaderboard"] = [LeaderboardEntry.from_api(e) for e in result.get("data", [])]
-            
-            self.finished.emit(data)
+            self.finished.emit(planner.execute(SEASONS_PLAN, season_id=self.season_id))
         except Exception as e:
             self.error.emit(str(e))
 
@@ -69,10 +88,7 @@ class SeasonsPage(QWidget):
         self._worker = None
         self._loading = False
         self._loaded = False
-        self._network_manager = QNetworkAccessManager(self)
-        self._network_manager.finished.connect(self._on_leaderboard_avatar_loaded)
-        self._machine_avatar_network = QNetworkAccessManager(self)
-        self._machine_avatar_network.finished.connect(self._on_machine_avatar_loaded)
+        self._snapshot: Optional[dict] = None
         self._machine_cards = {}
         self._setup_ui()
     
@@ -171,6 +187,8 @@ class SeasonsPage(QWidget):
         self._loading = True
         self._cleanup_thread()
         sid = season_id or (self._current.id if self._current else None)
+        if not self._seasons and sid is None:
+            self._paint_snapshot()
         self._thread = QThread()
         self._worker = SeasonsWorker(sid)
         self._worker.moveToThread(self._thread)
@@ -179,12 +197,25 @@ class SeasonsPage(QWidget):
         self._worker.error.connect(self._on_error)
         self._thread.start()
     
+    def _paint_snapshot(self):
+        """First load: paint the last saved season at once, the worker revalidates it."""
+        self._snapshot = planner.execute(SEASONS_PLAN, snapshot=True, season_id=None)
+        if self._snapshot.get("seasons"):
+            debug_log("SEASONS", "Painting from snapshot")
+            self._render(self._snapshot)
+    
     @Slot(dict)
     def _on_loaded(self, data: dict):
         self._loading = False
         self._loaded = True
         self._cleanup_thread()
-        
+        snapshot, self._snapshot = self._snapshot, None
+        if snapshot and data == snapshot:
+            debug_log("SEASONS", "Snapshot still current, nothing to repaint")
+            return
+        self._render(data)
+    
+    def _render(self, data: dict):
         if "seasons" in data:
             self._seasons = data["seasons"]
             self.season_combo.blockSignals(True)
@@ -211,14 +242,8 @@ class SeasonsPage(QWidget):
                 self.machines_layout.addWidget(card)
                 self._machine_cards[m.id] = card
                 if m.avatar:
-                    cached = get_cached_image(m.avatar)
-                    if cached:
-                        card.set_avatar_pixmap(cached)
-                    else:
-                        req = QNetworkRequest(QUrl(m.avatar))
-                        reply = self._machine_avatar_network.get(req)
-                        reply.setProperty("machine_id", m.id)
-                        reply.setProperty("url", m.avatar)
+                    image_fetcher().fetch(m.avatar, AVATAR_STYLE, card.set_avatar_pixmap, card,
+                                          PRIORITY_VISIBLE)
         
         if "leaderboard" in data:
             entries = data["leaderboard"]
@@ -229,74 +254,17 @@ class SeasonsPage(QWidget):
                 self.table.setItem(i, 1, player_item)
                 if e.avatar_thumb:
                     url = e.avatar_thumb if e.avatar_thumb.startswith("http") else f"https://labs.hackthebox.com{e.avatar_thumb}"
-                    cached = get_cached_image(url)
-                    if cached:
-                        size = 28
-                        rounded = QPixmap(size, size)
-                        rounded.fill(Qt.transparent)
-                        painter = QPainter(rounded)
-                        painter.setRenderHint(QPainter.Antialiasing)
-                        path = QPainterPath()
-                        path.addEllipse(0, 0, size, size)
-                        painter.setClipPath(path)
-                        painter.drawPixmap(0, 0, size, size, cached.scaled(size, size, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation))
-                        painter.end()
-                        player_item.setIcon(QIcon(rounded))
-                    else:
-                        req = QNetworkRequest(QUrl(url))
-                        reply = self._network_manager.get(req)
-                        reply.setProperty("row", i)
-                        reply.setProperty("col", 1)
-                        reply.setProperty("url", url)
+                    player_item.setData(Qt.UserRole, url)
+                    on_ready = lambda pixmap, row=i, url=url: self._set_leaderboard_avatar(row, url, pixmap)
+                    image_fetcher().fetch(url, LEADERBOARD_AVATAR_STYLE, on_ready, self.table)
                 self.table.setItem(i, 2, QTableWidgetItem(str(e.points)))
                 self.table.setItem(i, 3, QTableWidgetItem(f"{e.user_owns}/{e.root_owns}"))
 
-    @Slot(QNetworkReply)
-    def _on_machine_avatar_loaded(self, reply: QNetworkReply):
-        if reply.error() != QNetworkReply.NoError:
-            reply.deleteLater()
-            return
-        machine_id = reply.property("machine_id")
-        url = reply.property("url")
-        if machine_id is not None and machine_id in self._machine_cards:
-            img_data = reply.readAll()
-            pixmap = save_to_cache(url, img_data) if url else None
-            if not pixmap:
-                pixmap = QPixmap()
-                pixmap.loadFromData(img_data)
-            if pixmap and not pixmap.isNull():
-                self._machine_cards[machine_id].set_avatar_pixmap(pixmap)
-        reply.deleteLater()
-    
-    @Slot(QNetworkReply)
-    def _on_leaderboard_avatar_loaded(self, reply: QNetworkReply):
-        if reply.error() != QNetworkReply.NoError:
-            reply.deleteLater()
-            return
-        row = reply.property("row")
-        col = reply.property("col")
-        url = reply.property("url")
-        if row is not None and col is not None and row < self.table.rowCount():
-            item = self.table.item(row, col)
-            if item:
-                img_data = reply.readAll()
-                pixmap = save_to_cache(url, img_data) if url else None
-                if not pixmap:
-                    pixmap = QPixmap()
-                    pixmap.loadFromData(img_data)
-                if pixmap and not pixmap.isNull():
-                    size = 28
-                    rounded = QPixmap(size, size)
-                    rounded.fill(Qt.transparent)
-                    painter = QPainter(rounded)
-                    painter.setRenderHint(QPainter.Antialiasing)
-                    path = QPainterPath()
-                    path.addEllipse(0, 0, size, size)
-                    painter.setClipPath(path)
-                    painter.drawPixmap(0, 0, size, size, pixmap.scaled(size, size, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation))
-                    painter.end()
-                    item.setIcon(QIcon(rounded))
-        reply.deleteLater()
+    def _set_leaderboard_avatar(self, row: int, url: str, pixmap: QPixmap):
+        """Icono redondo del jugador (si la fila sigue siendo la misma)."""
+        item = self.table.item(row, 1) if row < self.table.rowCount() else None
+        if item and item.data(Qt.UserRole) == url:
+            item.setIcon(QIcon(pixmap))
 
     @Slot(str)
     def _on_error(self, error: str):
@@ -4,7 +4,7 @@ from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
     QLineEdit, QFrame, QCheckBox, QMessageBox, QSizePolicy
 )
-from PySide6.QtCore import Qt, Signal
+from PySide6.QtCore import Qt, Signal, Slot, QThread, QObject
 
 from config import config
 from api.endpoints import HTBApi
@@ -12,11 +12,24 @@ from ui.styles import HTB_GREEN, HTB_BG_CARD, HTB_TEXT_DIM, BTN_PRIMARY, BTN_DEF
 from utils.debug import debug_log
 
 
+class ConnectionTestWorker(QObject):
+    finished = Signal(bool, object)
+    
+    def run(self):
+        try:
+            success, result = HTBApi.get_user_info(bypass_cache=True)
+            self.finished.emit(success, result)
+        except Exception as e:
+            self.finished.emit(False, str(e))
+
+
 class SettingsPage(QWidget):
     token_changed = Signal()
     
     def __init__(self, parent=None):
         super().__init__(parent)
+        self._test_thread = None
+        self._test_worker = None
         self._setup_ui()
     
     def _setup_ui(self):
@@ -162,10 +175,20 @@ class SettingsPage(QWidget):
     def _test_connection(self):
         self.status_label.setText("Testing connection...")
         self.status_label.setStyleSheet(f"color: {HTB_TEXT_DIM}; font-size: 13px;")
+        if self._test_thread:
+            return
         
-        success, result = HTBApi.get_user_info()
-        
-        if success:
+        self._test_thread = QThread()
+        self._test_worker = ConnectionTestWorker()
+        self._test_worker.moveToThread(self._test_thread)
+        self._test_thread.started.connect(self._test_worker.run)
+        self._test_worker.finished.connect(self._on_test_finished)
+        self._test_thread.start()
+    
+    @Slot(bool, object)
+    def _on_test_finished(self, success: bool, result):
+        self.stop_background_tasks()
+        if success and isinstance(result, dict):
             name = result.get("info", {}).get("name", "Unknown")
             self.status_label.setText(f"✓ Connected as: {name}")
             self.status_label.setStyleSheet(f"color: {HTB_GREEN}; font-size: 13px;")
@@ -173,6 +196,16 @@ class SettingsPage(QWidget):
             self.status_label.setText(f"✗ Connection failed: {result}")
             self.status_label.setStyleSheet("color: #fc4747; font-size: 13px;")
     
+    def stop_background_tasks(self):
+        if self._test_thread:
+            if self._test_thread.isRunning():
+                self._test_thread.quit()
+                if not self._test_thread.wait(3000):
+                    self._test_thread.terminate()
+                    self._test_thread.wait(500)
+            self._test_thread = None
+            self._test_worker = None
+    
     def _toggle_debug(self, enabled: bool):
         config.debug = enabled
         debug_log("SETTINGS", f"Debug mode: {enabled}")
@@ -7,27 +7,66 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt, Signal, Slot, QThread, QObject
 
 from api.endpoints import HTBApi
+from api.planner import DataPlan, Fetch, planner
 from models.connection import Connection
 from ui.styles import HTB_GREEN, HTB_BG_CARD, HTB_TEXT_DIM, BTN_PRIMARY, BTN_DEFAULT
 from utils.debug import debug_log
 
 
+VPN_PLAN = DataPlan("vpn", [
+    Fetch("connection", HTBApi.get_connection_status, parse=Connection.from_status),
+    Fetch("servers", HTBApi.get_vpn_servers, args=("competitive",), ttl=60),
+])
+
+
 class VPNWorker(QObject):
     finished = Signal(dict)
     error = Signal(str)
     
+    def __init__(self, force: bool = False):
+        super().__init__()
+        self.force = force
+    
     def run(self):
-        data = {}
         try:
-            success, result = HTBApi.get_connection_status()
-            if success and isinstance(result, list) and len(result) > 0:
-                data["connection"] = Connection.from_api(result[0])
-            
-            success, result = HTBApi.get_vpn_servers("competitive")
-            if success:
-                data["servers"] = result
+            self.finished.emit(planner.execute(VPN_PLAN, force=self.force))
+        except Exception as e:
+            self.error.emit(str(e))
+
+
+class VPNDownloadWorker(QObject):
+    """Cambia de servidor y descarga el .ovpn fuera del hilo de la GUI."""
+    finished = Signal(bytes)
+    error = Signal(str)
+    
+    def __init__(self, server_id: int, tcp: int):
+        super().__init__()
+        self.server_id = server_id
+        self.tcp = tcp
+    
+    def run(self):
+        try:
+            # IMPORTANT: Switch to the server BEFORE downloading the VPN file
+            # Without this, the machine will be on a different IP and unreachable,
+            # and flags will be considered invalid
+            switch_success, switch_result = HTBApi.switch_server(self.server_id)
+            if not switch_success:
+                self.error.emit(
+                    f"Failed to switch to server: {switch_result}\n\n"
+                    "The VPN file will not work correctly without switching servers first."
+                )
+                return
             
-            self.finished.emit(data)
+            success, result = HTBApi.download_vpn_file(self.server_id, 0, self.tcp)
+            if not success:
+                self.error.emit(str(result))
+            elif not isinstance(result, bytes) or len(result) < 100:
+                self.error.emit("Respuesta inválida del servidor (¿rate limit?). Intenta de nuevo.")
+            elif result.lstrip()[:1] == b"<":
+                # No guardar HTML (ej. página de error 429)
+                self.error.emit("El servidor devolvió una página de error. Espera unos segundos (rate limit) e intenta de nuevo.")
+            else:
+                self.finished.emit(result)
         except Exception as e:
             self.error.emit(str(e))
 
@@ -40,6 +79,8 @@ class VPNPage(QWidget):
         self._worker = None
         self._loading = False
         self._loaded = False
+        self._download_thread = None
+        self._download_worker = None
         self._setup_ui()
     
     def _setup_ui(self):
@@ -145,10 +186,10 @@ class VPNPage(QWidget):
         dl_layout.addLayout(row2)
         
         # Download button
-        dl_btn = QPushButton("⬇ Download .ovpn File")
-        dl_btn.setStyleSheet(BTN_PRIMARY)
-        dl_btn.clicked.connect(self._download)
-        dl_layout.addWidget(dl_btn, alignment=Qt.AlignLeft)
+        self.dl_btn = QPushButton("⬇ Download .ovpn File")
+        self.dl_btn.setStyleSheet(BTN_PRIMARY)
+        self.dl_btn.clicked.connect(self._download)
+        dl_layout.addWidget(self.dl_btn, alignment=Qt.AlignLeft)
         
         layout.addWidget(dl_frame)
         
@@ -162,16 +203,16 @@ class VPNPage(QWidget):
     
     def _force_reload(self):
         self._loaded = False
-        self.load_data()
+        self.load_data(force=True)
     
-    def load_data(self):
+    def load_data(self, force: bool = False):
         if self._loading:
             return
         self._loading = True
         self._cleanup_thread()
         
         self._thread = QThread()
-        self._worker = VPNWorker()
+        self._worker = VPNWorker(force)
         self._worker.moveToThread(self._thread)
         self._thread.started.connect(self._worker.run)
         self._worker.finished.connect(self._on_loaded)
@@ -192,6 +233,17 @@ class VPNPage(QWidget):
         """Llamado al cerrar la app para evitar QThread destroyed while running."""
         self._loading = False
         self._cleanup_thread()
+        self._cleanup_download_thread()
+    
+    def _cleanup_download_thread(self):
+        if self._download_thread:
+            if self._download_thread.isRunning():
+                self._download_thread.quit()
+                if not self._download_thread.wait(3000):
+                    self._download_thread.terminate()
+                    self._download_thread.wait(500)
+            self._download_thread = None
+            self._download_worker = None
     
     @Slot(dict)
     def _on_loaded(self, data: dict):
@@ -236,32 +288,28 @@ class VPNPage(QWidget):
         if not server_id:
             QMessageBox.warning(self, "Error", "Please select a server first")
             return
-        
-        # IMPORTANT: Switch to the server BEFORE downloading the VPN file
-        # Without this, the machine will be on a different IP and unreachable,
-        # and flags will be considered invalid
-        switch_success, switch_result = HTBApi.switch_server(server_id)
-        if not switch_success:
-            QMessageBox.warning(
-                self, "Error", 
-                f"Failed to switch to server: {switch_result}\n\n"
-                "The VPN file will not work correctly without switching servers first."
-            )
+        if self._download_thread:
             return
         
         tcp = 1 if self.proto_combo.currentText() == "TCP" else 0
-        success, result = HTBApi.download_vpn_file(server_id, 0, tcp)
-        
-        if not success:
-            QMessageBox.warning(self, "Error", str(result))
-            return
-        if not isinstance(result, bytes) or len(result) < 100:
-            QMessageBox.warning(self, "Error", "Respuesta inválida del servidor (¿rate limit?). Intenta de nuevo.")
-            return
-        # No guardar HTML (ej. página de error 429)
-        if result.lstrip()[:1] == b"<":
-            QMessageBox.warning(self, "Error", "El servidor devolvió una página de error. Espera unos segundos (rate limit) e intenta de nuevo.")
-            return
+        self.dl_btn.setEnabled(False)
+        self.dl_btn.setText("⏳ Downloading...")
+        self._download_thread = QThread()
+        self._download_worker = VPNDownloadWorker(server_id, tcp)
+        self._download_worker.moveToThread(self._download_thread)
+        self._download_thread.started.connect(self._download_worker.run)
+        self._download_worker.finished.connect(self._on_downloaded)
+        self._download_worker.error.connect(self._on_download_error)
+        self._download_thread.start()
+    
+    def _reset_download_button(self):
+        self._cleanup_download_thread()
+        self.dl_btn.setEnabled(True)
+        self.dl_btn.setText("⬇ Download .ovpn File")
+    
+    @Slot(bytes)
+    def _on_downloaded(self, content: bytes):
+        self._reset_download_button()
         filename, _ = QFileDialog.getSaveFileName(
             self, "Save VPN Configuration",
             "htb_vpn.ovpn",
@@ -269,9 +317,14 @@ class VPNPage(QWidget):
         )
         if filename:
             with open(filename, 'wb') as f:
-                f.write(result)
+                f.write(content)
             QMessageBox.information(self, "Success", f"Configuration saved to:\n{filename}")
     
+    @Slot(str)
+    def _on_download_error(self, error: str):
+        self._reset_download_button()
+        QMessageBox.warning(self, "Error", error)
+    
     def showEvent(self, event):
         super().showEvent(event)
         if not self._loaded and not self._loading:
@@ -0,0 +1,230 @@
+"""
+Idle-time avatar prefetch.
+
+Once nothing happened in the foreground for PREFETCH_IDLE_SECONDS and the
+API rate limiter has spare budget, walks the current season's machines and
+the machine catalog and warms the image cache with their avatars at the
+card size, so the first visit to Machines or Seasons paints them at once.
+
+Foreground work (a page change or any avatar a page asks for) pauses it
+immediately: in-flight prefetch downloads nobody else waits for are
+aborted and requeued. Downloaded bytes count against PREFETCH_DAILY_BYTES.
+"""
+
+import json
+from datetime import date
+from typing import List, Optional
+
+import shiboken6
+from PySide6.QtCore import QObject, QThread, QTimer, Signal, Slot
+
+from api.endpoints import HTBApi
+from api.planner import planner
+from config import PREFETCH_DAILY_BYTES, PREFETCH_IDLE_SECONDS, PREFETCH_STATE_FILE
+from ui.pages.machines import MACHINES_PLAN
+from ui.pages.seasons import SEASONS_PLAN
+from ui.widgets.machine_card import AVATAR_STYLE
+from utils.debug import debug_log
+from utils.image_fetcher import image_fetcher, PRIORITY_PREFETCH
+
+# Prefetch downloads in flight at once (the fetcher allows more for pages)
+PREFETCH_CONCURRENCY = 2
+
+# Cache lookups per step, so a long run of cached avatars doesn't stall the UI
+PREFETCH_LOOKUPS_PER_STEP = 16
+
+
+class PrefetchListWorker(QObject):
+    """Collects avatar URLs from the (usually cached) seasons and machines plans."""
+    finished = Signal(list)
+    error = Signal(str)
+
+    def run(self):
+        try:
+            urls: List[str] = []
+            seasons = planner.execute(SEASONS_PLAN, season_id=None)
+            urls += [m.avatar for m in seasons.get("machines") or []]
+            catalog = planner.execute(MACHINES_PLAN)
+            urls += [m.avatar for m in catalog.get("machines") or []]
+            self.finished.emit(list(dict.fromkeys(u for u in urls if u)))
+        except Exception as e:
+            self.error.emit(str(e))
+
+
+class AvatarPrefetcher(QObject):
+    """Warms the avatar cache while the UI is idle (GUI thread only)."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._queue: List[str] = []
+        self._inflight: List[str] = []
+        self._listed = False
+        self._running = False
+        self._token: Optional[QObject] = None
+        self._thread = None
+        self._worker = None
+        self._day, self._spent = self._load_state()
+
+        self._idle_timer = QTimer(self)
+        self._idle_timer.setSingleShot(True)
+        self._idle_timer.setInterval(int(PREFETCH_IDLE_SECONDS * 1000))
+        self._idle_timer.timeout.connect(self._resume)
+        self._step_timer = QTimer(self)
+        self._step_timer.setSingleShot(True)
+        self._step_timer.timeout.connect(self._step)
+
+        fetcher = image_fetcher()
+        fetcher.requested.connect(self._on_requested)
+        fetcher.downloaded.connect(self._on_downloaded)
+        if PREFETCH_IDLE_SECONDS > 0:
+            self._idle_timer.start()
+
+    # ---- daily budget ----
+
+    @staticmethod
+    def _load_state():
+        today = date.today().isoformat()
+        try:
+            state = json.loads(PREFETCH_STATE_FILE.read_text())
+            if state.get("day") == today:
+                return today, int(state.get("bytes", 0))
+        except (OSError, ValueError, TypeError, AttributeError):
+            pass
+        return today, 0
+
+    def _save_state(self):
+        try:
+            PREFETCH_STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            PREFETCH_STATE_FILE.write_text(json.dumps({"day": self._day, "bytes": self._spent}))
+        except OSError:
+            pass
+
+    def _budget_left(self) -> int:
+        today = date.today().isoformat()
+        if today != self._day:
+            self._day, self._spent = today, 0
+        return PREFETCH_DAILY_BYTES - self._spent
+
+    # ---- idle / foreground ----
+
+    def pause(self):
+        """Foreground work started: stop now and wait for the UI to be idle again."""
+        self._halt()
+        if PREFETCH_IDLE_SECONDS > 0:
+            self._idle_timer.start()
+
+    def _halt(self):
+        if self._running:
+            debug_log("PREFETCH", f"Paused ({len(self._queue) + len(self._inflight)} left)")
+            self._running = False
+            self._step_timer.stop()
+            # Requeue what was in flight; deleting the token aborts those downloads
+            self._queue[:0] = self._inflight
+            self._inflight.clear()
+            token, self._token = self._token, None
+            if token is not None:
+                shiboken6.delete(token)
+            self._save_state()
+
+    @Slot(str, int)
+    def _on_requested(self, url: str, priority: int):
+        if priority > PRIORITY_PREFETCH:
+            self.pause()
+
+    @Slot()
+    def _resume(self):
+        if self._running or self._thread is not None:
+            return
+        if self._budget_left() <= 0:
+            debug_log("PREFETCH", "Daily budget used up")
+            return
+        budget = HTBApi.rate_budget()
+        if budget.low or budget.tokens < budget.capacity / 2:
+            self._idle_timer.start()
+            return
+        if not self._listed:
+            self._start_listing()
+            return
+        if not self._queue:
+            return
+        debug_log("PREFETCH", f"Resuming ({len(self._queue)} avatars)")
+        self._running = True
+        self._token = QObject()
+        self._step_timer.start(0)
+
+    def _start_listing(self):
+        self._thread = QThread()
+        self._worker = PrefetchListWorker()
+        self._worker.moveToThread(self._thread)
+        self._thread.started.connect(self._worker.run)
+        self._worker.finished.connect(self._on_listed)
+        self._worker.error.connect(self._on_list_error)
+        self._thread.start()
+
+    def _cleanup_thread(self):
+        if self._thread:
+            if self._thread.isRunning():
+                self._thread.quit()
+                if not self._thread.wait(3000):
+                    self._thread.terminate()
+                    self._thread.wait(500)
+            self._thread = None
+            self._worker = None
+
+    @Slot(list)
+    def _on_listed(self, urls: list):
+        self._cleanup_thread()
+        self._listed = True
+        self._queue = urls
+        debug_log("PREFETCH", f"{len(urls)} avatars to warm")
+        # Foreground work may have started while listing
+        if not self._idle_timer.isActive():
+            self._resume()
+
+    @Slot(str)
+    def _on_list_error(self, error: str):
+        self._cleanup_thread()
+        debug_log("PREFETCH", f"Listing failed: {error}")
+
+    # ---- prefetching ----
+
+    @Slot()
+    def _step(self):
+        lookups = 0
+        fetcher = image_fetcher()
+        while (self._running and self._queue and lookups < PREFETCH_LOOKUPS_PER_STEP
+               and len(self._inflight) < PREFETCH_CONCURRENCY):
+            url = self._queue.pop(0)
+            lookups += 1
+            if not fetcher.fetch(url, AVATAR_STYLE, _discard, self._token, PRIORITY_PREFETCH):
+                self._inflight.append(url)
+        if not self._running:
+            return
+        if self._queue and len(self._inflight) < PREFETCH_CONCURRENCY:
+            self._step_timer.start(0)
+        elif not self._queue and not self._inflight:
+            debug_log("PREFETCH", f"Done ({self._spent // 1024} KB today)")
+            self._running = False
+            self._save_state()
+
+    @Slot(str, int)
+    def _on_downloaded(self, url: str, size: int):
+        if url not in self._inflight:
+            return
+        self._inflight.remove(url)
+        self._spent += size
+        if self._budget_left() <= 0:
+            debug_log("PREFETCH", "Daily budget used up, stopping")
+            self._queue.clear()
+        if self._running and not self._step_timer.isActive():
+            self._step_timer.start(0)
+
+    def stop_background_tasks(self):
+        """Llamado al cerrar la app."""
+        self._idle_timer.stop()
+        self._halt()
+        self._cleanup_thread()
+
+
+def _discard(pixmap):
+    """Prefetched avatars only need to land in the cache."""
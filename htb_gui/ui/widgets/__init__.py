@@ -1,4 +1,5 @@
 """Custom widgets for HTB Client."""
 from .machine_card import MachineCard
+from .machine_grid import MachineGridView, MachineListModel, MachineFilterProxy
 from .loading import LoadingSpinner
 from .status_badge import StatusBadge
@@ -2,9 +2,13 @@
 
 from PySide6.QtWidgets import QFrame, QHBoxLayout, QLabel, QSizePolicy
 from PySide6.QtCore import Qt
-from PySide6.QtGui import QPixmap, QIcon, QPainter, QPainterPath
+from PySide6.QtGui import QPixmap, QIcon
 
 from ui.styles import HTB_TEXT_DIM, HTB_TEXT_MUTED
+from utils.avatars import AvatarStyle, CIRCLE
+
+# Avatar: círculo de 36px
+AVATAR_STYLE = AvatarStyle(36, shape=CIRCLE)
 
 
 class ActivityItem(QFrame):
@@ -55,17 +59,8 @@ class ActivityItem(QFrame):
         self._avatar_url = avatar_url
 
     def set_avatar_pixmap(self, pixmap: QPixmap):
+        """Avatar ya renderizado en círculo (ver utils/avatars.py, AVATAR_STYLE)."""
         if pixmap.isNull():
             return
-        scaled = pixmap.scaled(36, 36, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
-        rounded = QPixmap(36, 36)
-        rounded.fill(Qt.transparent)
-        painter = QPainter(rounded)
-        painter.setRenderHint(QPainter.Antialiasing)
-        path = QPainterPath()
-        path.addEllipse(0, 0, 36, 36)
-        painter.setClipPath(path)
-        painter.drawPixmap(0, 0, 36, 36, scaled)
-        painter.end()
-        self.avatar_label.setPixmap(rounded)
+        self.avatar_label.setPixmap(pixmap)
         self.avatar_label.setStyleSheet("border-radius: 18px;")
@@ -2,10 +2,14 @@
 
 from PySide6.QtWidgets import QFrame, QVBoxLayout, QHBoxLayout, QLabel, QSizePolicy
 from PySide6.QtCore import Qt, Signal
-from PySide6.QtGui import QPixmap, QPainter, QPainterPath
+from PySide6.QtGui import QPixmap
 
 from models.machine import Machine
 from ui.styles import HTB_GREEN, HTB_BG_CARD, HTB_BG_HOVER, HTB_TEXT_DIM, DIFF_EASY, DIFF_MEDIUM, DIFF_HARD, DIFF_INSANE
+from utils.avatars import AvatarStyle
+
+# Avatar: 40px con esquinas redondeadas
+AVATAR_STYLE = AvatarStyle(40, radius=8, packed=True)
 
 
 class MachineCard(QFrame):
@@ -77,21 +81,10 @@ class MachineCard(QFrame):
             layout.addWidget(owned)
     
     def set_avatar_pixmap(self, pixmap: QPixmap):
-        """Setear el avatar de la máquina desde un pixmap cargado externamente."""
+        """Setear el avatar ya renderizado (ver utils/avatars.py, AVATAR_STYLE)."""
         if pixmap.isNull():
             return
-        # Escalar y redondear esquinas
-        scaled = pixmap.scaled(40, 40, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
-        rounded = QPixmap(40, 40)
-        rounded.fill(Qt.transparent)
-        painter = QPainter(rounded)
-        painter.setRenderHint(QPainter.Antialiasing)
-        path = QPainterPath()
-        path.addRoundedRect(0, 0, 40, 40, 8, 8)
-        painter.setClipPath(path)
-        painter.drawPixmap(0, 0, 40, 40, scaled)
-        painter.end()
-        self.avatar_label.setPixmap(rounded)
+        self.avatar_label.setPixmap(pixmap)
         self.avatar_label.setStyleSheet("border-radius: 8px; background: transparent; border: none;")
     
     def enterEvent(self, event):
@@ -0,0 +1,456 @@
+"""
+Machine Grid - model/view version of the machines page grid.
+
+The catalog lives in a QAbstractListModel, filtering is a proxy model
+reset and cards are painted by a delegate, so only the cards on
+screen cost anything: no widgets per machine, no stylesheets to parse
+on every keystroke or resize. Looks like MachineCard (same colors,
+sizes and avatar style).
+
+The search box goes through a SearchIndex over name, creator, labels,
+OS and difficulty; matches are shown best first.
+"""
+
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from PySide6.QtCore import (
+    QAbstractListModel, QAbstractProxyModel, QModelIndex, QPoint, QRect, QRectF,
+    QObject, QSize, Qt, QTimer, Signal,
+)
+from PySide6.QtGui import QColor, QFont, QFontMetrics, QPainter, QPen, QPixmap
+from PySide6.QtWidgets import QAbstractItemView, QListView, QStyle, QStyledItemDelegate
+
+from models.machine import Machine
+from ui.styles import (
+    HTB_GREEN, HTB_BG_CARD, HTB_BG_HOVER, HTB_TEXT_DIM,
+    DIFF_EASY, DIFF_MEDIUM, DIFF_HARD, DIFF_INSANE,
+)
+from ui.widgets.machine_card import AVATAR_STYLE
+from utils.image_fetcher import image_fetcher, PRIORITY_NORMAL, PRIORITY_VISIBLE
+from utils.search_index import SearchIndex
+
+MachineRole = Qt.UserRole + 1
+
+# Tarjeta: ancho mínimo, alto fijo y separación (como MachineCard en el grid)
+CARD_MIN_WIDTH = 200
+CARD_HEIGHT = 150
+CARD_SPACING = 14
+CARD_PADDING_X = 18
+CARD_PADDING_Y = 16
+
+_DIFF_COLORS = {"easy": DIFF_EASY, "medium": DIFF_MEDIUM, "hard": DIFF_HARD, "insane": DIFF_INSANE}
+
+_LEFT = Qt.AlignLeft | Qt.AlignVCenter
+_RIGHT = Qt.AlignRight | Qt.AlignVCenter
+_BOTTOM_LEFT = Qt.AlignLeft | Qt.AlignBottom
+
+# Peso de cada campo en la búsqueda (el nombre manda)
+SEARCH_WEIGHTS = {"name": 3.0, "creator": 1.5, "labels": 1.2, "os": 1.0, "difficulty": 1.0}
+
+
+def machine_search_fields(m: Machine) -> List[Tuple[str, float]]:
+    """(text, weight) fields of a machine for the SearchIndex."""
+    labels = " ".join(l.get("name", "") if isinstance(l, dict) else str(l) for l in m.labels or [])
+    return [
+        (m.name, SEARCH_WEIGHTS["name"]),
+        (m.creator.name if m.creator else "", SEARCH_WEIGHTS["creator"]),
+        (labels, SEARCH_WEIGHTS["labels"]),
+        (m.os, SEARCH_WEIGHTS["os"]),
+        (m.difficulty_text, SEARCH_WEIGHTS["difficulty"]),
+    ]
+
+
+class MachineListModel(QAbstractListModel):
+    """
+    The machine catalog. Avatars are requested the first time a card asks
+    for its DecorationRole (i.e. when it is painted) and kept here.
+
+    search_index is kept in sync by whoever loads the catalog (see
+    sync_search_index), usually from a worker thread.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._machines: List[Machine] = []
+        self._ids: List[int] = []
+        self._rows_by_url: Dict[str, List[int]] = {}
+        self._avatars: Dict[str, QPixmap] = {}
+        self._requested: Set[str] = set()
+        self._in_data = False
+        self.search_index = SearchIndex()
+
+    @property
+    def machines(self) -> List[Machine]:
+        return self._machines
+
+    @property
+    def ids(self) -> List[int]:
+        """Machine ids, by row (the SearchIndex keys)."""
+        return self._ids
+
+    def set_machines(self, machines: List[Machine]):
+        self.beginResetModel()
+        self._machines = list(machines)
+        self._ids = [m.id for m in self._machines]
+        self._rows_by_url = {}
+        for row, m in enumerate(self._machines):
+            if m.avatar:
+                self._rows_by_url.setdefault(m.avatar, []).append(row)
+        # Retry avatars whose download failed
+        self._requested = set(self._avatars)
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._machines)
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._machines):
+            return None
+        machine = self._machines[index.row()]
+        if role == MachineRole:
+            return machine
+        if role == Qt.DisplayRole:
+            return machine.name
+        if role == Qt.DecorationRole:
+            return self._avatar(machine.avatar)
+        return None
+
+    def _avatar(self, url: str) -> Optional[QPixmap]:
+        if not url:
+            return None
+        pixmap = self._avatars.get(url)
+        if pixmap is None and url not in self._requested:
+            self._requested.add(url)
+            # A memory cache hit is delivered right away, during this call
+            self._in_data = True
+            try:
+                image_fetcher().fetch(url, AVATAR_STYLE,
+                                      lambda p, u=url: self._on_avatar(u, p),
+                                      self, PRIORITY_NORMAL)
+            finally:
+                self._in_data = False
+            pixmap = self._avatars.get(url)
+        return pixmap
+
+    def _on_avatar(self, url: str, pixmap: QPixmap):
+        if pixmap.isNull():
+            return
+        self._avatars[url] = pixmap
+        if self._in_data:
+            return
+        for row in self._rows_by_url.get(url, ()):
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+
+def sync_search_index(index: SearchIndex, machines: List[Machine],
+                      should_stop: Optional[Callable[[], bool]] = None) -> bool:
+    """
+    Update index to this catalog (only changed machines are re-indexed).
+    Returns False if should_stop interrupted it half-way.
+    """
+    return (index.sync({m.id: machine_search_fields(m) for m in machines}, should_stop)
+            and index.warm(should_stop=should_stop))
+
+
+class MachineFilterProxy(QAbstractProxyModel):
+    """
+    Search / OS / difficulty / status filters of the machines page, over a
+    flat MachineListModel. The visible rows are computed in one pass per
+    change (search results best first, catalog order otherwise) and the
+    proxy is reset; Qt doesn't call back into Python per row.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._query = ""
+        self._os = "All OS"
+        self._difficulty = "All Difficulty"
+        self._status = "All Machines"
+        self._rows: List[int] = []
+        self._positions: Dict[int, int] = {}
+
+    def setSourceModel(self, model: MachineListModel):
+        self.beginResetModel()
+        super().setSourceModel(model)
+        model.modelAboutToBeReset.connect(self.beginResetModel)
+        model.modelReset.connect(self._on_source_reset)
+        model.dataChanged.connect(self._on_source_changed)
+        self._rows = self._filtered_rows()
+        self._positions = {row: pos for pos, row in enumerate(self._rows)}
+        self.endResetModel()
+
+    def set_filters(self, query: str, os_name: str, difficulty: str, status: str):
+        self._query = query.strip()
+        self._os = os_name
+        self._difficulty = difficulty
+        self._status = status
+        rows = self._filtered_rows()
+        if rows != self._rows:
+            self.beginResetModel()
+            self._rows = rows
+            self._positions = {row: pos for pos, row in enumerate(rows)}
+            self.endResetModel()
+
+    def _accepts(self, m: Machine) -> bool:
+        if self._os != "All OS" and m.os != self._os:
+            return False
+        if self._difficulty != "All Difficulty" and m.difficulty_text != self._difficulty:
+            return False
+        if self._status == "Free Only" and not m.free:
+            return False
+        if self._status == "Owned" and not m.auth_user_in_root_owns:
+            return False
+        return True
+
+    def _filtered_rows(self) -> List[int]:
+        model = self.sourceModel()
+        if model is None:
+            return []
+        machines = model.machines
+        if self._query:
+            scores = model.search_index.search(self._query)
+            row_scores = list(map(scores.get, model.ids))
+            rows = [row for row, score in enumerate(row_scores) if score is not None]
+        else:
+            rows = list(range(len(machines)))
+        if (self._os, self._difficulty, self._status) != ("All OS", "All Difficulty", "All Machines"):
+            rows = [row for row in rows if self._accepts(machines[row])]
+        if self._query:
+            # Best first; the sort is stable (also reversed), equal scores keep the catalog order
+            rows.sort(key=row_scores.__getitem__, reverse=True)
+        return rows
+
+    def _on_source_reset(self):
+        self._rows = self._filtered_rows()
+        self._positions = {row: pos for pos, row in enumerate(self._rows)}
+        self.endResetModel()
+
+    def _on_source_changed(self, top: QModelIndex, bottom: QModelIndex, roles=()):
+        for row in range(top.row(), bottom.row() + 1):
+            pos = self._positions.get(row)
+            if pos is not None:
+                index = self.index(pos, 0)
+                self.dataChanged.emit(index, index, roles)
+
+    # ---- QAbstractProxyModel ----
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else 1
+
+    def index(self, row: int, column: int = 0, parent=QModelIndex()) -> QModelIndex:
+        if parent.isValid() or column != 0 or not 0 <= row < len(self._rows):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index: Optional[QModelIndex] = None):
+        if index is None:
+            return QObject.parent(self)  # QObject::parent()
+        return QModelIndex()
+
+    def mapToSource(self, proxy_index: QModelIndex) -> QModelIndex:
+        if not proxy_index.isValid() or proxy_index.row() >= len(self._rows):
+            return QModelIndex()
+        return self.sourceModel().index(self._rows[proxy_index.row()], 0)
+
+    def mapFromSource(self, source_index: QModelIndex) -> QModelIndex:
+        pos = self._positions.get(source_index.row()) if source_index.isValid() else None
+        return QModelIndex() if pos is None else self.index(pos, 0)
+
+
+class MachineCardDelegate(QStyledItemDelegate):
+    """
+    Paints a machine card (hover: green border). The antialiased card
+    background and the avatar placeholder are rendered once per size and
+    blitted, text and avatar are drawn on top.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.card_size = QSize(CARD_MIN_WIDTH, CARD_HEIGHT)
+        self._fonts: Optional[dict] = None
+        self._bg = QColor(HTB_BG_CARD)
+        self._bg_hover = QColor(HTB_BG_HOVER)
+        self._border = QColor(255, 255, 255, 15)
+        self._green = QColor(HTB_GREEN)
+        self._dim = QColor(HTB_TEXT_DIM)
+        self._placeholder = QColor("#1a2638")
+        self._diff_colors = {k: QColor(v) for k, v in _DIFF_COLORS.items()}
+        self._backgrounds: Dict[tuple, QPixmap] = {}
+
+    def _font(self, base: QFont, px: int, weight: QFont.Weight, spacing: float = 0.0) -> QFont:
+        font = QFont(base)
+        font.setPixelSize(px)
+        font.setWeight(weight)
+        if spacing:
+            font.setLetterSpacing(QFont.AbsoluteSpacing, spacing)
+        return font
+
+    def _setup_fonts(self, base: QFont) -> dict:
+        if self._fonts is None:
+            self._fonts = {
+                "os": self._font(base, 24, QFont.Normal),
+                "difficulty": self._font(base, 11, QFont.Bold, 0.5),
+                "name": self._font(base, 17, QFont.DemiBold),
+                "meta": self._font(base, 12, QFont.Normal),
+                "owned": self._font(base, 12, QFont.DemiBold),
+            }
+        return self._fonts
+
+    def _background(self, size: QSize, hover: bool, dpr: float) -> QPixmap:
+        key = (size.width(), size.height(), hover, dpr)
+        pixmap = self._backgrounds.get(key)
+        if pixmap is None:
+            if len(self._backgrounds) > 8:
+                self._backgrounds.clear()  # old sizes after resizing
+            pixmap = QPixmap(round(size.width() * dpr), round(size.height() * dpr))
+            pixmap.setDevicePixelRatio(dpr)
+            pixmap.fill(Qt.transparent)
+            painter = QPainter(pixmap)
+            painter.setRenderHint(QPainter.Antialiasing)
+            painter.setPen(QPen(self._green if hover else self._border, 1))
+            painter.setBrush(self._bg_hover if hover else self._bg)
+            painter.drawRoundedRect(QRectF(0.5, 0.5, size.width() - 1, size.height() - 1), 14, 14)
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(self._placeholder)
+            painter.drawRoundedRect(QRectF(CARD_PADDING_X, CARD_PADDING_Y, AVATAR_STYLE.size,
+                                           AVATAR_STYLE.size),
+                                    AVATAR_STYLE.radius, AVATAR_STYLE.radius)
+            painter.end()
+            self._backgrounds[key] = pixmap
+        return pixmap
+
+    def sizeHint(self, option, index) -> QSize:
+        return self.card_size
+
+    def paint(self, painter: QPainter, option, index: QModelIndex):
+        machine: Machine = index.data(MachineRole)
+        if machine is None:
+            return
+        fonts = self._setup_fonts(option.font)
+        hover = bool(option.state & QStyle.State_MouseOver)
+        rect = QRect(option.rect.topLeft(), self.card_size)
+
+        painter.save()
+        # Background and avatar placeholder
+        painter.drawPixmap(rect.topLeft(), self._background(self.card_size, hover,
+                                                            painter.device().devicePixelRatioF()))
+
+        inner = rect.adjusted(CARD_PADDING_X, CARD_PADDING_Y, -CARD_PADDING_X, -CARD_PADDING_Y)
+        size = AVATAR_STYLE.size
+
+        # Top row: avatar + OS icon + difficulty
+        avatar_rect = QRect(inner.left(), inner.top(), size, size)
+        pixmap = index.data(Qt.DecorationRole)
+        if pixmap is not None:
+            painter.drawPixmap(avatar_rect, pixmap)
+
+        top_row = QRect(avatar_rect.right() + 10, inner.top(), inner.right() - avatar_rect.right() - 10, size)
+        painter.setFont(fonts["os"])
+        painter.setPen(option.palette.text().color())
+        painter.drawText(top_row, _LEFT, machine.os_icon)
+        painter.setFont(fonts["difficulty"])
+        painter.setPen(self._diff_colors.get(machine.difficulty_text.lower(), self._dim))
+        painter.drawText(top_row, _RIGHT, machine.difficulty_text)
+
+        # Name, meta and owned badge
+        y = avatar_rect.bottom() + 9
+        painter.setFont(fonts["name"])
+        painter.setPen(option.palette.text().color())
+        metrics = QFontMetrics(fonts["name"])
+        name = metrics.elidedText(machine.name, Qt.ElideRight, inner.width())
+        painter.drawText(QRect(inner.left(), y, inner.width(), metrics.height()), _LEFT, name)
+        y += metrics.height() + 6
+        painter.setFont(fonts["meta"])
+        painter.setPen(self._dim)
+        meta_height = QFontMetrics(fonts["meta"]).height()
+        painter.drawText(QRect(inner.left(), y, inner.width(), meta_height), _LEFT,
+                         f"⭐ {machine.rating:.1f}  ·  {machine.user_owns_count:,} owns")
+        if machine.auth_user_in_root_owns:
+            painter.setFont(fonts["owned"])
+            painter.setPen(self._green)
+            painter.drawText(inner, _BOTTOM_LEFT, "✓ Owned")
+        painter.restore()
+
+
+class MachineGridView(QListView):
+    """
+    Wrapping list of painted machine cards. Columns adapt to the width
+    (cards at least CARD_MIN_WIDTH wide); avatars of the cards on screen
+    are moved to the front of the download queue after scrolling.
+    """
+    machine_clicked = Signal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setViewMode(QListView.ListMode)
+        self.setFlow(QListView.LeftToRight)
+        self.setWrapping(True)
+        self.setResizeMode(QListView.Adjust)
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.Batched)
+        self.setBatchSize(200)
+        self.setMovement(QListView.Static)
+        self.setSelectionMode(QAbstractItemView.NoSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setFocusPolicy(Qt.NoFocus)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.verticalScrollBar().setSingleStep(24)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setMouseTracking(True)
+        self.viewport().setCursor(Qt.PointingHandCursor)
+        self.setStyleSheet("QListView { background: transparent; border: none; }")
+        self._delegate = MachineCardDelegate(self)
+        self.setItemDelegate(self._delegate)
+        self.clicked.connect(self._on_clicked)
+
+        self._priority_timer = QTimer(self)
+        self._priority_timer.setSingleShot(True)
+        self._priority_timer.setInterval(50)
+        self._priority_timer.timeout.connect(self._prioritize_visible)
+        self.verticalScrollBar().valueChanged.connect(self._priority_timer.start)
+
+    def _on_clicked(self, index: QModelIndex):
+        machine = index.data(MachineRole)
+        if machine is not None:
+            self.machine_clicked.emit(machine)
+
+    def _update_grid(self):
+        width = self.viewport().width()
+        cols = max(1, width // (CARD_MIN_WIDTH + CARD_SPACING))
+        cell = QSize(max(CARD_MIN_WIDTH + CARD_SPACING, width // cols), CARD_HEIGHT + CARD_SPACING)
+        card = QSize(cell.width() - CARD_SPACING, CARD_HEIGHT)
+        if card != self._delegate.card_size or cell != self.gridSize():
+            self._delegate.card_size = card
+            self.setGridSize(cell)
+
+    def resizeEvent(self, event):
+        self._update_grid()
+        super().resizeEvent(event)
+
+    def visible_rows(self) -> range:
+        """Rows (of the view's model) currently on screen."""
+        model = self.model()
+        if model is None or not model.rowCount():
+            return range(0)
+        first = self.indexAt(QPoint(1, 1))
+        last = self.indexAt(QPoint(self.viewport().width() - 1, self.viewport().height() - 1))
+        start = first.row() if first.isValid() else 0
+        end = last.row() if last.isValid() else model.rowCount() - 1
+        # The bottom-right corner may fall in the gap of a short last row
+        cols = max(1, self.viewport().width() // max(1, self.gridSize().width()))
+        return range(start, min(model.rowCount(), end + cols + 1))
+
+    def _prioritize_visible(self):
+        model = self.model()
+        if model is None:
+            return
+        urls = []
+        for row in self.visible_rows():
+            machine = model.index(row, 0).data(MachineRole)
+            if machine is not None and machine.avatar:
+                urls.append(machine.avatar)
+        image_fetcher().prioritize(urls, PRIORITY_VISIBLE)
@@ -0,0 +1,275 @@
+"""
+Avatar Pack
+Pre-rendered machine avatars in one memory-mapped file.
+
+Thumbnails are stored as raw ARGB32 premultiplied pixels, back to back,
+after a random generation header, with a JSON index of offsets next to
+the pack:
+
+    {"version": 2, "format": "ARGB32_Premultiplied", "generation": hex,
+     "entries": {key: [offset, width, height, atime]}}
+
+Reading one is a slice of the mapping wrapped in a QImage: no open(),
+no read(), no decoding, so painting hundreds of cards on first show is
+a series of memcpy's. New thumbnails are appended on a background
+thread in small batches, after which the file is mapped again. When the
+pack outgrows max_bytes or is half garbage (replaced entries), it is
+rewritten with the most recently used entries only, under a new
+generation. The two files can't be swapped at once: an index whose
+generation doesn't match the pack header (crash between both writes)
+is dropped instead of pointing into another pack's pixels.
+"""
+
+import atexit
+import json
+import mmap
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from PySide6.QtGui import QImage
+
+from utils.debug import debug_log
+
+PACK_VERSION = 2
+PACK_FORMAT = QImage.Format_ARGB32_Premultiplied
+# Random generation at the start of the pack, repeated in the index
+HEADER_SIZE = 16
+
+
+def _entry_bytes(entry: List) -> int:
+    return entry[1] * entry[2] * 4
+
+
+class AvatarPack:
+    """Append-only pack of rendered thumbnails, read through mmap."""
+
+    def __init__(self, path: Path, max_bytes: int, save_delay: float = 1.0):
+        self.path = Path(path)
+        self.index_path = self.path.with_suffix(".json")
+        self.max_bytes = max_bytes
+        self.save_delay = save_delay
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, List] = {}
+        self._pending: Dict[str, QImage] = {}
+        self._map: Optional[mmap.mmap] = None
+        self._file_size = 0
+        # None: no trusted pack on disk, the next write starts a new one
+        self._generation: Optional[str] = None
+        self._loaded = False
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="avatar-pack")
+        atexit.register(self.close)
+
+    def _load(self):
+        """Read the index and map the pack once (lock held)."""
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return
+        if payload.get("version") != PACK_VERSION:
+            return
+        mapping, size = self._open_map()
+        generation = payload.get("generation")
+        if mapping is None or size < HEADER_SIZE or mapping[:HEADER_SIZE].hex() != generation:
+            if mapping is not None:
+                mapping.close()
+            debug_log("CACHE", "Avatar pack index doesn't match the pack, dropped")
+            return
+        self._map, self._file_size, self._generation = mapping, size, generation
+        # Entries past the end were appended but never made it to disk
+        self._entries = {
+            key: entry for key, entry in payload.get("entries", {}).items()
+            if entry[0] + _entry_bytes(entry) <= self._file_size
+        }
+
+    def _open_map(self):
+        try:
+            with open(self.path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if not size:
+                    return None, 0
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), size
+        except (OSError, ValueError):
+            return None, 0
+
+    def get(self, key: str) -> Optional[QImage]:
+        """Thumbnail stored under key (a copy, safe to keep), or None."""
+        with self._lock:
+            self._load()
+            pending = self._pending.get(key)
+            if pending is not None:
+                self.hits += 1
+                return QImage(pending)
+            entry = self._entries.get(key)
+            mapping = self._map
+            if entry is None or mapping is None:
+                self.misses += 1
+                return None
+            entry[3] = time.time()
+            self.hits += 1
+        offset, width, height = entry[0], entry[1], entry[2]
+        view = memoryview(mapping)[offset:offset + _entry_bytes(entry)]
+        try:
+            wrapped = QImage(view, width, height, width * 4, PACK_FORMAT)
+            image = wrapped.copy()
+            del wrapped
+        finally:
+            view.release()
+        return image
+
+    def add(self, key: str, image: QImage):
+        """Queue a thumbnail; it is appended to the pack shortly after."""
+        with self._lock:
+            self._pending[key] = QImage(image)
+            if self._timer is None:
+                self._timer = threading.Timer(self.save_delay, self._submit)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _submit(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self._writer.submit(self._write)
+        except RuntimeError:
+            pass  # shutting down, close() writes what is left
+
+    def _write(self):
+        """Append the pending thumbnails and map the pack again (writer thread)."""
+        with self._lock:
+            self._load()
+            batch = dict(self._pending)
+        if not batch:
+            return
+        chunks = []
+        for key, image in batch.items():
+            if image.format() != PACK_FORMAT:
+                image = image.convertToFormat(PACK_FORMAT)
+            chunks.append((key, image.width(), image.height(),
+                           bytes(image.constBits())[:image.width() * image.height() * 4]))
+        incoming = sum(len(c[3]) for c in chunks)
+
+        with self._lock:
+            live = sum(_entry_bytes(e) for k, e in self._entries.items() if k not in batch)
+            fresh = self._generation is None
+        if fresh or self._file_size + incoming > self.max_bytes or self._file_size - live > live:
+            if not self._rewrite(batch):
+                return
+
+        try:
+            with open(self.path, "ab") as f:
+                offset = f.tell()
+                added = {}
+                for key, width, height, data in chunks:
+                    f.write(data)
+                    added[key] = [offset, width, height, time.time()]
+                    offset += len(data)
+        except OSError as e:
+            debug_log("CACHE", f"Failed to write avatar pack: {e}")
+            return
+        mapping, size = self._open_map()
+        with self._lock:
+            self._entries.update(added)
+            self._map, self._file_size = mapping, size
+            for key, image in batch.items():
+                if self._pending.get(key) is image:
+                    del self._pending[key]
+        self._save_index()
+
+    def _rewrite(self, replaced: Dict[str, QImage]) -> bool:
+        """
+        Start a new generation of the pack with the most recently used
+        entries that fit in 3/4 of max_bytes, and save its index (writer
+        thread). Returns False if the pack couldn't be written.
+        """
+        with self._lock:
+            mapping = self._map
+            entries = sorted(((k, e) for k, e in self._entries.items() if k not in replaced),
+                             key=lambda item: item[1][3], reverse=True)
+        budget = self.max_bytes * 3 // 4 - sum(i.width() * i.height() * 4 for i in replaced.values())
+        kept: Dict[str, List] = {}
+        header = os.urandom(HEADER_SIZE)
+        tmp = self.path.with_suffix(".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(header)
+                for key, entry in entries:
+                    length = _entry_bytes(entry)
+                    if mapping is None or length > budget:
+                        continue
+                    kept[key] = [f.tell(), entry[1], entry[2], entry[3]]
+                    f.write(mapping[entry[0]:entry[0] + length])
+                    budget -= length
+            os.replace(tmp, self.path)
+        except OSError as e:
+            debug_log("CACHE", f"Failed to rewrite avatar pack: {e}")
+            return False
+        # Readers still holding the old mapping keep reading the old (unlinked) file
+        new_mapping, size = self._open_map()
+        with self._lock:
+            dropped = len(self._entries) - len(kept)
+            self._entries = kept
+            self._map, self._file_size = new_mapping, size
+            self._generation = header.hex()
+        # Right away: the old index doesn't describe this file any more
+        self._save_index()
+        debug_log("CACHE", f"Avatar pack rewritten ({len(kept)} kept, {dropped} dropped)")
+        return True
+
+    def _save_index(self):
+        with self._lock:
+            payload = {"version": PACK_VERSION, "format": "ARGB32_Premultiplied",
+                       "generation": self._generation,
+                       "entries": {k: list(e) for k, e in self._entries.items()}}
+        try:
+            tmp = self.index_path.with_suffix(".tmp.json")
+            tmp.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, self.index_path)
+        except OSError as e:
+            debug_log("CACHE", f"Failed to save avatar pack index: {e}")
+
+    def close(self):
+        """Write pending thumbnails and the index."""
+        with self._lock:
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+        self._writer.shutdown(wait=True)
+        self._write()
+
+    def wait(self):
+        """Block until the thumbnails queued so far are in the pack."""
+        with self._lock:
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+        self._writer.submit(self._write).result()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries),
+                    "bytes": self._file_size, "max_bytes": self.max_bytes}
+
+    def clear(self):
+        self.wait()
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+            self._map, self._file_size = None, 0
+            self._generation = None
+        for path in (self.path, self.index_path):
+            try:
+                path.unlink()
+            except OSError:
+                pass
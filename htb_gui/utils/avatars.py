@@ -0,0 +1,182 @@
+"""
+Avatar Renderer
+Rounded-rect and circular avatars, rendered once per
+(url, size, radius, shape, device pixel ratio) and reused.
+
+Rendered variants live in the image cache's memory tier, so rebuilding
+the machines grid or the leaderboard is a dictionary lookup per avatar.
+They are also kept on disk as small pre-rendered PNG thumbnails, which
+skips decoding the original and painting on the next launch. Packed
+styles (machine avatars, hundreds of them in the grid) go to the
+memory-mapped avatar pack instead, read without any file I/O.
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from PySide6.QtCore import QByteArray, QObject, QRectF, QSize, Qt
+from PySide6.QtGui import QGuiApplication, QPainter, QPainterPath, QPixmap
+from PySide6.QtNetwork import QNetworkReply, QNetworkRequest
+from PySide6.QtWidgets import QWidget
+
+from config import AVATAR_PACK_BYTES, AVATAR_PACK_FILE, AVATAR_THUMB_CACHE_BYTES, AVATAR_THUMB_DIR
+from utils.avatar_pack import AvatarPack
+from utils.image_cache import DiskImageCache, ImageCache, image_cache
+from utils.image_decoder import image_decoder
+
+ROUNDED = "rounded"
+CIRCLE = "circle"
+
+
+@dataclass(frozen=True)
+class AvatarStyle:
+    """
+    How an avatar is displayed: logical size in px, corner radius, shape,
+    and whether its renders are kept in the avatar pack.
+    """
+    size: int
+    radius: int = 0
+    shape: str = ROUNDED
+    packed: bool = False
+
+    def variant(self, dpr: float) -> str:
+        """Cache key suffix of this style at a device pixel ratio."""
+        return f"|{self.shape}:{self.radius}@{dpr:g}"
+
+
+def device_pixel_ratio(widget: Optional[QObject] = None) -> float:
+    """Pixel ratio of a widget's screen (or the primary screen)."""
+    if isinstance(widget, QWidget):
+        return widget.devicePixelRatioF()
+    app = QGuiApplication.instance()
+    return app.devicePixelRatio() if app else 1.0
+
+
+def render_avatar(pixmap: QPixmap, style: AvatarStyle, dpr: float = 1.0) -> QPixmap:
+    """Clip a pixmap to the style's shape at its logical size (GUI thread)."""
+    pixels = round(style.size * dpr)
+    rendered = QPixmap(pixels, pixels)
+    rendered.fill(Qt.transparent)
+    painter = QPainter(rendered)
+    painter.setRenderHint(QPainter.Antialiasing)
+    painter.setRenderHint(QPainter.SmoothPixmapTransform)
+    path = QPainterPath()
+    if style.shape == CIRCLE:
+        path.addEllipse(0, 0, pixels, pixels)
+    else:
+        radius = style.radius * dpr
+        path.addRoundedRect(0, 0, pixels, pixels, radius, radius)
+    painter.setClipPath(path)
+    source = pixmap
+    if pixmap.width() != pixels or pixmap.height() != pixels:
+        source = pixmap.scaled(pixels, pixels, Qt.KeepAspectRatioByExpanding,
+                               Qt.SmoothTransformation)
+    painter.drawPixmap(QRectF(0, 0, pixels, pixels), source,
+                       QRectF((source.width() - pixels) / 2,
+                              (source.height() - pixels) / 2, pixels, pixels))
+    painter.end()
+    rendered.setDevicePixelRatio(dpr)
+    return rendered
+
+
+class AvatarRenderer:
+    """
+    Shared avatar service: looks a variant up in memory, then in the
+    thumbnail cache, then decodes the cached original, and finally
+    renders downloaded bytes. Callbacks get the final pixmap, ready for
+    QLabel.setPixmap / QIcon.
+    """
+
+    def __init__(self, cache: ImageCache, thumbs: DiskImageCache, pack: AvatarPack):
+        self.cache = cache
+        self.thumbs = thumbs
+        self.pack = pack
+
+    def _render(self, url: str, style: AvatarStyle, dpr: float) -> Callable[[QPixmap], QPixmap]:
+        pixels = round(style.size * dpr)
+        variant = style.variant(dpr)
+
+        def render(pixmap: QPixmap) -> QPixmap:
+            rendered = render_avatar(pixmap, style, dpr)
+            self._keep(ImageCache.key(url, pixels, variant), style, rendered)
+            return rendered
+        return render
+
+    def _keep(self, key: str, style: AvatarStyle, rendered: QPixmap):
+        if style.packed:
+            self.pack.add(key, rendered.toImage())
+        else:
+            self.thumbs.put_image(key, rendered.toImage())
+
+    def get(self, url: str, style: AvatarStyle, receiver: Optional[QObject] = None) -> Optional[QPixmap]:
+        """Rendered avatar from memory, or None."""
+        dpr = device_pixel_ratio(receiver)
+        return self.cache.get(url, round(style.size * dpr), style.variant(dpr))
+
+    def load(self, url: str, style: AvatarStyle, callback: Callable[[QPixmap], None],
+             receiver: Optional[QObject] = None) -> bool:
+        """
+        Deliver a cached avatar to callback (at once if already rendered).
+        False if the image is not cached and must be downloaded.
+        """
+        dpr = device_pixel_ratio(receiver)
+        pixels = round(style.size * dpr)
+        variant = style.variant(dpr)
+        pixmap = self.cache.get(url, pixels, variant)
+        if pixmap is not None:
+            callback(pixmap)
+            return True
+
+        thumb_key = ImageCache.key(url, pixels, variant)
+        if style.packed:
+            image = self.pack.get(thumb_key)
+            if image is not None:
+                pixmap = QPixmap.fromImage(image)
+                pixmap.setDevicePixelRatio(dpr)
+                self.cache.remember(url, pixels, variant, pixmap)
+                callback(pixmap)
+                return True
+
+        located = self.thumbs.locate(thumb_key)
+        if located is not None:
+            def thumb_decoded(pixmap: QPixmap):
+                pixmap.setDevicePixelRatio(dpr)
+                self.cache.remember(url, pixels, variant, pixmap)
+                if style.packed:
+                    self.pack.add(thumb_key, pixmap.toImage())
+                callback(pixmap)
+
+            def thumb_failed():
+                self.thumbs.forget(thumb_key)
+                self.cache.load(url, pixels, callback, receiver, variant,
+                                self._render(url, style, dpr))
+
+            image_decoder().decode(located[0], QSize(pixels, pixels), thumb_decoded,
+                                   receiver, "PNG", on_failed=thumb_failed)
+            return True
+
+        return self.cache.load(url, pixels, callback, receiver, variant,
+                               self._render(url, style, dpr))
+
+    def store(self, url: str, data: QByteArray, content_type: Optional[str],
+              style: AvatarStyle, callback: Callable[[QPixmap], None],
+              receiver: Optional[QObject] = None):
+        """Cache downloaded bytes and deliver the rendered avatar."""
+        dpr = device_pixel_ratio(receiver)
+        self.cache.put(url, data, content_type, round(style.size * dpr), callback,
+                       receiver, style.variant(dpr), self._render(url, style, dpr))
+
+    def store_reply(self, url: str, reply: QNetworkReply, style: AvatarStyle,
+                    callback: Callable[[QPixmap], None], receiver: Optional[QObject] = None):
+        """store() for a finished QNetworkReply."""
+        self.store(url, reply.readAll(), reply.header(QNetworkRequest.ContentTypeHeader),
+                   style, callback, receiver)
+
+    def clear(self):
+        self.thumbs.clear()
+        self.pack.clear()
+
+
+# Global avatar renderer
+avatars = AvatarRenderer(image_cache, DiskImageCache(AVATAR_THUMB_DIR, AVATAR_THUMB_CACHE_BYTES),
+                         AvatarPack(AVATAR_PACK_FILE, AVATAR_PACK_BYTES))
@@ -1,46 +1,143 @@
 """
 Debug utilities for HTB Client.
 Provides logging and debugging helpers.
+
+Records go through the standard logging module: nothing is formatted
+unless debug mode is enabled, payload previews are rendered only up to
+the truncation limit, and both formatting and the actual console/file
+writes happen on a background listener thread (rotating files under
+~/.htb_client/logs). Payloads are logged by reference, so callers must
+not mutate them afterwards (API responses aren't).
 """
 
+import atexit
 import json
-from datetime import datetime
+import logging
+import queue
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from typing import Any, Optional
 
-from config import config
+from config import config, LOG_DIR, LOG_MAX_BYTES, LOG_BACKUPS, LOGGER_NAME
+
+# Maximum characters of a payload preview
+PREVIEW_LIMIT = 1000
+
+logger = logging.getLogger(LOGGER_NAME)
+logger.propagate = False
+logger.setLevel(logging.DEBUG if config.debug else logging.WARNING)
+
+_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_listener: Optional[QueueListener] = None
+_listener_lock = threading.Lock()
+
+
+class _Preview:
+    """Payload rendered lazily, and only up to PREVIEW_LIMIT characters."""
+
+    __slots__ = ("data", "_text")
+
+    def __init__(self, data: Any):
+        self.data = data
+        self._text: Optional[str] = None
+
+    def __str__(self) -> str:
+        # Every handler (console, file) formats the record: render once
+        if self._text is None:
+            self._text = self._render()
+        return self._text
+
+    def _render(self) -> str:
+        data = self.data
+        try:
+            if isinstance(data, (bytes, bytearray)):
+                return f"  → <{len(data)} bytes>"
+            if not isinstance(data, (dict, list)):
+                return f"  → {str(data)[:PREVIEW_LIMIT]}"
+            parts = []
+            size = 0
+            encoder = json.JSONEncoder(indent=2, ensure_ascii=False, default=str)
+            for chunk in encoder.iterencode(data):
+                parts.append(chunk)
+                size += len(chunk)
+                if size > PREVIEW_LIMIT:
+                    return "".join(parts)[:PREVIEW_LIMIT] + "\n... (truncated)"
+            return "".join(parts)
+        except Exception as e:
+            return f"  → (could not format data: {e})"
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that enqueues the record as is. The stdlib prepare()
+    formats it (and so the _Preview) on the logging thread; here the
+    listener's handlers do it on the writer thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _start_listener() -> None:
+    """Attach the queue handler and start the writer thread (once)."""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            return
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(logging.Formatter(
+            "[%(asctime)s.%(msecs)03d] %(message)s", datefmt="%H:%M:%S"))
+        handlers = [console]
+        try:
+            LOG_DIR.mkdir(parents=True, exist_ok=True)
+            file_handler = RotatingFileHandler(
+                LOG_DIR / "htb_client.log", maxBytes=LOG_MAX_BYTES,
+                backupCount=LOG_BACKUPS, encoding="utf-8", delay=True)
+            file_handler.setFormatter(logging.Formatter(
+                "%(asctime)s %(levelname)s %(threadName)s %(message)s"))
+            handlers.append(file_handler)
+        except OSError:
+            pass
+        _listener = QueueListener(_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        logger.addHandler(_DeferredQueueHandler(_queue))
+        atexit.register(_listener.stop)
+
+
+def debug_enabled() -> bool:
+    """Whether debug records are emitted (use to skip building expensive messages)."""
+    return logger.isEnabledFor(logging.DEBUG)
 
 
 def debug_log(category: str, message: str, data: Any = None):
     """
     Log a debug message with timestamp and category.
-    
+
     Args:
         category: Log category (e.g., 'API', 'UI', 'CONFIG')
         message: Log message
-        data: Optional data to include
+        data: Optional data to include (previewed lazily, truncated)
     """
-    if not config.debug:
+    if not logger.isEnabledFor(logging.DEBUG):
         return
-    
-    timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-    print(f"[{timestamp}] [{category}] {message}")
-    
-    if data is not None:
-        try:
-            if isinstance(data, (dict, list)):
-                formatted = json.dumps(data, indent=2, ensure_ascii=False)
-                # Limit output for large responses
-                if len(formatted) > 1000:
-                    formatted = formatted[:1000] + "\n... (truncated)"
-                print(formatted)
-            else:
-                print(f"  → {data}")
-        except Exception as e:
-            print(f"  → (could not format data: {e})")
+    _start_listener()
+    if data is None:
+        logger.debug("[%s] %s", category, message)
+    else:
+        logger.debug("[%s] %s\n%s", category, message, _Preview(data))
+
+
+def log_warning(category: str, message: str):
+    """Log a warning (emitted even when debug mode is off)."""
+    _start_listener()
+    logger.warning("[%s] %s", category, message)
 
 
 def debug_request(method: str, url: str, data: Optional[dict] = None):
     """Log an outgoing HTTP request."""
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
     debug_log("API", f"→ {method} {url}")
     if data:
         debug_log("API", "Request body:", data)
@@ -48,6 +145,8 @@ def debug_request(method: str, url: str, data: Optional[dict] = None):
 
 def debug_response(status_code: int, url: str, data: Any = None, error: str = None):
     """Log an HTTP response."""
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
     if error:
         debug_log("API", f"← ERROR {status_code} {url}: {error}")
     else:
@@ -1,75 +1,415 @@
 """
 Image Cache Module
-Caches downloaded images to /tmp for faster loading.
+Caches downloaded images for faster loading.
+
+Two tiers, both least-recently-used with a byte budget:
+- memory: QPixmaps keyed by URL and display size, so re-filtering a grid
+  never touches the disk (IMAGE_MEMORY_CACHE_BYTES)
+- disk: the original response bytes under the XDG cache dir, stored once
+  per content hash (many users share the default avatar) and written on
+  a background thread (IMAGE_DISK_CACHE_BYTES)
 """
 
-import os
+import atexit
 import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
-from PySide6.QtGui import QPixmap
-from PySide6.QtCore import QByteArray
+from typing import Callable, Dict, Optional, Set, Tuple
+from PySide6.QtGui import QImage, QPixmap
+from PySide6.QtCore import QBuffer, QByteArray, QIODevice, QObject, QSize
+
+from config import IMAGE_CACHE_DIR, IMAGE_MEMORY_CACHE_BYTES, IMAGE_DISK_CACHE_BYTES
+from utils.debug import debug_log
+from utils.image_decoder import image_decoder, image_format
+
+CACHE_DIR = IMAGE_CACHE_DIR
+INDEX_VERSION = 1
+INDEX_FILE = "index.json"
+
+def _pixmap_bytes(pixmap: QPixmap) -> int:
+    """Approximate memory used by a decoded pixmap."""
+    return max(1, pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8)
+
+
+class MemoryImageCache:
+    """Decoded pixmaps by URL, evicting least recently used beyond max_bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, QPixmap]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[QPixmap]:
+        with self._lock:
+            pixmap = self._entries.get(url)
+            if pixmap is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(url)
+            self.hits += 1
+            return pixmap
+
+    def put(self, url: str, pixmap: QPixmap):
+        size = _pixmap_bytes(pixmap)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if url in self._entries:
+                self.size -= self._sizes[url]
+            self._entries[url] = pixmap
+            self._entries.move_to_end(url)
+            self._sizes[url] = size
+            self.size += size
+            while self.size > self.max_bytes:
+                old, _ = self._entries.popitem(last=False)
+                self.size -= self._sizes.pop(old)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.size = 0
+
+
+class DiskImageCache:
+    """
+    Original image bytes stored by content hash, plus a small JSON index:
+
+        {"version": 1,
+         "urls":  {url: {"blob": hash, "type": content type}},
+         "blobs": {hash: {"size": bytes, "atime": last access}}}
+
+    Files are written atomically on a single background thread. Blobs
+    least recently accessed are deleted beyond max_bytes, together with
+    the URLs pointing at them; a blob no URL points at any more (the
+    image behind a URL changed) is deleted at once. The URLs of each
+    blob are tracked in memory (built from the index on load).
+    """
+
+    def __init__(self, directory: Path, max_bytes: int, save_delay: float = 2.0):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.save_delay = save_delay
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._urls: Dict[str, dict] = {}
+        self._blobs: Dict[str, dict] = {}
+        self._refs: Dict[str, Set[str]] = {}  # blob -> URLs pointing at it
+        self._loaded = False
+        self._dirty = False
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-cache")
+        atexit.register(self.close)
+
+    def _blob_path(self, blob: str) -> Path:
+        return self.directory / blob[:2] / blob
+
+    def _load(self):
+        """Read the index once (lock held)."""
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.directory / INDEX_FILE, encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return
+        if payload.get("version") != INDEX_VERSION:
+            return
+        self._blobs = payload.get("blobs", {})
+        self._urls = {u: e for u, e in payload.get("urls", {}).items() if e.get("blob") in self._blobs}
+        for url, entry in self._urls.items():
+            self._refs.setdefault(entry["blob"], set()).add(url)
+        self.size = sum(b["size"] for b in self._blobs.values())
+        # Blobs left behind by URLs that were re-pointed (older indexes)
+        orphans = [blob for blob in self._blobs if blob not in self._refs]
+        for blob in orphans:
+            self._drop_blob(blob)
+        if orphans:
+            debug_log("CACHE", f"Deleted {len(orphans)} unreferenced cached images")
+
+    def locate(self, url: str) -> Optional[Tuple[Path, str]]:
+        """Blob file and content type of a cached URL (counts as an access)."""
+        with self._lock:
+            self._load()
+            entry = self._urls.get(url)
+            blob = self._blobs.get(entry["blob"]) if entry else None
+            if blob is None:
+                self.misses += 1
+                return None
+            blob["atime"] = time.time()
+            self.hits += 1
+            self._dirty = True
+            self._schedule()
+            return self._blob_path(entry["blob"]), entry.get("type", "")
+
+    def forget(self, url: str):
+        """Drop the blob of a URL that turned out to be unreadable."""
+        with self._lock:
+            entry = self._urls.get(url)
+            if entry:
+                self._drop_blob(entry["blob"])
+
+    def put(self, url: str, data: bytes, content_type: Optional[str] = None):
+        """Queue the original bytes of an image for writing."""
+        self._writer.submit(self._store, url, bytes(data), content_type or "")
+
+    def put_image(self, url: str, image: QImage):
+        """Queue an image for PNG encoding and writing (on the writer thread)."""
+        self._writer.submit(self._store_image, url, QImage(image))
+
+    def _store_image(self, url: str, image: QImage):
+        data = QByteArray()
+        buffer = QBuffer(data)
+        buffer.open(QIODevice.WriteOnly)
+        if image.save(buffer, "PNG"):
+            self._store(url, data.data(), "image/png")
+
+    def _store(self, url: str, data: bytes, content_type: str):
+        blob = hashlib.blake2b(data, digest_size=16).hexdigest()
+        with self._lock:
+            self._load()
+            exists = blob in self._blobs
+        if not exists:
+            path = self._blob_path(blob)
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix(".tmp")
+                tmp.write_bytes(data)
+                os.replace(tmp, path)
+            except OSError as e:
+                debug_log("CACHE", f"Failed to cache image: {e}")
+                return
+        with self._lock:
+            if blob not in self._blobs:
+                self._blobs[blob] = {"size": len(data), "atime": time.time()}
+                self.size += len(data)
+            else:
+                self._blobs[blob]["atime"] = time.time()
+            old = self._urls.get(url)
+            self._urls[url] = {"blob": blob, "type": content_type}
+            self._refs.setdefault(blob, set()).add(url)
+            if old and old["blob"] != blob:
+                self._unref(old["blob"], url)
+            self._evict()
+            self._dirty = True
+            self._schedule()
+
+    def _unref(self, blob: str, url: str):
+        """url no longer points at blob; delete the blob if nothing else does (lock held)."""
+        urls = self._refs.get(blob)
+        if urls is not None:
+            urls.discard(url)
+            if not urls:
+                self._drop_blob(blob)
+
+    def _drop_blob(self, blob: str):
+        """Forget a blob and the URLs using it, and delete its file (lock held)."""
+        entry = self._blobs.pop(blob, None)
+        if entry:
+            self.size -= entry["size"]
+        for url in self._refs.pop(blob, ()):
+            del self._urls[url]
+        try:
+            self._blob_path(blob).unlink()
+        except OSError:
+            pass
+        self._dirty = True
 
-CACHE_DIR = Path("/tmp/htb_client_cache/images")
+    def _evict(self):
+        """Delete least recently accessed blobs until under max_bytes (lock held)."""
+        if self.size <= self.max_bytes:
+            return
+        for blob in sorted(self._blobs, key=lambda b: self._blobs[b]["atime"]):
+            if self.size <= self.max_bytes:
+                break
+            self._drop_blob(blob)
 
+    def _schedule(self):
+        if self._timer is None:
+            self._timer = threading.Timer(self.save_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
 
-def _ensure_cache_dir():
-    """Create cache directory if it doesn't exist."""
-    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    def flush(self):
+        """Write the index now if it changed."""
+        with self._lock:
+            self._timer = None
+            if not self._dirty:
+                return
+            payload = {"version": INDEX_VERSION, "urls": dict(self._urls),
+                       "blobs": {k: dict(v) for k, v in self._blobs.items()}}
+            self._dirty = False
+        path = self.directory / INDEX_FILE
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError as e:
+            debug_log("CACHE", f"Failed to save image index: {e}")
+
+    def close(self):
+        """Finish pending writes and save the index."""
+        self._writer.shutdown(wait=True)
+        self.flush()
+
+    def wait(self):
+        """Block until the writes queued so far are done."""
+        self._writer.submit(lambda: None).result()
+
+    def clear(self):
+        self.wait()
+        with self._lock:
+            for blob in list(self._blobs):
+                self._drop_blob(blob)
+            self._urls.clear()
+            self._refs.clear()
+            self.size = 0
+            self._dirty = True
+        self.flush()
+
+
+class ImageCache:
+    """
+    Memory tier in front of the disk tier. Images are decoded off the GUI
+    thread at their display size; the memory tier keeps one pixmap per
+    (URL, size, variant), where a variant is an optional render step
+    applied after decoding (see utils/avatars.py).
+    """
+
+    def __init__(self, memory: MemoryImageCache, disk: DiskImageCache):
+        self.memory = memory
+        self.disk = disk
+
+    @staticmethod
+    def key(url: str, size: int, variant: str = "") -> str:
+        return f"{url}#{size}{variant}"
+
+    def get(self, url: str, size: int, variant: str = "") -> Optional[QPixmap]:
+        """Decoded (and rendered) pixmap from memory, or None."""
+        return self.memory.get(self.key(url, size, variant))
+
+    def remember(self, url: str, size: int, variant: str, pixmap: QPixmap):
+        """Put a pixmap produced elsewhere into the memory tier."""
+        self.memory.put(self.key(url, size, variant), pixmap)
+
+    def _finish(self, url: str, size: int, variant: str,
+                render: Optional[Callable[[QPixmap], QPixmap]],
+                callback: Callable[[QPixmap], None]) -> Callable[[QPixmap], None]:
+        def decoded(pixmap: QPixmap):
+            if render:
+                pixmap = render(pixmap)
+            self.remember(url, size, variant, pixmap)
+            callback(pixmap)
+        return decoded
+
+    def load(self, url: str, size: int, callback: Callable[[QPixmap], None],
+             receiver: Optional[QObject] = None, variant: str = "",
+             render: Optional[Callable[[QPixmap], QPixmap]] = None) -> bool:
+        """
+        Deliver a cached image to callback: at once from memory, or after
+        decoding from disk. False if the URL is not cached.
+        """
+        pixmap = self.get(url, size, variant)
+        if pixmap is not None:
+            callback(pixmap)
+            return True
+        located = self.disk.locate(url)
+        if located is None:
+            return False
+        path, content_type = located
+        image_decoder().decode(path, QSize(size, size),
+                               self._finish(url, size, variant, render, callback),
+                               receiver, image_format(content_type),
+                               on_failed=lambda: self.disk.forget(url))
+        return True
+
+    def put(self, url: str, data: QByteArray, content_type: Optional[str], size: int,
+            callback: Callable[[QPixmap], None], receiver: Optional[QObject] = None,
+            variant: str = "", render: Optional[Callable[[QPixmap], QPixmap]] = None):
+        """Store downloaded bytes and deliver them decoded at `size`."""
+        raw = data.data() if isinstance(data, QByteArray) else bytes(data)
+        self.disk.put(url, raw, content_type)
+        image_decoder().decode(raw, QSize(size, size),
+                               self._finish(url, size, variant, render, callback),
+                               receiver, image_format(content_type))
+
+    def stats(self) -> dict:
+        return {
+            tier: {"hits": c.hits, "misses": c.misses, "bytes": c.size, "max_bytes": c.max_bytes}
+            for tier, c in (("memory", self.memory), ("disk", self.disk))
+        }
+
+    def clear(self):
+        self.memory.clear()
+        self.disk.clear()
 
 
-def _get_cache_path(url: str) -> Path:
-    """Get cache file path for a URL."""
-    url_hash = hashlib.md5(url.encode()).hexdigest()
-    return CACHE_DIR / f"{url_hash}.png"
+# Global image cache
+image_cache = ImageCache(MemoryImageCache(IMAGE_MEMORY_CACHE_BYTES),
+                         DiskImageCache(CACHE_DIR, IMAGE_DISK_CACHE_BYTES))
 
 
-def get_cached_image(url: str) -> Optional[QPixmap]:
+def get_cached_image(url: str, size: int) -> Optional[QPixmap]:
     """
-    Get image from cache if it exists.
-    
+    Get an image already decoded at `size` from memory.
+
     Args:
         url: The image URL
-        
+        size: Display size in pixels (square)
+
     Returns:
-        QPixmap if cached, None otherwise
+        QPixmap if in memory, None otherwise
     """
-    cache_path = _get_cache_path(url)
-    if cache_path.exists():
-        pixmap = QPixmap()
-        if pixmap.load(str(cache_path)):
-            return pixmap
-    return None
+    return image_cache.get(url, size)
 
 
-def save_to_cache(url: str, data: QByteArray) -> Optional[QPixmap]:
+def load_cached_image(url: str, size: int, callback: Callable[[QPixmap], None],
+                      receiver: Optional[QObject] = None) -> bool:
     """
-    Save image data to cache and return pixmap.
-    
+    Deliver a cached image (memory or disk) to callback on the GUI thread.
+
     Args:
         url: The image URL
-        data: Raw image data from network reply
-        
+        size: Display size in pixels (square)
+        callback: Called with the pixmap (at once if it is in memory)
+        receiver: Widget the callback belongs to; skipped if it was deleted
+
     Returns:
-        QPixmap if successful, None otherwise
+        False if the image is not cached and must be downloaded
     """
-    _ensure_cache_dir()
-    pixmap = QPixmap()
-    if pixmap.loadFromData(data):
-        cache_path = _get_cache_path(url)
-        try:
-            pixmap.save(str(cache_path), "PNG")
-        except Exception:
-            pass  # Silently fail on cache save errors
-        return pixmap
-    return None
+    return image_cache.load(url, size, callback, receiver)
+
+
+def save_to_cache(url: str, data: QByteArray, content_type: Optional[str], size: int,
+                  callback: Callable[[QPixmap], None],
+                  receiver: Optional[QObject] = None):
+    """
+    Save downloaded image data and deliver it decoded at `size`.
+
+    Args:
+        url: The image URL
+        data: Raw image data from network reply
+        content_type: Content-Type header of the reply, if known
+        size: Display size in pixels (square)
+        callback: Called with the pixmap once decoded
+        receiver: Widget the callback belongs to; skipped if it was deleted
+    """
+    image_cache.put(url, data, content_type, size, callback, receiver)
 
 
 def clear_cache():
     """Clear all cached images."""
-    if CACHE_DIR.exists():
-        for f in CACHE_DIR.iterdir():
-            try:
-                f.unlink()
-            except Exception:
-                pass
+    image_cache.clear()
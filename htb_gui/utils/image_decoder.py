@@ -0,0 +1,159 @@
+"""
+Image Decoder
+Decodes avatars on a thread pool, straight to their display size.
+
+QImageReader scales while decoding (JPEG downscales in the DCT), so a
+256 px avatar shown at 40 px never exists at full resolution. Workers
+only produce QImages; the QPixmap is made on the GUI thread when the
+result is delivered.
+"""
+
+import itertools
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple, Union
+
+import shiboken6
+from PySide6.QtCore import (
+    QBuffer, QByteArray, QIODevice, QObject, QRect, QRunnable, QSize,
+    QThreadPool, Qt, Signal,
+)
+from PySide6.QtGui import QImage, QImageReader, QPixmap
+
+# Decoding threads (avatars are small, more threads only add contention)
+DECODE_THREADS = 2
+
+ImageSource = Union[bytes, QByteArray, Path]
+
+# Qt image format names by content type
+_FORMATS = {
+    "image/png": "PNG", "image/jpeg": "JPEG", "image/jpg": "JPEG",
+    "image/webp": "WEBP", "image/gif": "GIF", "image/svg+xml": "SVG",
+}
+
+
+def image_format(content_type: Optional[str]) -> Optional[str]:
+    """Qt image format name of a Content-Type header (None to sniff)."""
+    if not content_type:
+        return None
+    return _FORMATS.get(content_type.split(";")[0].strip().lower())
+
+
+def decode_image(source: ImageSource, size: Optional[QSize] = None,
+                 image_format: Optional[str] = None) -> QImage:
+    """
+    Decode image bytes or a file, cropped to fill `size` (any thread).
+
+    Args:
+        source: Encoded bytes or a file path
+        size: Display size (None keeps the original size)
+        image_format: Qt format name ('PNG', 'JPEG'...), None to sniff
+
+    Returns:
+        The image, or a null QImage if it could not be decoded
+    """
+    buffer = None
+    if isinstance(source, Path):
+        reader = QImageReader(str(source), (image_format or "").encode())
+    else:
+        buffer = QBuffer()
+        buffer.setData(QByteArray(source))
+        buffer.open(QIODevice.ReadOnly)
+        reader = QImageReader(buffer, (image_format or "").encode())
+    reader.setAutoTransform(True)
+
+    original = reader.size()
+    if size and original.isValid():
+        scaled = original.scaled(size, Qt.KeepAspectRatioByExpanding)
+        reader.setScaledSize(scaled)
+        reader.setScaledClipRect(QRect((scaled.width() - size.width()) // 2,
+                                       (scaled.height() - size.height()) // 2,
+                                       size.width(), size.height()))
+    image = reader.read()
+    if buffer is not None:
+        buffer.close()
+    if image.isNull() or not size or image.size() == size:
+        return image
+    # Formats that can't report their size up front: scale after decoding
+    image = image.scaled(size, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
+    return image.copy((image.width() - size.width()) // 2,
+                      (image.height() - size.height()) // 2,
+                      size.width(), size.height())
+
+
+class _DecodeTask(QRunnable):
+    def __init__(self, job: int, source: ImageSource, size: Optional[QSize],
+                 image_format: Optional[str], decoder: "ImageDecoder"):
+        super().__init__()
+        self.job = job
+        self.source = source
+        self.size = size
+        self.image_format = image_format
+        self.decoder = decoder
+
+    def run(self):
+        try:
+            image = decode_image(self.source, self.size, self.image_format)
+        except Exception:
+            image = QImage()
+        # Queued to the decoder's (GUI) thread
+        self.decoder._decoded.emit(self.job, image)
+
+
+class ImageDecoder(QObject):
+    """
+    Runs decode_image on a QThreadPool and hands QPixmaps back on the
+    GUI thread. Results for receivers deleted in the meantime are dropped.
+    """
+
+    _decoded = Signal(int, QImage)
+
+    def __init__(self, threads: int = DECODE_THREADS, parent=None):
+        super().__init__(parent)
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(threads)
+        self._jobs: Dict[int, Tuple[Callable[[QPixmap], None], Optional[QObject],
+                                    Optional[Callable[[], None]]]] = {}
+        self._ids = itertools.count(1)
+        self._decoded.connect(self._deliver)
+
+    def decode(self, source: ImageSource, size: Optional[QSize],
+               callback: Callable[[QPixmap], None],
+               receiver: Optional[QObject] = None,
+               image_format: Optional[str] = None,
+               on_failed: Optional[Callable[[], None]] = None):
+        """
+        Decode in the background and call callback(pixmap) on the GUI thread.
+        The callback is skipped if receiver was deleted; on_failed is called
+        instead if the data could not be decoded.
+        """
+        job = next(self._ids)
+        self._jobs[job] = (callback, receiver, on_failed)
+        self._pool.start(_DecodeTask(job, source, size, image_format, self))
+
+    def _deliver(self, job: int, image: QImage):
+        callback, receiver, on_failed = self._jobs.pop(job, (None, None, None))
+        if callback is None:
+            return
+        if image.isNull():
+            if on_failed:
+                on_failed()
+            return
+        if receiver is not None and not shiboken6.isValid(receiver):
+            return
+        callback(QPixmap.fromImage(image))
+
+    def wait(self, msecs: int = -1) -> bool:
+        """Wait for queued decodes (results are still delivered by the event loop)."""
+        return self._pool.waitForDone(msecs)
+
+
+_decoder: Optional[ImageDecoder] = None
+
+
+def image_decoder() -> ImageDecoder:
+    """The shared decoder (created on first use, from the GUI thread)."""
+    global _decoder
+    if _decoder is None:
+        _decoder = ImageDecoder()
+    return _decoder
+
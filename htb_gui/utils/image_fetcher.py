@@ -0,0 +1,170 @@
+"""
+Image Fetcher
+Schedules avatar downloads for every page.
+
+- One download per URL: later requests for an in-flight or queued URL
+  just wait for it
+- At most MAX_CONCURRENT downloads at a time, highest priority first
+  (pages raise the priority of avatars currently in their viewport)
+- Requests whose widgets were destroyed are dropped from the queue, and
+  in-flight downloads nobody waits for any more are aborted
+- `requested` and `downloaded` let the idle prefetcher (ui/prefetch.py)
+  step aside for foreground downloads and count its bytes
+"""
+
+import heapq
+import itertools
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import shiboken6
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
+from PySide6.QtGui import QPixmap
+from PySide6.QtNetwork import QNetworkReply, QNetworkRequest
+
+from utils.avatars import AvatarStyle, avatars
+from utils.debug import debug_log
+from utils.network import network_manager
+
+# Parallel downloads (Qt opens at most 6 HTTP/1.1 connections per host)
+MAX_CONCURRENT = 6
+
+# Priorities: higher first
+PRIORITY_PREFETCH = -10
+PRIORITY_NORMAL = 0
+PRIORITY_VISIBLE = 10
+
+
+class _Waiter:
+    __slots__ = ("token", "style", "callback", "receiver")
+
+    def __init__(self, token: int, style: AvatarStyle,
+                 callback: Callable[[QPixmap], None], receiver: Optional[QObject]):
+        self.token = token
+        self.style = style
+        self.callback = callback
+        self.receiver = receiver
+
+
+class ImageFetcher(QObject):
+    """Deduplicating, prioritized avatar download queue (GUI thread only)."""
+
+    # A download was queued for url with this priority
+    requested = Signal(str, int)
+    # A download finished: url, bytes received (0 if it failed or was aborted)
+    downloaded = Signal(str, int)
+
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT, parent=None):
+        super().__init__(parent)
+        self.max_concurrent = max_concurrent
+        self._waiters: Dict[str, List[_Waiter]] = {}
+        self._queued: Dict[str, int] = {}  # url -> current priority
+        self._heap: List[Tuple[int, int, str]] = []
+        self._active: Dict[str, QNetworkReply] = {}
+        self._seq = itertools.count()
+        self._tokens = itertools.count(1)
+        self._pump_timer = QTimer(self)
+        self._pump_timer.setSingleShot(True)
+        self._pump_timer.timeout.connect(self._pump)
+
+    def fetch(self, url: str, style: AvatarStyle, callback: Callable[[QPixmap], None],
+              receiver: Optional[QObject] = None, priority: int = PRIORITY_NORMAL) -> bool:
+        """
+        Deliver the avatar at `url` rendered with `style` to callback:
+        from the cache if possible, otherwise once downloaded.
+        True if it was cached (nothing to download).
+        """
+        if not url or avatars.load(url, style, callback, receiver):
+            return True
+        waiter = _Waiter(next(self._tokens), style, callback, receiver)
+        self._waiters.setdefault(url, []).append(waiter)
+        if receiver is not None:
+            receiver.destroyed.connect(lambda *_: self._forget(url, waiter.token))
+        if url not in self._active:
+            if self._queued.get(url, priority - 1) < priority:
+                self._enqueue(url, priority)
+            # Start on the next event loop pass, once the caller queued everything
+            if not self._pump_timer.isActive():
+                self._pump_timer.start(0)
+        self.requested.emit(url, priority)
+        return False
+
+    def prioritize(self, urls: Iterable[str], priority: int = PRIORITY_VISIBLE):
+        """Raise the priority of queued URLs (e.g. avatars scrolled into view)."""
+        for url in urls:
+            if url in self._queued and self._queued[url] < priority:
+                self._enqueue(url, priority)
+
+    def _enqueue(self, url: str, priority: int):
+        self._queued[url] = priority
+        heapq.heappush(self._heap, (-priority, next(self._seq), url))
+
+    def _forget(self, url: str, token: int):
+        """A receiver was destroyed: drop its request, abort if nobody waits."""
+        current = self._waiters.get(url, [])
+        waiters = [w for w in current if w.token != token]
+        if len(waiters) == len(current):
+            return  # already delivered
+        if waiters:
+            self._waiters[url] = waiters
+            return
+        self._waiters.pop(url, None)
+        self._queued.pop(url, None)
+        reply = self._active.get(url)
+        # At shutdown the manager may have deleted its replies already
+        if reply is not None and shiboken6.isValid(reply):
+            debug_log("IMAGES", f"Aborting unused download {url}")
+            reply.abort()
+
+    @Slot()
+    def _pump(self):
+        while len(self._active) < self.max_concurrent and self._heap:
+            neg_priority, _, url = heapq.heappop(self._heap)
+            if self._queued.get(url) != -neg_priority:
+                continue  # stale entry (re-prioritized or cancelled)
+            del self._queued[url]
+            if url not in self._waiters:
+                continue
+            reply = network_manager().fetch(url, self._on_finished)
+            reply.setProperty("url", url)
+            self._active[url] = reply
+
+    def _on_finished(self, reply: QNetworkReply):
+        url = reply.property("url")
+        self._active.pop(url, None)
+        waiters = self._waiters.pop(url, [])
+        data = reply.readAll() if reply.error() == QNetworkReply.NoError else None
+        if data is not None and waiters:
+            content_type = reply.header(QNetworkRequest.ContentTypeHeader)
+            by_style: Dict[AvatarStyle, List[_Waiter]] = {}
+            for waiter in waiters:
+                by_style.setdefault(waiter.style, []).append(waiter)
+            for style, group in by_style.items():
+                avatars.store(url, data, content_type, style, self._fan_out(group),
+                              group[0].receiver if len(group) == 1 else None)
+        elif reply.error() not in (QNetworkReply.NoError, QNetworkReply.OperationCanceledError):
+            debug_log("IMAGES", f"Download failed {url}: {reply.errorString()}")
+        self.downloaded.emit(url, data.size() if data is not None else 0)
+        self._pump()
+
+    @staticmethod
+    def _fan_out(waiters: List[_Waiter]) -> Callable[[QPixmap], None]:
+        def deliver(pixmap: QPixmap):
+            for waiter in waiters:
+                if waiter.receiver is None or shiboken6.isValid(waiter.receiver):
+                    waiter.callback(pixmap)
+        return deliver
+
+    def pending(self) -> int:
+        """Queued plus in-flight downloads."""
+        return len(self._queued) + len(self._active)
+
+
+_fetcher: Optional[ImageFetcher] = None
+
+
+def image_fetcher() -> ImageFetcher:
+    """The shared fetcher (created on first use, from the GUI thread)."""
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = ImageFetcher()
+    return _fetcher
@@ -0,0 +1,175 @@
+"""
+Metrics registry for HTB Client.
+Per-endpoint request counts, latency/size percentiles, cache hits,
+retries and errors, fed by HTBClient and the shared network manager.
+"""
+
+import json
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, Optional
+
+# Samples kept per histogram (most recent ones)
+RESERVOIR_SIZE = 1024
+
+
+class Histogram:
+    """Count/sum/max plus a bounded window of recent samples for percentiles."""
+
+    def __init__(self, size: int = RESERVOIR_SIZE):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self._samples.append(value)
+
+    def percentile(self, p: float) -> float:
+        """Nearest-rank percentile (0-100) over the recent samples."""
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class EndpointMetrics:
+    """Counters of one endpoint template (or avatar host)."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.retries = 0
+        self.cache_hits = 0
+        self.not_modified = 0
+        self.coalesced = 0
+        self.connections = 0
+        self.http2 = 0
+        self.bytes = 0
+        self.status: Dict[int, int] = {}
+        self.latency = Histogram()
+        self.size = Histogram()
+
+    def snapshot(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "rate_limited": self.rate_limited,
+            "retries": self.retries,
+            "cache_hits": self.cache_hits,
+            "not_modified": self.not_modified,
+            "coalesced": self.coalesced,
+            "connections": self.connections,
+            "http2": self.http2,
+            "bytes": self.bytes,
+            "status": {str(k): v for k, v in sorted(self.status.items())},
+            "latency_ms": {k: round(v * 1000, 2) if k != "count" else v
+                           for k, v in self.latency.snapshot().items()},
+            "size_bytes": self.size.snapshot(),
+        }
+
+
+class MetricsRegistry:
+    """
+    Thread-safe metrics shared by every worker thread.
+    Entries are grouped ('api', 'avatar') and keyed by endpoint template or host.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._groups: Dict[str, Dict[str, EndpointMetrics]] = {}
+
+    def _get(self, group: str, key: str) -> EndpointMetrics:
+        return self._groups.setdefault(group, {}).setdefault(key, EndpointMetrics())
+
+    def record_request(self, group: str, key: str, latency: float,
+                       status: int = 0, size: int = 0, error: bool = False):
+        """
+        Record one network round-trip.
+
+        Args:
+            group: 'api' or 'avatar'
+            key: Endpoint template or host
+            latency: Seconds until the response (or failure)
+            status: HTTP status (0 if no response)
+            size: Response body size in bytes
+            error: Transport failure or HTTP status >= 400
+        """
+        with self._lock:
+            m = self._get(group, key)
+            m.requests += 1
+            m.latency.add(latency)
+            if status:
+                m.status[status] = m.status.get(status, 0) + 1
+            if status == 429:
+                m.rate_limited += 1
+            if status == 304:
+                m.not_modified += 1
+            if error or status >= 400:
+                m.errors += 1
+            if size:
+                m.bytes += size
+                m.size.add(size)
+
+    def _bump(self, group: str, key: str, counter: str):
+        with self._lock:
+            m = self._get(group, key)
+            setattr(m, counter, getattr(m, counter) + 1)
+
+    def record_cache_hit(self, key: str, group: str = "api"):
+        self._bump(group, key, "cache_hits")
+
+    def record_retry(self, key: str, group: str = "api"):
+        self._bump(group, key, "retries")
+
+    def record_coalesced(self, key: str, group: str = "api"):
+        self._bump(group, key, "coalesced")
+
+    def record_connection(self, key: str, group: str = "avatar"):
+        """A new (TLS) connection was opened; requests - connections were reused."""
+        self._bump(group, key, "connections")
+
+    def record_http2(self, key: str, group: str = "avatar"):
+        self._bump(group, key, "http2")
+
+    def snapshot(self, group: Optional[str] = None) -> dict:
+        """Get {group: {key: metrics}} (or {key: metrics} for one group)."""
+        with self._lock:
+            data = {
+                g: {k: m.snapshot() for k, m in sorted(entries.items())}
+                for g, entries in self._groups.items()
+            }
+        return data.get(group, {}) if group else data
+
+    def reset(self):
+        with self._lock:
+            self._groups.clear()
+
+    def dump(self, path: Path):
+        """Write the snapshot to a JSON file."""
+        try:
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(self.snapshot(), indent=2))
+        except OSError:
+            pass
+
+
+# Global metrics instance
+metrics = MetricsRegistry()
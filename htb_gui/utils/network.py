@@ -0,0 +1,105 @@
+"""
+Network helpers for HTB Client.
+QNetworkAccessManager that feeds the metrics registry, and the shared
+instance every page downloads through.
+
+One manager means one connection pool: avatars of the dashboard, the
+machines grid and the seasons page reuse the same keep-alive (or HTTP/2)
+connections to the image host instead of opening a pool per page.
+"""
+
+import time
+from typing import Callable, Optional
+
+import shiboken6
+from PySide6.QtCore import QObject, QUrl
+from PySide6.QtNetwork import (
+    QNetworkAccessManager, QNetworkDiskCache, QNetworkReply, QNetworkRequest,
+)
+
+from config import HTTP_CACHE_DIR, HTTP_CACHE_BYTES
+from utils.metrics import metrics
+
+
+class InstrumentedNetworkManager(QNetworkAccessManager):
+    """
+    Drop-in QNetworkAccessManager recording latency, size and errors of
+    every reply under the given metrics group, keyed by host.
+    New TLS connections and HTTP/2 replies are counted too, so
+    requests - connections is the number of reused connections.
+    """
+
+    def __init__(self, parent=None, group: str = "avatar"):
+        super().__init__(parent)
+        self._group = group
+        self.encrypted.connect(self._on_encrypted)
+
+    def createRequest(self, op, request, outgoing_data=None):
+        reply = super().createRequest(op, request, outgoing_data)
+        started = time.monotonic()
+        host = request.url().host()
+        reply.finished.connect(lambda: self._record(reply, host, started))
+        return reply
+
+    def _on_encrypted(self, reply: QNetworkReply):
+        metrics.record_connection(reply.url().host(), self._group)
+
+    def _record(self, reply: QNetworkReply, host: str, started: float):
+        if reply.attribute(QNetworkRequest.SourceIsFromCacheAttribute):
+            metrics.record_cache_hit(host, self._group)
+            return
+        status = reply.attribute(QNetworkRequest.HttpStatusCodeAttribute) or 0
+        size = reply.bytesAvailable()
+        metrics.record_request(self._group, host, time.monotonic() - started,
+                               int(status), int(size),
+                               error=reply.error() != QNetworkReply.NoError)
+        if reply.attribute(QNetworkRequest.Http2WasUsedAttribute):
+            metrics.record_http2(host, self._group)
+
+    def fetch(self, url: str, callback: Callable[[QNetworkReply], None],
+              receiver: Optional[QObject] = None, cache: bool = True) -> QNetworkReply:
+        """
+        GET url and call callback(reply) when it finishes (also on errors).
+
+        Args:
+            url: URL to download
+            callback: Gets the finished reply; it is deleted afterwards
+            receiver: Skip the callback if this object was deleted meanwhile
+            cache: Store the response in the HTTP disk cache
+
+        Returns:
+            The reply (e.g. to abort it)
+        """
+        request = QNetworkRequest(QUrl(url))
+        request.setAttribute(QNetworkRequest.Http2AllowedAttribute, True)
+        request.setAttribute(QNetworkRequest.CacheLoadControlAttribute,
+                             QNetworkRequest.PreferNetwork)
+        request.setAttribute(QNetworkRequest.CacheSaveControlAttribute, cache)
+        reply = self.get(request)
+
+        def finished():
+            try:
+                if receiver is None or shiboken6.isValid(receiver):
+                    callback(reply)
+            finally:
+                reply.deleteLater()
+        reply.finished.connect(finished)
+        return reply
+
+
+_manager: Optional[InstrumentedNetworkManager] = None
+
+
+def network_manager() -> InstrumentedNetworkManager:
+    """
+    The application-wide manager (created on first use, from the GUI thread),
+    with a size-capped HTTP disk cache that honors Cache-Control/ETag.
+    """
+    global _manager
+    if _manager is None:
+        _manager = InstrumentedNetworkManager()
+        cache = QNetworkDiskCache(_manager)
+        cache.setCacheDirectory(str(HTTP_CACHE_DIR))
+        cache.setMaximumCacheSize(HTTP_CACHE_BYTES)
+        _manager.setCache(cache)
+    return _manager
@@ -0,0 +1,284 @@
+"""
+Search Index
+Ranked, typo-tolerant search over short text fields (machine names,
+creators, labels...).
+
+Every entry is a list of (text, weight) fields, split into lowercase
+words. A query word matches an indexed word:
+
+    exactly          "lame"     → Lame
+    as a prefix      "mon"      → Monitored
+    as a substring   "tor"      → Monitored   (3+ chars, trigram lookup)
+    with one typo    "monitred" → Monitored   (4+ chars, deletion lookup)
+
+An entry matches when every query word matches one of its words; its
+score is the sum, per query word, of the best match quality times the
+field weight.
+
+Fields of the same weight share one word table. A query word is looked
+up in each table (bisect over the sorted vocabulary, trigram and
+deletion dicts) and the matching entries come out as one set per
+(quality, weight) tier, so even a one-letter query over tens of
+thousands of entries is a few set unions, not a loop over entries.
+"""
+
+import re
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Callable, Dict, Hashable, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+Fields = Sequence[Tuple[str, float]]
+
+# Match quality, multiplied by the field weight
+MATCH_EXACT = 1.0
+MATCH_PREFIX = 0.8
+MATCH_SUBSTRING = 0.5
+MATCH_FUZZY = 0.4
+
+# Shorter words are only matched by prefix / exactly
+SUBSTRING_MIN_LENGTH = 3
+FUZZY_MIN_LENGTH = 4
+
+# Query words whose results are kept until the index changes
+TIERS_CACHE_SIZE = 256
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase words of text."""
+    return _WORD_RE.findall(text.lower())
+
+
+def _trigrams(word: str) -> Set[str]:
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+def _deletions(word: str) -> Set[str]:
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def _discard(table: Dict[str, Set[str]], variants: Iterable[str], word: str):
+    for variant in variants:
+        words = table.get(variant)
+        if words is not None:
+            words.discard(word)
+            if not words:
+                del table[variant]
+
+
+class _WordTable:
+    """Words of all the fields sharing one weight."""
+
+    def __init__(self):
+        self.keys: Dict[str, Set[Hashable]] = {}
+        self.trigrams: Dict[str, Set[str]] = defaultdict(set)
+        self.deletions: Dict[str, Set[str]] = defaultdict(set)
+        self._vocab: List[str] = []
+        self._vocab_dirty = False
+
+    def add(self, word: str, key: Hashable):
+        keys = self.keys.get(word)
+        if keys is None:
+            keys = self.keys[word] = set()
+            self._vocab_dirty = True
+            if len(word) >= SUBSTRING_MIN_LENGTH:
+                for gram in _trigrams(word):
+                    self.trigrams[gram].add(word)
+            if len(word) >= FUZZY_MIN_LENGTH:
+                for variant in _deletions(word):
+                    self.deletions[variant].add(word)
+        keys.add(key)
+
+    def remove(self, word: str, key: Hashable):
+        keys = self.keys[word]
+        keys.discard(key)
+        if keys:
+            return
+        del self.keys[word]
+        self._vocab_dirty = True
+        if len(word) >= SUBSTRING_MIN_LENGTH:
+            _discard(self.trigrams, _trigrams(word), word)
+        if len(word) >= FUZZY_MIN_LENGTH:
+            _discard(self.deletions, _deletions(word), word)
+
+    def _union(self, words: Iterable[str]) -> Set[Hashable]:
+        return set().union(*map(self.keys.__getitem__, words))
+
+    def lookup(self, term: str) -> List[Tuple[float, Set[Hashable]]]:
+        """(quality, keys) of the entries whose words match term."""
+        if self._vocab_dirty:
+            self._vocab = sorted(self.keys)
+            self._vocab_dirty = False
+        found = []
+        exact = self.keys.get(term)
+        if exact:
+            found.append((MATCH_EXACT, exact))
+
+        # Prefix: a contiguous run of the sorted vocabulary
+        start = bisect_left(self._vocab, term)
+        end = bisect_left(self._vocab, term + "\uffff", start)
+        if end - start > (1 if exact else 0):
+            found.append((MATCH_PREFIX, self._union(self._vocab[start:end])))
+
+        if len(term) >= SUBSTRING_MIN_LENGTH:
+            grams = sorted((self.trigrams.get(g, set()) for g in _trigrams(term)), key=len)
+            words = grams[0].intersection(*grams[1:])
+            if len(term) > 3:
+                # Sharing the trigrams doesn't make it a substring ("abcab" / "bcabc")
+                words = [w for w in words if term in w]
+            if words:
+                found.append((MATCH_SUBSTRING, self._union(words)))
+
+        if len(term) >= FUZZY_MIN_LENGTH:
+            # One letter less on either side: insertion, deletion, substitution, transposition
+            deletions = self.deletions
+            words = set(deletions.get(term, ()))
+            for variant in _deletions(term):
+                if variant in self.keys:
+                    words.add(variant)
+                words.update(deletions.get(variant, ()))
+            if words:
+                found.append((MATCH_FUZZY, self._union(words)))
+        return found
+
+
+class SearchIndex:
+    """
+    Word index with prefix, substring and one-typo lookups.
+    Thread-safe: it can be synced from a worker while the GUI queries it.
+    """
+
+    def __init__(self):
+        self._fields: Dict[Hashable, Tuple] = {}
+        self._words: Dict[Hashable, Dict[str, float]] = {}
+        self._tables: Dict[float, _WordTable] = {}
+        self._cache: Dict[str, Dict[float, Set[Hashable]]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    # ---- indexing ----
+
+    def add(self, key: Hashable, fields: Fields):
+        """Index (or re-index) key with the given (text, weight) fields."""
+        fields = tuple(fields)
+        with self._lock:
+            if self._fields.get(key) == fields:
+                return
+            self._remove(key)
+            self._cache.clear()
+            words: Dict[str, float] = {}
+            for text, weight in fields:
+                for word in tokenize(text or ""):
+                    if weight > words.get(word, 0.0):
+                        words[word] = weight
+            self._fields[key] = fields
+            self._words[key] = words
+            for word, weight in words.items():
+                table = self._tables.get(weight)
+                if table is None:
+                    table = self._tables[weight] = _WordTable()
+                table.add(word, key)
+
+    def remove(self, key: Hashable):
+        """Drop key from the index (no-op if absent)."""
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: Hashable):
+        if self._fields.pop(key, None) is not None:
+            self._cache.clear()
+        for word, weight in self._words.pop(key, {}).items():
+            self._tables[weight].remove(word, key)
+
+    def sync(self, entries: Mapping[Hashable, Fields],
+             should_stop: Optional[Callable[[], bool]] = None) -> bool:
+        """
+        Make the index hold exactly these entries; unchanged ones are kept
+        as is. Queries running meanwhile see it half-way, never broken.
+
+        should_stop is checked between entries (outside the lock): when it
+        returns True the sync stops there and False is returned.
+        """
+        with self._lock:
+            gone = [k for k in self._fields if k not in entries]
+        for key in gone:
+            if should_stop and should_stop():
+                return False
+            self.remove(key)
+        for key, fields in entries.items():
+            if should_stop and should_stop():
+                return False
+            self.add(key, fields)
+        return True
+
+    def warm(self, length: int = 1, should_stop: Optional[Callable[[], bool]] = None) -> bool:
+        """
+        Compute ahead the results of every query word of this length (the
+        first keystroke matches the most words, so it is the slowest).
+        Stops like sync() when should_stop returns True.
+        """
+        with self._lock:
+            prefixes = {w[:length] for t in self._tables.values() for w in t.keys if len(w) >= length}
+        for prefix in prefixes:
+            if should_stop and should_stop():
+                return False
+            with self._lock:
+                self._tiers(prefix)
+        return True
+
+    # ---- querying ----
+
+    def _tiers(self, term: str) -> Dict[float, Set[Hashable]]:
+        """Entries matching term, grouped by score (disjoint sets, not to be modified)."""
+        cached = self._cache.get(term)
+        if cached is not None:
+            return cached
+        tiers: Dict[float, Set[Hashable]] = {}
+        for weight, table in self._tables.items():
+            for quality, keys in table.lookup(term):
+                score = quality * weight
+                tiers[score] = tiers[score] | keys if score in tiers else keys
+        # Keep every entry in its best tier only
+        seen: Set[Hashable] = set()
+        best: Dict[float, Set[Hashable]] = {}
+        for score in sorted(tiers, reverse=True):
+            keys = tiers[score] - seen
+            if keys:
+                seen |= keys
+                best[score] = keys
+        if len(self._cache) >= TIERS_CACHE_SIZE:
+            self._cache.clear()
+        self._cache[term] = best
+        return best
+
+    def search(self, query: str) -> Dict[Hashable, float]:
+        """
+        Score of every entry matching all the words of query.
+
+        Returns:
+            {key: score}, higher is better; empty for an empty query
+        """
+        with self._lock:
+            tiers: Optional[Dict[float, Set[Hashable]]] = None
+            for term in dict.fromkeys(tokenize(query)):
+                term_tiers = self._tiers(term)
+                if tiers is None:
+                    tiers = term_tiers
+                else:
+                    combined: Dict[float, Set[Hashable]] = defaultdict(set)
+                    for score, keys in tiers.items():
+                        for term_score, term_keys in term_tiers.items():
+                            both = keys & term_keys
+                            if both:
+                                combined[score + term_score] |= both
+                    tiers = combined
+                if not tiers:
+                    return {}
+        scores: Dict[Hashable, float] = {}
+        for score, keys in (tiers or {}).items():
+            scores.update(dict.fromkeys(keys, score))
+        return scores